@@ -0,0 +1,108 @@
+"""
+Micro-benchmarks for the response decoding fast path.
+
+Compares the default decode path (stdlib json + pydantic validation) with the
+fast path (orjson when installed + model_construct), and proof payload
+encoding with and without a pre-encoded payload.
+
+    python benchmarks/bench_decode.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from runrgateway.client import ProxyResponse  # noqa: E402
+from runrgateway.utils import codec  # noqa: E402
+
+
+def _sample_response(results: int) -> bytes:
+    organic = [
+        {
+            "position": i,
+            "title": f"Result {i} - Montreal plumber",
+            "link": f"https://example.com/{i}",
+            "snippet": "Licensed plumbing services across Montreal. " * 4,
+        }
+        for i in range(results)
+    ]
+    return json.dumps(
+        {
+            "success": True,
+            "data": {"organic_results": organic, "search_metadata": {"status": "Success"}},
+            "metadata": {
+                "agent_id": "3f1c2b7e-0000-4000-8000-000000000000",
+                "agent_name": "lead-scraper",
+                "tool": "serpapi",
+                "action": "search",
+                "response_time_ms": 182,
+            },
+        }
+    ).encode()
+
+
+PROOF_PAYLOAD = {
+    "agent_id": "3f1c2b7e-0000-4000-8000-000000000000",
+    "agent_name": "lead-scraper",
+    "tools": ["serpapi", "http_fetch"],
+    "permissions": ["read", "write"],
+    "expires_at": "2026-10-16T12:00:00",
+    "nonce": "4d5e6f70-0000-4000-8000-000000000000",
+    "issued_at": "2026-10-16T11:50:00.000Z",
+}
+
+
+def _bench(label: str, fn, number: int) -> float:
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    per_call_us = seconds / number * 1e6
+    print(f"  {label:<40} {per_call_us:9.2f} us/call")
+    return per_call_us
+
+
+def bench_decode(number: int = 2000) -> None:
+    for results in (10, 100):
+        raw = _sample_response(results)
+        print(f"decode ProxyResponse ({results} results, {len(raw)} bytes)")
+        baseline = _bench(
+            "json + validation (default)",
+            lambda: ProxyResponse(**json.loads(raw)).data,
+            number,
+        )
+        fast = _bench(
+            f"{'orjson' if codec.HAS_ORJSON else 'json'} + model_construct",
+            lambda: ProxyResponse.model_construct(**codec.loads(raw)).data,
+            number,
+        )
+        print(f"  speedup: {baseline / fast:.2f}x")
+
+
+def bench_proof_payload(number: int = 20000) -> None:
+    body = {"agent_token": "x" * 400, "tool": "serpapi", "action": "search", "params": {"q": "test"}}
+    pre_encoded = codec.dumps(PROOF_PAYLOAD).decode()
+
+    print("encode request body with proof payload")
+    baseline = _bench(
+        "json.dumps(proof) + json.dumps(body)",
+        lambda: json.dumps({**body, "proof_payload": json.dumps(PROOF_PAYLOAD)}).encode(),
+        number,
+    )
+    once = _bench(
+        "codec.dumps(proof) + codec.dumps(body)",
+        lambda: codec.dumps({**body, "proof_payload": codec.dumps(PROOF_PAYLOAD).decode()}),
+        number,
+    )
+    pre = _bench(
+        "pre-encoded proof + codec.dumps(body)",
+        lambda: codec.dumps({**body, "proof_payload": pre_encoded}),
+        number,
+    )
+    print(f"  speedup: {baseline / once:.2f}x (encode once), {baseline / pre:.2f}x (pre-encoded)")
+
+
+if __name__ == "__main__":
+    print(f"orjson installed: {codec.HAS_ORJSON}")
+    bench_decode()
+    bench_proof_payload()
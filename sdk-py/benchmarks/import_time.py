@@ -0,0 +1,123 @@
+"""
+Import-time benchmark and budget check for the SDK.
+
+Each statement runs in fresh interpreters so nothing is cached in
+sys.modules, and the median wall-clock import time is compared with its
+budget. Statements also list modules they must not load, which catches an
+eager import of a heavy dependency regardless of machine speed.
+
+    python benchmarks/import_time.py            # check budgets
+    python benchmarks/import_time.py --runs 20  # more samples
+
+The client budget covers only the SDK's own time: httpx and pydantic are
+imported untimed first in the same interpreter, so the check does not fail
+when a dependency upgrade gets slower. Their cost is reported for reference.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+SDK_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# pydantic defers much of its import until the first model class is defined
+DEPENDENCY_FLOOR = (
+    "import httpx\n"
+    "from pydantic import BaseModel\n"
+    "class _FirstModel(BaseModel):\n"
+    "    value: int"
+)
+
+# statement -> budget in ms, modules it must not load, and an untimed prelude
+BUDGETS: Dict[str, Dict[str, Any]] = {
+    "import runrgateway": {
+        "budget_ms": 15.0,
+        "forbidden": ["httpx", "pydantic", "sqlite3", "runrgateway.client"],
+    },
+    "from runrgateway import GatewayError": {
+        "budget_ms": 15.0,
+        "forbidden": ["httpx", "pydantic"],
+    },
+    "from runrgateway import GatewayClient": {
+        "budget_ms": 40.0,
+        "prelude": DEPENDENCY_FLOOR,
+        "forbidden": [
+            "sqlite3",
+            "runrgateway.utils.sse",
+            "runrgateway.utils.metrics",
+            "runrgateway.utils.compression",
+            "runrgateway.utils.streaming",
+            "runrgateway.utils.batching",
+            "runrgateway.utils.concurrency",
+            "runrgateway.utils.balancer",
+            "runrgateway.utils.worker_pool",
+        ],
+    },
+}
+
+_PROBE = """
+import json, sys, time
+{prelude}
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(statement: str, runs: int, prelude: str = "") -> Dict[str, Any]:
+    """Median import time of `statement` over fresh interpreters, and the modules it loaded."""
+    timings: List[float] = []
+    modules: List[str] = []
+    env = {**os.environ, "PYTHONPATH": os.path.abspath(SDK_DIR)}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement, prelude=prelude)],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        ).stdout
+        result = json.loads(output)
+        timings.append(result["ms"])
+        modules = result["modules"]
+    return {"ms": statistics.median(timings), "modules": modules}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    floor_ms = measure(DEPENDENCY_FLOOR, args.runs)["ms"]
+    print(f"{'dependencies (httpx, pydantic)':<45}{floor_ms:>9.1f} ms")
+
+    failures = []
+    for statement, budget in BUDGETS.items():
+        result = measure(statement, args.runs, budget.get("prelude", ""))
+        measured = result["ms"]
+        label = statement + (" (SDK only)" if budget.get("prelude") else "")
+        print(f"{label:<45}{measured:>9.1f} ms   budget {budget['budget_ms']:.0f} ms")
+
+        if measured > budget["budget_ms"]:
+            failures.append(f"{statement}: {measured:.1f} ms > {budget['budget_ms']:.0f} ms")
+        loaded = set(result["modules"])
+        for module in budget["forbidden"]:
+            if module in loaded:
+                failures.append(f"{statement}: loads {module}")
+
+    if failures:
+        print("\nImport budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll import budgets met.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Benchmark suite for the SDK's own overhead.
+
+Runs GatewayClient against the in-process StandInGateway and reports, per
+scenario, throughput, p50/p99 latency, peak memory allocated per call and
+retry amplification (HTTP requests sent per logical call; below 1 when
+calls are batched). Results are
+compared with a stored baseline and regressions fail the run.
+
+    python benchmarks/run.py                     # run and compare with baseline
+    python benchmarks/run.py --save-baseline     # record a new baseline
+    python benchmarks/run.py --scenario errors   # run one scenario
+
+Baselines are machine-specific, so none is committed: the first run on a
+machine records `baseline.json` and later runs compare against it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from runrgateway import (  # noqa: E402
+    BatchOptions,
+    GatewayClient,
+    GatewayError,
+    RateLimiter,
+    RateLimitOptions,
+)
+from runrgateway.utils.retry import RetryOptions  # noqa: E402
+
+from standin import StandInGateway  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Fast retries keep error scenarios measuring the SDK, not backoff sleeps
+BENCH_RETRY_OPTIONS = RetryOptions(base_delay=0.001, max_delay=0.005, jitter=False)
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "baseline": {
+        "gateway": {},
+        "client": {},
+        "concurrency": 50,
+    },
+    "fast_path": {
+        "gateway": {},
+        "client": {"validate_responses": False},
+        "concurrency": 50,
+    },
+    "latency": {
+        "gateway": {"latency_ms": 2.0, "jitter_ms": 2.0},
+        "client": {},
+        "concurrency": 100,
+    },
+    "batched": {
+        "gateway": {"latency_ms": 2.0, "jitter_ms": 2.0},
+        "client": {"batch_options": lambda: BatchOptions()},
+        "concurrency": 100,
+    },
+    "errors": {
+        "gateway": {"error_rate": 0.05},
+        "client": {},
+        "concurrency": 50,
+    },
+    "rate_limited": {
+        "gateway": {"rate_limit_rate": 0.02, "retry_after_s": 0},
+        "client": {
+            "rate_limiter": lambda: RateLimiter(
+                RateLimitOptions(
+                    rate_per_second=5000,
+                    burst=100,
+                    default_retry_after_ms=1,
+                    max_rate_limit_retries=5,
+                )
+            )
+        },
+        "concurrency": 50,
+    },
+}
+
+# Metrics where a higher value is a regression, and vice versa
+HIGHER_IS_WORSE = ("p50_ms", "p99_ms", "peak_kib_per_call", "retry_amplification")
+LOWER_IS_WORSE = ("throughput",)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _make_client(scenario: Dict[str, Any], gateway: StandInGateway) -> GatewayClient:
+    options = {
+        key: value() if callable(value) else value
+        for key, value in scenario["client"].items()
+    }
+    return GatewayClient(
+        base_url="http://standin",
+        agent_id="bench-agent",
+        agent_private_key_pem="bench-key",
+        transport=gateway,
+        retry_options=BENCH_RETRY_OPTIONS,
+        **options,
+    )
+
+
+def _proxy_requests(gateway: StandInGateway) -> int:
+    return gateway.requests["/api/proxy-request"] + gateway.requests["/api/proxy-batch"]
+
+
+async def _measure_throughput(scenario: Dict[str, Any], calls: int) -> Dict[str, Any]:
+    gateway = StandInGateway(seed=42, **scenario["gateway"])
+    client = _make_client(scenario, gateway)
+    semaphore = asyncio.Semaphore(scenario["concurrency"])
+    latencies: List[float] = []
+    errors = 0
+
+    async def _call(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.proxy("serpapi", "search", {"q": f"query {i}"})
+            except GatewayError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    # Warm up the token cache and connection setup before timing
+    await client.proxy("serpapi", "search", {"q": "warmup"})
+    proxy_requests_before = _proxy_requests(gateway)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    latencies.sort()
+    proxy_requests = _proxy_requests(gateway) - proxy_requests_before
+    return {
+        "calls": calls,
+        "errors": errors,
+        "throughput": calls / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "retry_amplification": proxy_requests / calls,
+        "token_requests": gateway.requests["/api/generate-token"],
+    }
+
+
+async def _measure_memory(scenario: Dict[str, Any], calls: int) -> float:
+    """Peak memory allocated by one sequential call, in KiB."""
+    gateway = StandInGateway(seed=42, **{**scenario["gateway"], "latency_ms": 0.0})
+    client = _make_client(scenario, gateway)
+    await client.proxy("serpapi", "search", {"q": "warmup"})
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(calls):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            try:
+                await client.proxy("serpapi", "search", {"q": f"query {i}"})
+            except GatewayError:
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - current)
+    finally:
+        tracemalloc.stop()
+        await client.close()
+
+    peaks.sort()
+    return _percentile(peaks, 50) / 1024
+
+
+async def run_scenario(name: str, calls: int) -> Dict[str, Any]:
+    """Run one scenario and return its metrics."""
+    scenario = SCENARIOS[name]
+    result = await _measure_throughput(scenario, calls)
+    result["peak_kib_per_call"] = await _measure_memory(scenario, max(50, calls // 20))
+    return result
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    """Return a description of every metric that regressed beyond tolerance."""
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric in HIGHER_IS_WORSE:
+            if reference.get(metric) and metrics[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}.{metric}: {metrics[metric]:.3f} > baseline {reference[metric]:.3f}"
+                )
+        for metric in LOWER_IS_WORSE:
+            if reference.get(metric) and metrics[metric] < reference[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{name}.{metric}: {metrics[metric]:.1f} < baseline {reference[metric]:.1f}"
+                )
+    return regressions
+
+
+def _print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    header = f"{'scenario':<14}{'calls/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'KiB/call':>10}{'retry amp':>11}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, m in results.items():
+        print(
+            f"{name:<14}{m['throughput']:>10.0f}{m['p50_ms']:>9.2f}{m['p99_ms']:>9.2f}"
+            f"{m['peak_kib_per_call']:>10.1f}{m['retry_amplification']:>11.3f}{m['errors']:>8}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    names = args.scenario or list(SCENARIOS)
+    results = {name: asyncio.run(run_scenario(name, args.calls)) for name in names}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_results(results)
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        if args.save_baseline:
+            print(f"\nBaseline saved to {args.baseline}")
+        else:
+            print(f"\nNo baseline found; saved these results to {args.baseline}")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+In-process stand-in for the Gateway endpoints the SDK talks to.
+
+StandInGateway is an httpx transport, so a GatewayClient built with
+`transport=StandInGateway(...)` exercises the full SDK stack (token cache,
+retries, decoding) without sockets or a running Gateway. It serves:
+
+- POST /api/generate-token and POST /api/generate-tokens
+- POST /api/proxy-request (sync, and async jobs deduped by idempotency key)
+  and POST /api/proxy-batch
+- GET  /api/jobs/:id and GET /api/jobs?ids=... (with a bearer agent token)
+
+Like the Gateway, it accepts gzip request bodies and advertises that in an
+Accept-Encoding response header.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+class StandInGateway(httpx.AsyncBaseTransport):
+    """Stand-in Gateway with configurable latency, errors and 429 injection."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_s: int = 0,
+        job_duration_ms: float = 50.0,
+        result_size: int = 10,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_s = retry_after_s
+        self.job_duration_ms = job_duration_ms
+        self.result_size = result_size
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self._random = random.Random(seed)
+        self._jobs: Dict[str, float] = {}
+        self._job_keys: Dict[str, str] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        route = "/api/jobs" if path.startswith("/api/jobs") else path
+        self.requests[route] += 1
+
+        # Always yield to the event loop, as a real socket read would
+        delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+
+        encoding = request.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            request = httpx.Request(
+                request.method, request.url, content=gzip.decompress(request.content)
+            )
+            response = self._route(request, path)
+        elif encoding is not None:
+            response = httpx.Response(415, json={"error": f"Unsupported: {encoding}"})
+        else:
+            response = self._route(request, path)
+        response.headers["Accept-Encoding"] = "gzip"
+        self.statuses[response.status_code] += 1
+        return response
+
+    def _route(self, request: httpx.Request, path: str) -> httpx.Response:
+        if path == "/api/generate-token":
+            return self._generate_token(request)
+        if path == "/api/generate-tokens":
+            requests = json.loads(request.content)["requests"]
+            tokens = [
+                {"index": index, "status": 201, **self._issue_token(body)}
+                for index, body in enumerate(requests)
+            ]
+            return httpx.Response(200, json={"tokens": tokens})
+        if path == "/api/proxy-request":
+            return self._proxy_request(request)
+        if path in ("/api/health", "/health"):
+            return httpx.Response(200, json={"status": "healthy"})
+        if path == "/ready":
+            return httpx.Response(200, json={"ready": True})
+        if path == "/api/proxy-batch":
+            results = []
+            for index, body in enumerate(json.loads(request.content)["requests"]):
+                call = httpx.Request("POST", request.url, json=body)
+                response = self._proxy_request(call)
+                results.append(
+                    {
+                        "index": index,
+                        "status": response.status_code,
+                        "headers": {},
+                        "body": json.loads(response.content),
+                    }
+                )
+            return httpx.Response(200, json={"results": results})
+        if path.startswith("/api/jobs") and not request.headers.get(
+            "Authorization", ""
+        ).startswith("Bearer "):
+            return httpx.Response(401, json={"error": "Agent token required"})
+        if path == "/api/jobs":
+            ids = request.url.params.get("ids", "").split(",")
+            jobs = [self._job(job_id) for job_id in ids if job_id in self._jobs]
+            missing = [job_id for job_id in ids if job_id not in self._jobs]
+            return httpx.Response(200, json={"jobs": jobs, "missing": missing})
+        if path.startswith("/api/jobs/"):
+            job_id = path.rsplit("/", 1)[1]
+            if job_id not in self._jobs:
+                return httpx.Response(404, json={"error": "Job not found."})
+            return httpx.Response(200, json=self._job(job_id))
+        return httpx.Response(404, json={"error": "Not found"})
+
+    def _generate_token(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(201, json=self._issue_token(json.loads(request.content)))
+
+    def _issue_token(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        payload = json.dumps({**body, "nonce": str(uuid.uuid4())}, separators=(",", ":"))
+        token = base64.b64encode(payload.encode()).decode() + "." + "0" * 64
+        return {
+            "agent_token": token,
+            "token_id": str(uuid.uuid4()),
+            "expires_at": body["expires_at"],
+            "agent_name": "bench-agent",
+        }
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return httpx.Response(
+                429,
+                json={"error": "Rate limit exceeded", "retry_after": self.retry_after_s},
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            return httpx.Response(503, json={"error": "External API request failed"})
+
+        body = json.loads(request.content)
+        if body.get("async"):
+            # Like the Gateway, a repeated idempotency key returns the first job
+            key = body.get("idempotency_key")
+            job_id = self._job_keys.get(key) if key else None
+            if job_id is None:
+                job_id = str(uuid.uuid4())
+                self._jobs[job_id] = time.monotonic() + self.job_duration_ms / 1000
+                if key:
+                    self._job_keys[key] = job_id
+            return httpx.Response(202, json={"job_id": job_id, "status": "queued"})
+
+        return httpx.Response(
+            200,
+            json={
+                "success": True,
+                "data": self._result(body["params"]),
+                "metadata": {
+                    "agent_id": "bench-agent",
+                    "agent_name": "bench-agent",
+                    "tool": body["tool"],
+                    "action": body["action"],
+                    "response_time_ms": self.latency_ms,
+                },
+            },
+        )
+
+    def _job(self, job_id: str) -> Dict[str, Any]:
+        done = time.monotonic() >= self._jobs[job_id]
+        return {
+            "job_id": job_id,
+            "status": "done" if done else "running",
+            "result": self._result({}) if done else None,
+        }
+
+    def _result(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "organic_results": [
+                {
+                    "position": i,
+                    "title": f"Result {i}",
+                    "link": f"https://example.com/{i}",
+                    "snippet": "Lorem ipsum dolor sit amet. " * 4,
+                }
+                for i in range(self.result_size)
+            ],
+            "search_parameters": params,
+        }
@@ -5,7 +5,9 @@ Official SDK for 4Runr Gateway - Secure API proxy with built-in authentication,
 policy enforcement, and resilience.
 """
 
-from .client import GatewayClient
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
 from .errors import (
     GatewayError,
     GatewayAuthError,
@@ -14,14 +16,101 @@ from .errors import (
     GatewayUpstreamError,
     GatewayNetworkError,
     GatewayTokenError,
+    GatewayCircuitOpenError,
+    GatewayDeadlineError,
 )
-from .utils.correlation import generate_correlation_id, extract_correlation_id
-from .utils.retry import with_retry, is_retryable_error
-from .utils.idempotency import generate_idempotency_key
+
+if TYPE_CHECKING:
+    from .client import GatewayClient, TokenOptions
+    from .utils.rate_limit import RateLimiter, RateLimitOptions
+    from .utils.concurrency import ConcurrencyLimiter, ConcurrencyOptions
+    from .utils.response_cache import ResponseCache, DiskCacheBackend
+    from .utils.transport import PoolOptions, create_transport
+    from .utils.metrics import MetricsCollector, RequestMetrics
+    from .utils.diagnostics import Diagnostics, DiagnosticsOptions
+    from .utils.hedging import RequestHedger, HedgeOptions
+    from .utils.outbox import Outbox, OutboxOptions
+    from .utils.compression import Compressor, CompressionOptions
+    from .utils.batching import BatchOptions, ProxyBatcher
+    from .utils.balancer import BalancerOptions, LoadBalancer
+    from .utils.worker_pool import WorkerPool, WorkerPoolOptions
+    from .utils.job_poller import JobPollerOptions
+    from .utils.sse import StreamEvent, StreamConnected, StreamEnd, StreamError
+    from .utils.correlation import generate_correlation_id, extract_correlation_id
+    from .utils.retry import (
+        with_retry,
+        is_retryable_error,
+        CircuitBreaker,
+        CircuitBreakers,
+        RetryBudget,
+        RetryOptions,
+    )
+    from .utils.idempotency import generate_idempotency_key
+
+# Everything except the errors is imported on first attribute access, so
+# `import runrgateway` does not pay for httpx and pydantic until they are used
+_LAZY_EXPORTS = {
+    "GatewayClient": ".client",
+    "TokenOptions": ".client",
+    "RateLimiter": ".utils.rate_limit",
+    "RateLimitOptions": ".utils.rate_limit",
+    "ConcurrencyLimiter": ".utils.concurrency",
+    "ConcurrencyOptions": ".utils.concurrency",
+    "ResponseCache": ".utils.response_cache",
+    "DiskCacheBackend": ".utils.response_cache",
+    "PoolOptions": ".utils.transport",
+    "create_transport": ".utils.transport",
+    "MetricsCollector": ".utils.metrics",
+    "RequestMetrics": ".utils.metrics",
+    "Diagnostics": ".utils.diagnostics",
+    "DiagnosticsOptions": ".utils.diagnostics",
+    "RequestHedger": ".utils.hedging",
+    "HedgeOptions": ".utils.hedging",
+    "Outbox": ".utils.outbox",
+    "OutboxOptions": ".utils.outbox",
+    "Compressor": ".utils.compression",
+    "CompressionOptions": ".utils.compression",
+    "BatchOptions": ".utils.batching",
+    "ProxyBatcher": ".utils.batching",
+    "BalancerOptions": ".utils.balancer",
+    "LoadBalancer": ".utils.balancer",
+    "WorkerPool": ".utils.worker_pool",
+    "WorkerPoolOptions": ".utils.worker_pool",
+    "JobPollerOptions": ".utils.job_poller",
+    "StreamEvent": ".utils.sse",
+    "StreamConnected": ".utils.sse",
+    "StreamEnd": ".utils.sse",
+    "StreamError": ".utils.sse",
+    "generate_correlation_id": ".utils.correlation",
+    "extract_correlation_id": ".utils.correlation",
+    "with_retry": ".utils.retry",
+    "is_retryable_error": ".utils.retry",
+    "CircuitBreaker": ".utils.retry",
+    "CircuitBreakers": ".utils.retry",
+    "RetryBudget": ".utils.retry",
+    "RetryOptions": ".utils.retry",
+    "generate_idempotency_key": ".utils.idempotency",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 __version__ = "1.0.0"
 __all__ = [
     "GatewayClient",
+    "TokenOptions",
     "GatewayError",
     "GatewayAuthError",
     "GatewayPolicyError",
@@ -29,9 +118,44 @@ __all__ = [
     "GatewayUpstreamError",
     "GatewayNetworkError",
     "GatewayTokenError",
+    "GatewayCircuitOpenError",
+    "GatewayDeadlineError",
+    "RateLimiter",
+    "RateLimitOptions",
+    "ConcurrencyLimiter",
+    "ConcurrencyOptions",
+    "ResponseCache",
+    "DiskCacheBackend",
+    "PoolOptions",
+    "create_transport",
+    "MetricsCollector",
+    "RequestMetrics",
+    "Diagnostics",
+    "DiagnosticsOptions",
+    "RequestHedger",
+    "HedgeOptions",
+    "Outbox",
+    "OutboxOptions",
+    "Compressor",
+    "CompressionOptions",
+    "BatchOptions",
+    "ProxyBatcher",
+    "BalancerOptions",
+    "LoadBalancer",
+    "WorkerPool",
+    "WorkerPoolOptions",
+    "JobPollerOptions",
+    "StreamEvent",
+    "StreamConnected",
+    "StreamEnd",
+    "StreamError",
     "generate_correlation_id",
     "extract_correlation_id",
     "with_retry",
     "is_retryable_error",
+    "CircuitBreaker",
+    "CircuitBreakers",
+    "RetryBudget",
+    "RetryOptions",
     "generate_idempotency_key",
 ]
@@ -5,19 +5,78 @@ Main client for the 4Runr Gateway SDK.
 import asyncio
 import json
 import time
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import httpx
 from pydantic import BaseModel
 
 from .errors import (
+    GatewayAuthError,
+    GatewayDeadlineError,
     GatewayError,
+    GatewayRateLimitError,
     GatewayTokenError,
     create_error_from_response,
 )
+from .utils import codec, deadline
 from .utils.correlation import generate_correlation_id
-from .utils.retry import RetryOptions, with_retry
+from .utils.idempotency import generate_idempotency_key_from_data, is_read_action
+from .utils.job_poller import JobPoller, JobPollerOptions
+from .utils.retry import (
+    CircuitBreakers,
+    RetryBudget,
+    RetryOptions,
+    calculate_delay,
+    is_retryable_error,
+    with_retry,
+)
+from .utils.singleflight import SingleFlight
+from .utils.token_cache import TokenCache, TokenKey, make_token_key
+from .utils.transport import PoolOptions, create_transport
+
+# Opt-in components are passed in by the caller, so importing them here would
+# only slow down `import runrgateway` for clients that do not use them
+if TYPE_CHECKING:
+    from .utils.balancer import BalancerOptions, GatewayNode, LoadBalancer
+    from .utils.batching import BatchOptions, ProxyBatcher
+    from .utils.compression import Compressor
+    from .utils.concurrency import ConcurrencyLimiter
+    from .utils.diagnostics import Diagnostics
+    from .utils.hedging import RequestHedger
+    from .utils.metrics import MetricsCollector, RequestMetrics
+    from .utils.outbox import Outbox, OutboxEntry, OutboxFlusher
+    from .utils.rate_limit import RateLimiter
+    from .utils.response_cache import ResponseCache
+    from .utils.sse import StreamEvent
+
+
+ProxyCall = Tuple[str, str, Dict[str, Any]]
+T = TypeVar("T")
+
+
+# Upper bound on tokens the Gateway issues in one batch request
+MAX_BATCH_TOKENS = 500
+
+# Batched calls are retried one by one, so the batch request itself is not
+_SINGLE_ATTEMPT = RetryOptions(max_retries=0)
 
 
 class TokenOptions(BaseModel):
@@ -26,6 +85,7 @@ class TokenOptions(BaseModel):
     tools: List[str]
     permissions: List[str]
     ttl_minutes: int
+    agent_id: Optional[str] = None  # defaults to the client's agent
 
 
 class ProxyResponse(BaseModel):
@@ -42,6 +102,7 @@ class JobResponse(BaseModel):
     status: str  # 'queued' | 'running' | 'done' | 'failed'
     result: Optional[Any] = None
     error: Optional[str] = None
+    job_id: Optional[str] = None
 
 
 class GatewayClient:
@@ -49,49 +110,242 @@ class GatewayClient:
 
     def __init__(
         self,
-        base_url: str,
+        base_url: Union[str, Sequence[str]],
         agent_id: str,
         agent_private_key_pem: str,
         default_intent: Optional[str] = None,
         timeout_ms: int = 6000,
+        token_cache: bool = True,
+        token_refresh_ahead_ms: int = 60000,
+        job_poller_options: Optional[JobPollerOptions] = None,
+        pool_options: Optional[PoolOptions] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        rate_limiter: Optional["RateLimiter"] = None,
+        concurrency_limiter: Optional["ConcurrencyLimiter"] = None,
+        circuit_breakers: Optional[CircuitBreakers] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        response_cache: Optional["ResponseCache"] = None,
+        coalesce_reads: bool = False,
+        validate_responses: bool = True,
+        retry_options: Optional[RetryOptions] = None,
+        metrics: Optional["MetricsCollector"] = None,
+        diagnostics: Optional["Diagnostics"] = None,
+        hedger: Optional["RequestHedger"] = None,
+        deadline_ms: Optional[int] = None,
+        outbox: Optional["Outbox"] = None,
+        compressor: Optional["Compressor"] = None,
+        batch_options: Optional["BatchOptions"] = None,
+        balancer_options: Optional["BalancerOptions"] = None,
     ):
-        self.base_url = base_url.rstrip("/")
+        urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.base_url = urls[0].rstrip("/")
+        self._balancer: Optional["LoadBalancer"] = None
+        if len(urls) > 1 or balancer_options is not None:
+            from .utils.balancer import LoadBalancer
+
+            self._balancer = LoadBalancer(urls, balancer_options)
         self.agent_id = agent_id
         self.agent_private_key_pem = agent_private_key_pem
         self.default_intent = default_intent
         self.timeout_ms = timeout_ms
+        self.deadline_ms = deadline_ms
         self.current_intent = default_intent or ""
+        self.validate_responses = validate_responses
+        # A transport passed in is shared with other clients and owned by the caller
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = create_transport(pool_options)
         self._client = httpx.AsyncClient(
+            transport=transport,
             timeout=timeout_ms / 1000,
             headers={
                 "User-Agent": "runrgateway/1.0.0",
                 "Content-Type": "application/json",
             },
         )
+        self._token_cache: Optional[TokenCache] = None
+        if token_cache:
+            self._token_cache = TokenCache(
+                self._issue_cached_token, refresh_ahead=token_refresh_ahead_ms / 1000
+            )
+        self._rate_limiter = rate_limiter
+        self._concurrency_limiter = concurrency_limiter
+        self._circuit_breakers = circuit_breakers
+        self._retry_budget = retry_budget
+        self._retry_options = retry_options or RetryOptions()
+        self._metrics = metrics
+        self._diagnostics = diagnostics
+        self._hedger = hedger
+        self._outbox = outbox
+        self._compressor = compressor
+        self._batcher: Optional["ProxyBatcher"] = None
+        if batch_options is not None:
+            from .utils.batching import ProxyBatcher
+
+            self._batcher = ProxyBatcher(self._send_proxy_batch, batch_options)
+        self._batch_proxy = True
+        self._outbox_flusher: Optional["OutboxFlusher"] = None
+        self._response_cache = response_cache
+        self._single_flight: Optional[SingleFlight] = SingleFlight() if coalesce_reads else None
+        self._job_poller = JobPoller(self._fetch_jobs, job_poller_options)
+        self._batch_job_lookup = True
+        self._batch_token_issue = True
+
+    @property
+    def balancer(self) -> Optional["LoadBalancer"]:
+        """The load balancer over Gateway nodes, if several base URLs were given."""
+        return self._balancer
+
+    @property
+    def batcher(self) -> Optional["ProxyBatcher"]:
+        """The proxy call batcher, if `batch_options` was given."""
+        return self._batcher
 
     def set_intent(self, intent: str) -> None:
         """Set the current intent for requests."""
         self.current_intent = intent
 
-    async def get_token(self, opts: TokenOptions) -> str:
+    async def get_token(self, opts: TokenOptions, deadline_ms: Optional[int] = None) -> str:
         """Get a new token from the Gateway."""
-        expires_at = datetime.fromtimestamp(
-            time.time() + opts.ttl_minutes * 60
-        ).isoformat()
+        token, _ = await self._with_deadline(deadline_ms, self._request_token(opts))
+        return token
+
+    async def get_tokens(
+        self, requests: List[TokenOptions], deadline_ms: Optional[int] = None
+    ) -> List[Union[str, GatewayError]]:
+        """
+        Issue many tokens in as few round trips as possible.
+
+        Results are in request order; an entry the Gateway refused holds its
+        GatewayError instead of a token, so one bad agent does not fail the
+        batch. Issued tokens also prime the token cache.
+        """
+        return await self._with_deadline(deadline_ms, self._request_tokens(requests))
 
+    async def _request_tokens(
+        self, requests: List[TokenOptions]
+    ) -> List[Union[str, GatewayError]]:
+        results: List[Union[str, GatewayError]] = []
+        for start in range(0, len(requests), MAX_BATCH_TOKENS):
+            chunk = requests[start : start + MAX_BATCH_TOKENS]
+            if self._batch_token_issue:
+                try:
+                    results.extend(await self._request_token_batch(chunk))
+                    continue
+                except GatewayError as error:
+                    # Older gateways only support single-token issuance
+                    if error.status_code != 404:
+                        raise
+                    self._batch_token_issue = False
+
+            issued = await asyncio.gather(
+                *(self._request_token(opts) for opts in chunk), return_exceptions=True
+            )
+            for opts, result in zip(chunk, issued):
+                if isinstance(result, BaseException):
+                    if not isinstance(result, GatewayError):
+                        raise result
+                    results.append(result)
+                else:
+                    self._prime_token_cache(opts, *result)
+                    results.append(result[0])
+        return results
+
+    async def _request_token_batch(
+        self, requests: List[TokenOptions]
+    ) -> List[Union[str, GatewayError]]:
+        """Issue a chunk of tokens through the batch endpoint."""
+        bodies = [self._token_request_body(opts) for opts in requests]
         response = await self._make_request(
-            "/api/generate-token",
+            "/api/generate-tokens",
             method="POST",
-            json={
-                "agent_id": self.agent_id,
-                "tools": opts.tools,
-                "permissions": opts.permissions,
-                "expires_at": expires_at,
-            },
+            json={"requests": [body for body, _ in bodies]},
         )
 
-        data = response.json()
-        return data["agent_token"]
+        results: List[Union[str, GatewayError]] = []
+        entries = codec.loads(response.content)["tokens"]
+        for opts, (_, expires_at_ts), entry in zip(requests, bodies, entries):
+            if "agent_token" in entry:
+                self._prime_token_cache(opts, entry["agent_token"], expires_at_ts)
+                results.append(entry["agent_token"])
+            else:
+                results.append(
+                    create_error_from_response(
+                        entry.get("status", 500), entry.get("error", "Token issuance failed")
+                    )
+                )
+        return results
+
+    def _prime_token_cache(self, opts: TokenOptions, token: str, expires_at: float) -> None:
+        if self._token_cache is not None:
+            key = make_token_key(opts.agent_id or self.agent_id, opts.tools, opts.permissions)
+            self._token_cache.put(key, token, expires_at)
+
+    def _token_request_body(self, opts: TokenOptions) -> Tuple[Dict[str, Any], float]:
+        """Body of a token request and the token's expiry (epoch seconds)."""
+        expires_at_ts = time.time() + opts.ttl_minutes * 60
+        expires_at = datetime.fromtimestamp(expires_at_ts).isoformat()
+        body = {
+            "agent_id": opts.agent_id or self.agent_id,
+            "tools": opts.tools,
+            "permissions": opts.permissions,
+            "expires_at": expires_at,
+        }
+        return body, expires_at_ts
+
+    async def _request_token(self, opts: TokenOptions) -> Tuple[str, float]:
+        """Issue a token and return it with its expiry (epoch seconds)."""
+        body, expires_at_ts = self._token_request_body(opts)
+        response = await self._make_request("/api/generate-token", method="POST", json=body)
+
+        data = codec.loads(response.content)
+        return data["agent_token"], expires_at_ts
+
+    async def _issue_cached_token(self, key: TokenKey) -> Tuple[str, float]:
+        """Token issuer used by the token cache."""
+        agent_id, tools, permissions = key
+        # Issuance is shared by every waiting caller, so no single caller's
+        # deadline applies; each caller still stops waiting at its own deadline
+        with deadline.without_deadline():
+            return await self._request_token(
+                TokenOptions(
+                    tools=list(tools),
+                    permissions=list(permissions),
+                    ttl_minutes=10,
+                    # get_tokens() caches tokens for other agents too
+                    agent_id=agent_id,
+                )
+            )
+
+    async def _get_auto_token(self, tool: str) -> str:
+        """Get a token for a call that was made without an explicit token."""
+        return await self._get_default_token([tool], ["read", "write"])
+
+    async def _get_default_token(self, tools: List[str], permissions: List[str]) -> str:
+        """Get a short-lived token for this agent, from the cache if enabled."""
+        if self._token_cache is None:
+            return await self.get_token(
+                TokenOptions(
+                    tools=tools,
+                    permissions=permissions,
+                    ttl_minutes=10,
+                )
+            )
+        key = make_token_key(self.agent_id, tools, permissions)
+        return await self._token_cache.get(key)
+
+    async def _job_headers(self, agent_token: Optional[str]) -> Dict[str, str]:
+        """Headers for job lookups, which only see jobs of the token's agent."""
+        token = agent_token or await self._get_default_token([], ["read"])
+        return {"Authorization": f"Bearer {token}"}
+
+    def _handle_token_headers(self, token: str, response: httpx.Response) -> None:
+        """Act on token rotation headers returned by the Gateway."""
+        if response.headers.get("X-Token-Rotation-Recommended") != "true":
+            return
+        if self._token_cache is not None:
+            expires_at = _parse_timestamp(response.headers.get("X-Token-Expires-At"))
+            self._token_cache.mark_rotation(token, expires_at)
 
     async def proxy(
         self,
@@ -99,19 +353,106 @@ class GatewayClient:
         action: str,
         params: Dict[str, Any],
         agent_token: Optional[str] = None,
-        proof_payload_override: Optional[Dict[str, Any]] = None,
+        proof_payload_override: Optional[Union[Dict[str, Any], str, bytes]] = None,
+        deadline_ms: Optional[int] = None,
     ) -> Any:
         """Make a proxied request through the Gateway."""
+        return await self._with_deadline(
+            deadline_ms,
+            self._proxy(tool, action, params, agent_token, proof_payload_override),
+        )
+
+    async def _proxy(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        agent_token: Optional[str],
+        proof_payload_override: Optional[Union[Dict[str, Any], str, bytes]],
+    ) -> Any:
+        """Serve a proxy call from the cache, a shared flight or a new request."""
+        read_action = not proof_payload_override and is_read_action(tool, action)
+
+        # Serve idempotent reads from the response cache when enabled
+        cache_key: Optional[str] = None
+        cache_ttl_ms = 0
+        if self._response_cache is not None and not proof_payload_override:
+            cache_ttl_ms = self._response_cache.ttl_ms(tool, action)
+            if cache_ttl_ms > 0:
+                cache_key = self._response_cache.make_key(
+                    self.agent_id, tool, action, params, agent_token, self.current_intent
+                )
+                try:
+                    return await self._response_cache.get(cache_key)
+                except KeyError:
+                    pass
+
+        async def _send() -> Any:
+            return await self._proxy_request(
+                tool, action, params, agent_token, proof_payload_override
+            )
+
+        async def _fetch() -> Any:
+            if self._hedger is not None and read_action:
+                result = await self._hedger.run(f"{tool}.{action}", _send)
+            else:
+                result = await _send()
+            if cache_key is not None:
+                await self._response_cache.set(cache_key, result, cache_ttl_ms)
+            return result
+
+        # Identical concurrent reads share one in-flight request
+        if self._single_flight is not None and read_action:
+            # Calls with different explicit tokens must not share a result
+            flight_key = (
+                f"{agent_token or ''}:{self.current_intent}:"
+                f"{generate_idempotency_key_from_data(tool, action, params)}"
+            )
+
+            async def _shared_fetch() -> Any:
+                # The flight is shared, so no single caller's deadline applies;
+                # each caller still stops waiting at its own deadline
+                with deadline.without_deadline():
+                    return await _fetch()
+
+            return await self._single_flight.do(flight_key, _shared_fetch)
+
+        return await _fetch()
+
+    async def _proxy_request(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        agent_token: Optional[str],
+        proof_payload_override: Optional[Union[Dict[str, Any], str, bytes]],
+    ) -> Any:
+        """Send a synchronous proxy request and return its data."""
+        token, body = await self._proxy_body(
+            tool, action, params, agent_token, proof_payload_override
+        )
+        response = await self._send_proxy(tool, body, cached_token=not agent_token)
+
+        data = self._build_model(ProxyResponse, codec.loads(response.content))
+
+        # Refresh the cached token ahead of expiry if the Gateway recommends it
+        self._handle_token_headers(token, response)
+
+        return data.data
+
+    async def _proxy_body(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        agent_token: Optional[str],
+        proof_payload_override: Optional[Union[Dict[str, Any], str, bytes]],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return the token and request body for a synchronous proxy call."""
         # Auto-fetch token if not provided
         token = agent_token
         if not token:
-            token = await self.get_token(
-                TokenOptions(
-                    tools=[tool],
-                    permissions=["read", "write"],
-                    ttl_minutes=10,
-                )
-            )
+            token = await self._get_auto_token(tool)
 
         # Check token age (reject if older than 24h)
         if token:
@@ -130,26 +471,112 @@ class GatewayClient:
         if self.current_intent:
             body["intent"] = self.current_intent
 
-        # Add proof payload override if provided
+        # Add proof payload override if provided. The Gateway hashes the exact
+        # string, so pre-encoded payloads are sent as-is and dicts are encoded once.
         if proof_payload_override:
-            body["proof_payload"] = json.dumps(proof_payload_override)
+            if isinstance(proof_payload_override, (str, bytes)):
+                proof_payload = proof_payload_override
+            else:
+                proof_payload = codec.dumps(proof_payload_override)
+            if isinstance(proof_payload, bytes):
+                proof_payload = proof_payload.decode("utf-8")
+            body["proof_payload"] = proof_payload
 
-        response = await self._make_request(
-            "/api/proxy-request",
-            method="POST",
-            json=body,
-        )
+        return token, body
+
+    def proxy_stream(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        agent_token: Optional[str] = None,
+        chunk_size: int = 65536,
+        deadline_ms: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Make a proxied request and yield the raw JSON response body in chunks.
+
+        The body is read from the socket only as the caller consumes it, so a
+        large result is never held in memory as a whole. Chunks are the full
+        `{"success", "data", "metadata"}` envelope; use `proxy_stream_items`
+        to parse items out of it. `deadline_ms` covers the call until the
+        response headers arrive; reading the body is bounded by `timeout_ms`
+        per chunk. Streamed calls bypass the response cache, request
+        coalescing and hedging.
+        """
+        return self._proxy_stream(tool, action, params, agent_token, chunk_size, deadline_ms)
 
-        data = ProxyResponse(**response.json())
+    def proxy_stream_items(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        prefix: str = "data.item",
+        agent_token: Optional[str] = None,
+        deadline_ms: Optional[int] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Make a proxied request and yield JSON values as they are parsed.
 
-        # Check for token rotation recommendation
-        rotation_recommended = response.headers.get("X-Token-Rotation-Recommended")
-        token_expires_at = response.headers.get("X-Token-Expires-At")
+        `prefix` selects the values in ijson notation; the default yields the
+        elements of a top-level `data` array, and e.g.
+        `data.organic_results.item` yields search results one at a time.
+        Requires the `stream` extra (ijson).
+        """
+        from .utils.streaming import iter_json_items
 
-        if rotation_recommended == "true":
-            print(f"Token rotation recommended! Expires: {token_expires_at}")
+        chunks = self._proxy_stream(tool, action, params, agent_token, 65536, deadline_ms)
+        return iter_json_items(chunks, prefix)
 
-        return data.data
+    async def proxy_to_file(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        sink: Any,
+        agent_token: Optional[str] = None,
+        deadline_ms: Optional[int] = None,
+    ) -> int:
+        """
+        Make a proxied request and write the raw JSON response body to `sink`.
+
+        `sink` is any object with a `write(bytes)` method, sync or async, such
+        as a file opened in binary mode. Returns the number of bytes written.
+        """
+        from .utils.streaming import write_chunks
+
+        chunks = self._proxy_stream(tool, action, params, agent_token, 65536, deadline_ms)
+        return await write_chunks(chunks, sink)
+
+    async def _proxy_stream(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        agent_token: Optional[str],
+        chunk_size: int,
+        deadline_ms: Optional[int],
+    ) -> AsyncIterator[bytes]:
+        async def _open() -> Tuple[str, httpx.Response]:
+            token, body = await self._proxy_body(tool, action, params, agent_token, None)
+            response = await self._send_proxy(
+                tool, body, cached_token=not agent_token, stream=True
+            )
+            return token, response
+
+        token, response = await self._with_deadline(deadline_ms, _open())
+        try:
+            self._handle_token_headers(token, response)
+            decoded_bytes = 0
+            async for chunk in response.aiter_bytes(chunk_size):
+                decoded_bytes += len(chunk)
+                yield chunk
+            if self._compressor is not None:
+                self._compressor.count_response(response, decoded_bytes)
+        except httpx.RequestError as e:
+            raise GatewayError(f"Network error: {str(e)}", code="NETWORK_ERROR")
+        finally:
+            await response.aclose()
 
     async def proxy_async(
         self,
@@ -157,18 +584,36 @@ class GatewayClient:
         action: str,
         params: Dict[str, Any],
         agent_token: Optional[str] = None,
+        deadline_ms: Optional[int] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """
+        Make an async proxy request.
+
+        With an `idempotency_key`, resubmitting the same key (e.g. after a
+        lost response) returns the job the Gateway already created.
+        """
+        return await self._with_deadline(
+            deadline_ms,
+            self._proxy_async(
+                tool, action, params, agent_token, self.current_intent, idempotency_key
+            ),
+        )
+
+    async def _proxy_async(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        agent_token: Optional[str],
+        intent: str,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, str]:
-        """Make an async proxy request."""
+        """Submit an async proxy request under `intent` and return its job ID."""
         # Auto-fetch token if not provided
         token = agent_token
         if not token:
-            token = await self.get_token(
-                TokenOptions(
-                    tools=[tool],
-                    permissions=["read", "write"],
-                    ttl_minutes=10,
-                )
-            )
+            token = await self._get_auto_token(tool)
 
         body = {
             "agent_token": token,
@@ -179,60 +624,644 @@ class GatewayClient:
         }
 
         # Add intent if set
-        if self.current_intent:
-            body["intent"] = self.current_intent
+        if intent:
+            body["intent"] = intent
+        if idempotency_key:
+            body["idempotency_key"] = idempotency_key
 
-        response = await self._make_request(
-            "/api/proxy-request",
-            method="POST",
-            json=body,
-        )
+        response = await self._send_proxy(tool, body, cached_token=not agent_token)
+
+        self._handle_token_headers(token, response)
 
-        data = response.json()
+        data = codec.loads(response.content)
         return {"job_id": data["job_id"]}
 
-    async def get_job(self, job_id: str) -> JobResponse:
+    def enqueue_async(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """
+        Queue an async proxy request in the outbox and return its idempotency key.
+
+        This does one local insert, committed before it returns, and never
+        waits for the Gateway; a background flusher submits the entry with
+        `proxy_async` under the intent current at the time of this call and
+        with its idempotency key. Called outside a
+        running event loop, the entry waits for the next `flush_outbox()` or
+        `enqueue_async()` inside one. Re-queuing an idempotency key that is
+        already queued or sent is a no-op. Look up the outcome with
+        `outbox.get(key)`.
+        """
+        if self._outbox is None:
+            raise GatewayError("No outbox configured", code="CLIENT_ERROR")
+        key = self._outbox.put(tool, action, params, idempotency_key, self.current_intent)
+        self._get_outbox_flusher().notify()
+        return key
+
+    async def flush_outbox(self) -> int:
+        """Send every outbox entry that is due now and return how many were sent."""
+        if self._outbox is None:
+            return 0
+        return await self._get_outbox_flusher().flush()
+
+    def _get_outbox_flusher(self) -> "OutboxFlusher":
+        if self._outbox_flusher is None:
+            from .utils.outbox import OutboxFlusher
+
+            self._outbox_flusher = OutboxFlusher(self._outbox, self._send_outbox_entry)
+        return self._outbox_flusher
+
+    async def _send_outbox_entry(self, entry: "OutboxEntry") -> str:
+        """Submit one outbox entry and return its job ID."""
+        job = await self._with_deadline(
+            None,
+            self._proxy_async(
+                entry.tool, entry.action, entry.params, None, entry.intent, entry.idempotency_key
+            ),
+        )
+        return job["job_id"]
+
+    async def _with_deadline(self, deadline_ms: Optional[int], call: Awaitable[T]) -> T:
+        """
+        Await `call` within an end-to-end deadline.
+
+        The deadline covers token fetching, rate limiting, retries and backoff;
+        when it passes, in-flight work is cancelled and GatewayDeadlineError is
+        raised. Falls back to the client's `deadline_ms`; with neither set the
+        call is awaited as-is.
+        """
+        diagnostics = self._diagnostics
+        # Every public call passes through here, so requests it makes from
+        # tasks the SDK spawns are still attributed to the calling code
+        with diagnostics.call_site_scope() if diagnostics is not None else nullcontext():
+            if deadline_ms is None:
+                deadline_ms = self.deadline_ms
+            if deadline_ms is None:
+                return await call
+
+            with deadline.deadline_scope(deadline_ms) as remaining_s:
+                try:
+                    if remaining_s <= 0:
+                        raise asyncio.TimeoutError()
+                    return await asyncio.wait_for(call, remaining_s)
+                except asyncio.TimeoutError:
+                    if deadline.remaining() > 0:
+                        raise
+                    if asyncio.iscoroutine(call):
+                        # Never started because the deadline had already passed
+                        call.close()
+                    raise GatewayDeadlineError(
+                        f"Deadline of {deadline_ms}ms exceeded"
+                    ) from None
+
+    async def _send_proxy(
+        self, tool: str, body: Dict[str, Any], cached_token: bool, stream: bool = False
+    ) -> httpx.Response:
+        """
+        Send a proxy request, pacing it through the rate limiter and holding a
+        slot of the tool's concurrency limit if enabled.
+        """
+        limiter = self._rate_limiter
+        concurrency = self._concurrency_limiter
+        attempt = 0
+        while True:
+            queued_at = time.perf_counter()
+            if limiter is not None:
+                await limiter.acquire(tool)
+            try:
+                slot = concurrency.slot(tool) if concurrency is not None else nullcontext()
+                async with slot:
+                    # The limit samples attempt round trips, which exclude backoff
+                    on_attempt = slot.record_attempt if concurrency is not None else None
+                    if self._batcher is not None and not stream:
+                        response = await self._send_batched(tool, body, on_attempt)
+                    else:
+                        response = await self._make_request(
+                            "/api/proxy-request",
+                            method="POST",
+                            json=body,
+                            breaker_key=f"tool:{tool}",
+                            tool=tool,
+                            action=body["action"],
+                            queue_s=time.perf_counter() - queued_at,
+                            stream=stream,
+                            on_attempt=on_attempt,
+                        )
+            except GatewayRateLimitError as error:
+                # Queue behind the Retry-After window instead of failing
+                if limiter is None:
+                    raise
+                limiter.on_rate_limited(tool, error.retry_after)
+                if attempt >= limiter.bucket(tool).options.max_rate_limit_retries:
+                    raise
+                attempt += 1
+                continue
+            except GatewayAuthError:
+                # Never reuse a cached token the Gateway has rejected
+                if cached_token and self._token_cache is not None:
+                    self._token_cache.invalidate(body["agent_token"])
+                raise
+
+            if limiter is not None:
+                limiter.on_success(tool)
+            return response
+
+    async def _send_batched(
+        self,
+        tool: str,
+        body: Dict[str, Any],
+        on_attempt: Optional[Callable[[float], None]] = None,
+    ) -> httpx.Response:
+        """Send a proxy call through the batcher, retrying it on its own."""
+
+        async def _attempt() -> httpx.Response:
+            started = time.perf_counter()
+            result = await self._batcher.submit(body)
+            if on_attempt is not None and isinstance(result, httpx.Response):
+                on_attempt(time.perf_counter() - started)
+            if isinstance(result, BaseException):
+                raise result
+            if not result.is_success:
+                raise _error_from_response(result)
+            return result
+
+        breaker = None
+        if self._circuit_breakers is not None:
+            breaker = self._circuit_breakers.get(f"tool:{tool}")
+        return await with_retry(
+            _attempt, self._retry_options, breaker=breaker, budget=self._retry_budget
+        )
+
+    async def _send_proxy_batch(
+        self, bodies: List[Dict[str, Any]]
+    ) -> List[Union[httpx.Response, BaseException]]:
+        """Batch sender used by the batcher: one response or error per call."""
+        # A batch is shared by many callers, so no single caller's deadline applies
+        with deadline.without_deadline():
+            if len(bodies) > 1 and self._batch_proxy:
+                try:
+                    response = await self._make_request(
+                        "/api/proxy-batch",
+                        method="POST",
+                        json={"requests": bodies},
+                        retry=False,
+                    )
+                except GatewayError as error:
+                    # Older gateways have no batch endpoint
+                    if error.status_code != 404:
+                        raise
+                    self._batch_proxy = False
+                else:
+                    return [
+                        httpx.Response(
+                            entry["status"],
+                            headers=entry.get("headers"),
+                            content=codec.dumps(entry["body"]),
+                        )
+                        for entry in codec.loads(response.content)["results"]
+                    ]
+
+            return await asyncio.gather(
+                *(
+                    self._make_request(
+                        "/api/proxy-request",
+                        method="POST",
+                        json=body,
+                        tool=body["tool"],
+                        action=body["action"],
+                        retry=False,
+                    )
+                    for body in bodies
+                ),
+                return_exceptions=True,
+            )
+
+    async def proxy_many(
+        self,
+        calls: Union[Iterable[ProxyCall], AsyncIterable[ProxyCall]],
+        concurrency: int = 10,
+        ordered: bool = False,
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Run many proxy calls with at most `concurrency` in flight.
+
+        Yields `(index, result)` pairs, where `index` is the position of the
+        call in `calls`. Failed calls yield their `GatewayError` as the result
+        instead of aborting the batch. Results are yielded as they complete,
+        or in input order when `ordered` is true.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        # Without the token cache, issue one token per tool for the whole batch
+        batch_tokens: Dict[str, "asyncio.Future[str]"] = {}
+
+        async def _token_for(tool: str) -> Optional[str]:
+            if self._token_cache is not None:
+                return None
+            if tool not in batch_tokens:
+                batch_tokens[tool] = asyncio.ensure_future(self._get_auto_token(tool))
+            return await asyncio.shield(batch_tokens[tool])
+
+        # The calls run in their own tasks, where the caller's frame is gone
+        diagnostics = self._diagnostics
+        call_site = diagnostics.call_site() if diagnostics is not None else None
+
+        async def _run(index: int, call: ProxyCall) -> Tuple[int, Any]:
+            tool, action, params = call
+            scope = diagnostics.call_site_scope(call_site) if call_site else nullcontext()
+            try:
+                with scope:
+                    token = await _token_for(tool)
+                    return index, await self.proxy(tool, action, params, token)
+            except GatewayError as error:
+                return index, error
+            except Exception as error:
+                return index, GatewayError(str(error), code="CLIENT_ERROR")
+
+        pending: set = set()
+        buffered: Dict[int, Any] = {}
+        next_index = 0
+
+        async def _drain() -> List[Tuple[int, Any]]:
+            nonlocal pending, next_index
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            results = [task.result() for task in done]
+            if not ordered:
+                return results
+            buffered.update(results)
+            ready = []
+            while next_index in buffered:
+                ready.append((next_index, buffered.pop(next_index)))
+                next_index += 1
+            return ready
+
+        try:
+            index = 0
+            async for call in _iterate(calls):
+                # In ordered mode the window also bounds results held for reordering
+                while len(pending) + len(buffered) >= concurrency:
+                    for result in await _drain():
+                        yield result
+                pending.add(asyncio.ensure_future(_run(index, call)))
+                index += 1
+
+            while pending:
+                for result in await _drain():
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            for future in batch_tokens.values():
+                future.cancel()
+
+    async def get_job(self, job_id: str, agent_token: Optional[str] = None) -> JobResponse:
         """Get job status and result."""
-        response = await self._make_request(f"/api/jobs/{job_id}", method="GET")
-        return JobResponse(**response.json())
+        response = await self._make_request(
+            f"/api/jobs/{job_id}",
+            method="GET",
+            breaker_key="/api/jobs",
+            headers=await self._job_headers(agent_token),
+        )
+        return self._build_model(
+            JobResponse, {"job_id": job_id, **codec.loads(response.content)}
+        )
+
+    async def get_jobs(
+        self, job_ids: List[str], agent_token: Optional[str] = None
+    ) -> Dict[str, JobResponse]:
+        """Get the status of many jobs in one request; unknown jobs are omitted."""
+        if not job_ids:
+            return {}
+        response = await self._make_request(
+            "/api/jobs",
+            method="GET",
+            params={"ids": ",".join(job_ids)},
+            headers=await self._job_headers(agent_token),
+        )
+        jobs = codec.loads(response.content)["jobs"]
+        return {job["job_id"]: self._build_model(JobResponse, job) for job in jobs}
+
+    def job_future(self, job_id: str) -> "asyncio.Future[JobResponse]":
+        """Return a future that resolves once the job is done or failed."""
+        return self._job_poller.watch(job_id)
+
+    async def wait_for_job(
+        self, job_id: str, timeout: Optional[float] = None
+    ) -> JobResponse:
+        """Wait until a job is done or failed, polling through the shared poller."""
+        return await asyncio.wait_for(
+            asyncio.shield(self.job_future(job_id)), timeout=timeout
+        )
+
+    async def as_completed(self, job_ids: Iterable[str]) -> AsyncIterator[JobResponse]:
+        """Yield jobs as they finish, in completion order."""
+        futures = [self.job_future(job_id) for job_id in dict.fromkeys(job_ids)]
+        for next_done in asyncio.as_completed(futures):
+            yield await next_done
+
+    async def _fetch_jobs(self, job_ids: List[str]) -> Dict[str, JobResponse]:
+        """Job lookup used by the shared poller."""
+        if self._batch_job_lookup:
+            try:
+                return await self.get_jobs(job_ids)
+            except GatewayError as error:
+                # Older gateways only support single-job lookups
+                if error.status_code != 404:
+                    raise
+                self._batch_job_lookup = False
+
+        results = await asyncio.gather(
+            *(self.get_job(job_id) for job_id in job_ids), return_exceptions=True
+        )
+        jobs: Dict[str, JobResponse] = {}
+        for job_id, result in zip(job_ids, results):
+            if isinstance(result, JobResponse):
+                jobs[job_id] = result
+            elif not (isinstance(result, GatewayError) and result.status_code == 404):
+                raise result
+        return jobs
+
+    def stream_run_logs(
+        self,
+        run_id: str,
+        max_reconnects: int = 5,
+        read_timeout_ms: Optional[int] = None,
+    ) -> AsyncIterator["StreamEvent"]:
+        """Stream the logs of an agent run as SSE events."""
+        return self._stream_events(
+            f"/api/runs/{run_id}/logs/stream", max_reconnects, read_timeout_ms
+        )
+
+    def stream_sentinel_events(
+        self,
+        max_reconnects: int = 5,
+        read_timeout_ms: Optional[int] = None,
+    ) -> AsyncIterator["StreamEvent"]:
+        """Stream Sentinel guard events as SSE events."""
+        return self._stream_events(
+            "/api/sentinel/events/stream", max_reconnects, read_timeout_ms
+        )
+
+    async def _stream_events(
+        self,
+        path: str,
+        max_reconnects: int,
+        read_timeout_ms: Optional[int],
+    ) -> AsyncIterator["StreamEvent"]:
+        """
+        Read an SSE stream, reconnecting with backoff when it drops.
+
+        Events are read from the socket only as the caller consumes them. The
+        stream finishes after an `end` or `error` event from the Gateway.
+        """
+        # Imported here so that clients which never stream do not load the models
+        from .utils.sse import StreamEnd, StreamError, parse_sse
+
+        timeout = httpx.Timeout(
+            self.timeout_ms / 1000,
+            read=read_timeout_ms / 1000 if read_timeout_ms else None,
+        )
+        attempt = 0
+        last_event_id: Optional[str] = None
+
+        while True:
+            headers = {
+                "Accept": "text/event-stream",
+                "X-Correlation-Id": generate_correlation_id(),
+            }
+            if last_event_id:
+                headers["Last-Event-ID"] = last_event_id
+
+            error: Optional[GatewayError] = None
+            try:
+                base_url = self.base_url
+                if self._balancer is not None:
+                    base_url = self._balancer.pick().url
+                async with self._client.stream(
+                    "GET", f"{base_url}{path}", headers=headers, timeout=timeout
+                ) as response:
+                    if not response.is_success:
+                        await response.aread()
+                        raise _error_from_response(response)
+
+                    async for event in parse_sse(response.aiter_lines()):
+                        attempt = 0
+                        if event.id:
+                            last_event_id = event.id
+                        yield event
+                        if isinstance(event, (StreamEnd, StreamError)):
+                            return
+            except httpx.RequestError as e:
+                error = GatewayError(f"Network error: {str(e)}", code="NETWORK_ERROR")
+            except GatewayError as e:
+                if not is_retryable_error(e):
+                    raise
+                error = e
+
+            if attempt >= max_reconnects:
+                raise error or GatewayError("Stream closed unexpectedly", code="STREAM_ERROR")
+            await asyncio.sleep(calculate_delay(attempt, self._retry_options))
+            attempt += 1
 
     async def _make_request(
         self,
         path: str,
         method: str = "GET",
         json: Optional[Dict[str, Any]] = None,
+        breaker_key: Optional[str] = None,
+        tool: str = "",
+        action: str = "",
+        queue_s: float = 0.0,
+        stream: bool = False,
+        retry: bool = True,
+        on_attempt: Optional[Callable[[float], None]] = None,
         **kwargs,
     ) -> httpx.Response:
-        """Make an HTTP request with retry logic and error handling."""
+        """
+        Make an HTTP request with retry logic and error handling.
+
+        With `stream`, a successful response is returned before its body is
+        read and the caller must close it; errors are read and raised as usual.
+        With `retry` false, the request is sent once, bypassing circuit breakers
+        and the retry budget, for callers that retry it themselves. With several
+        Gateway nodes, each attempt goes to a node the call has not tried yet.
+        `on_attempt` is called with the round trip of each attempt that got a
+        response.
+        """
+        balancer = self._balancer
         url = f"{self.base_url}{path}"
+        tried: Set[str] = set()
         correlation_id = generate_correlation_id()
 
         headers = {
             "X-Correlation-Id": correlation_id,
-            **kwargs.get("headers", {}),
+            **kwargs.pop("headers", {}),
         }
 
+        content = codec.dumps(json) if json is not None else None
+        body, encoding = content, None
+        compressor = self._compressor
+        if compressor is not None and content:
+            body, encoding = compressor.compress(content)
+
+        metrics: Optional["RequestMetrics"] = None
+        if self._metrics is not None:
+            metrics = self._metrics.start_request(
+                path, method, tool=tool, action=action, queue_s=queue_s
+            )
+
+        diagnostics = self._diagnostics
+        if diagnostics is not None:
+            diagnostics.start(self)
+
         async def _request():
+            nonlocal body, encoding, url
+            # Tell the Gateway how long we will wait so it can abandon late work
+            attempt_headers = headers
+            remaining_s = deadline.remaining()
+            if remaining_s is not None:
+                if remaining_s <= 0:
+                    raise GatewayDeadlineError()
+                attempt_headers = {
+                    **headers,
+                    deadline.DEADLINE_HEADER: str(max(1, int(remaining_s * 1000))),
+                }
+
+            node: Optional["GatewayNode"] = None
+            if balancer is not None:
+                balancer.start(self._probe_node)
+                node = balancer.pick(tried)
+                tried.add(node.url)
+                url = f"{node.url}{path}"
+                balancer.on_start(node)
+
+            started = time.perf_counter()
+            timing = diagnostics.request_started() if diagnostics is not None else None
+            status = 0
+            responded: Optional[bool] = None
             try:
-                response = await self._client.request(
-                    method, url, json=json, headers=headers, **kwargs
+                response = await self._send_once(
+                    method, url, body, encoding, attempt_headers, timing, stream, kwargs
                 )
+                # The Gateway does not take this encoding; resend uncompressed
+                if response.status_code == 415 and encoding is not None:
+                    await response.aclose()
+                    compressor.negotiate(response)
+                    compressor.reject(encoding)
+                    if metrics is not None:
+                        metrics.bytes_sent += len(body)
+                    body, encoding = content, None
+                    response = await self._send_once(
+                        method, url, body, encoding, attempt_headers, timing, stream, kwargs
+                    )
+                status = response.status_code
+                responded = True
 
-                if not response.is_success:
-                    error_data = response.json() if response.content else {"error": "Unknown error"}
-                    retry_after = response.headers.get("Retry-After")
-
-                    raise create_error_from_response(
-                        response.status_code,
-                        error_data.get("error", f"HTTP {response.status_code}"),
-                        retry_after,
+                if stream and not response.is_success:
+                    await response.aread()
+                if compressor is not None:
+                    compressor.negotiate(response)
+                    if response.is_stream_consumed:
+                        compressor.count_response(response, len(response.content))
+                if metrics is not None and response.is_stream_consumed:
+                    metrics.bytes_received += (
+                        response.num_bytes_downloaded or len(response.content)
                     )
 
+                if not response.is_success:
+                    raise _error_from_response(response)
+
                 return response
             except httpx.RequestError as e:
+                responded = False
                 raise GatewayError(f"Network error: {str(e)}", code="NETWORK_ERROR")
+            finally:
+                if node is not None:
+                    if responded is None:
+                        balancer.on_abandon(node)
+                    else:
+                        balancer.on_finish(node, time.perf_counter() - started, responded)
+                if timing is not None:
+                    diagnostics.request_finished(timing)
+                if on_attempt is not None and responded:
+                    on_attempt(time.perf_counter() - started)
+                if metrics is not None:
+                    metrics.network_s += time.perf_counter() - started
+                    metrics.attempt_statuses.append(status)
+                    metrics.bytes_sent += len(body) if body else 0
+
+        breaker = None
+        retry_options, budget = _SINGLE_ATTEMPT, None
+        if retry:
+            retry_options, budget = self._retry_options, self._retry_budget
+            if self._circuit_breakers is not None:
+                breaker = self._circuit_breakers.get(breaker_key or path)
+
+        if metrics is None:
+            return await with_retry(_request, retry_options, breaker=breaker, budget=budget)
+
+        started = time.perf_counter()
+        try:
+            response = await with_retry(_request, retry_options, breaker=breaker, budget=budget)
+        except GatewayError as error:
+            metrics.set_error(error)
+            raise
+        except asyncio.CancelledError:
+            metrics.outcome = "cancelled"
+            raise
+        except Exception:
+            metrics.outcome = "error"
+            raise
+        else:
+            metrics.status_code = response.status_code
+            return response
+        finally:
+            metrics.duration_s = time.perf_counter() - started
+            self._metrics.record(metrics)
+
+    async def _send_once(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes],
+        encoding: Optional[str],
+        headers: Dict[str, str],
+        timing: Any,
+        stream: bool,
+        kwargs: Dict[str, Any],
+    ) -> httpx.Response:
+        """Send one HTTP request with an optionally compressed body."""
+        if encoding is not None:
+            headers = {**headers, "Content-Encoding": encoding}
+        if timing is not None:
+            kwargs = {**kwargs, "extensions": {"trace": timing.trace}}
+        request = self._client.build_request(
+            method, url, content=body, headers=headers, **kwargs
+        )
+        return await self._client.send(request, stream=stream)
+
+    async def _probe_node(self, base_url: str) -> bool:
+        """Whether a Gateway node answers 200 on every health check path."""
+        for path in self._balancer.options.health_check_paths:
+            try:
+                response = await self._client.get(f"{base_url}{path}")
+            except httpx.RequestError:
+                return False
+            if response.status_code != 200:
+                return False
+        return True
 
-        return await with_retry(_request)
+    def _build_model(self, model: Any, data: Dict[str, Any]) -> Any:
+        """Build a response model, skipping validation if disabled."""
+        if self.validate_responses:
+            return model(**data)
+        return model.model_construct(**data)
 
     def _get_token_age(self, token: str) -> int:
         """Get token age in milliseconds."""
@@ -264,7 +1293,19 @@ class GatewayClient:
 
     async def close(self):
         """Close the HTTP client."""
-        await self._client.aclose()
+        if self._token_cache is not None:
+            self._token_cache.clear()
+        await self._job_poller.close()
+        if self._outbox_flusher is not None:
+            await self._outbox_flusher.close()
+        if self._batcher is not None:
+            await self._batcher.close()
+        if self._balancer is not None:
+            await self._balancer.close()
+        if self._diagnostics is not None:
+            await self._diagnostics.stop(self)
+        if self._owns_transport:
+            await self._client.aclose()
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -273,3 +1314,45 @@ class GatewayClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
         await self.close()
+
+
+def _error_from_response(response: httpx.Response) -> GatewayError:
+    """Create the appropriate error for an unsuccessful response."""
+    error_data: Any = {"error": "Unknown error"}
+    if response.content:
+        try:
+            error_data = codec.loads(response.content)
+        except ValueError:
+            # Non-JSON bodies, e.g. an HTML error page from an intermediate proxy
+            error_data = {}
+    if not isinstance(error_data, dict):
+        error_data = {}
+    # The Gateway reports retry_after in the body; honour the standard header first
+    retry_after = response.headers.get("Retry-After") or error_data.get("retry_after")
+    return create_error_from_response(
+        response.status_code,
+        error_data.get("error", f"HTTP {response.status_code}"),
+        str(retry_after) if retry_after is not None else None,
+    )
+
+
+async def _iterate(
+    items: Union[Iterable[Any], AsyncIterable[Any]]
+) -> AsyncIterator[Any]:
+    """Iterate over a sync or async iterable."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Parse an ISO 8601 timestamp header into epoch seconds."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
@@ -2,6 +2,7 @@
 Error classes for the 4Runr Gateway SDK.
 """
 
+import math
 from typing import Optional
 
 
@@ -66,6 +67,21 @@ class GatewayTokenError(GatewayError):
         super().__init__(message, status_code, "TOKEN_ERROR")
 
 
+class GatewayCircuitOpenError(GatewayError):
+    """Raised without a network call while a circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, None, "CIRCUIT_OPEN")
+        self.retry_after = retry_after
+
+
+class GatewayDeadlineError(GatewayError):
+    """Raised when a call's end-to-end deadline passes."""
+
+    def __init__(self, message: str = "Deadline exceeded"):
+        super().__init__(message, None, "DEADLINE_EXCEEDED")
+
+
 def create_error_from_response(
     status_code: int, error_message: str, retry_after: Optional[str] = None
 ) -> GatewayError:
@@ -73,7 +89,14 @@ def create_error_from_response(
     if status_code in (401, 403):
         return GatewayAuthError(error_message, status_code)
     elif status_code == 429:
-        retry_after_seconds = int(retry_after) if retry_after else None
+        retry_after_seconds = None
+        if retry_after:
+            try:
+                # Round up so a fractional wait never comes back early
+                retry_after_seconds = math.ceil(float(retry_after))
+            except (ValueError, OverflowError):
+                # HTTP-date values are not supported; fall back to the default wait
+                pass
         return GatewayRateLimitError(error_message, retry_after_seconds, status_code)
     elif status_code == 400:
         if "policy" in error_message.lower() or "scope" in error_message.lower():
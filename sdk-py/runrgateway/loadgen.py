@@ -0,0 +1,390 @@
+"""
+Open-loop load generator and traffic replay for the Gateway, built on GatewayClient.
+
+Calls are started on a fixed schedule whether or not earlier calls have
+finished, and each latency is measured from the call's scheduled start. A slow
+Gateway therefore shows up as higher latency instead of a quietly lower
+request rate (coordinated omission).
+
+    # 200 calls/s for 30 s
+    python -m runrgateway.loadgen --rate 200 --duration 30 \\
+        --tool serpapi --action search --params '{"q": "plumbers"}'
+
+    # Replay a JSONL log of proxy calls at twice its recorded speed
+    python -m runrgateway.loadgen --replay calls.jsonl --speed 2
+
+Replay lines are JSON objects with `tool`, `action` and `params`, and
+optionally `async` (send with proxy_async), plus `offset_ms` from the start of
+the log or a `timestamp` (epoch seconds or ISO 8601) for the call's start.
+Lines without timing are spread evenly at `--rate`. The Gateway URL and agent
+credentials come from --base-url/--agent-id or the GATEWAY_URL, AGENT_ID and
+AGENT_PRIVATE_KEY environment variables.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .client import GatewayClient
+from .utils.transport import PoolOptions
+
+REPORT_PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99, 100.0)
+
+
+class LatencyHistogram:
+    """
+    Latency histogram with bounded relative error, in the style of HdrHistogram.
+
+    Values are counted in logarithmic buckets, so memory depends on the range
+    of latencies rather than the number of calls, and every reported
+    percentile is within `10 ** -significant_digits` of the true value.
+    """
+
+    def __init__(self, significant_digits: int = 2):
+        self.significant_digits = significant_digits
+        self._log_base = math.log1p(10.0 ** -significant_digits)
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_s = 0.0
+        self.min_s = math.inf
+        self.max_s = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record one latency."""
+        seconds = max(seconds, 1e-6)
+        bucket = math.ceil(math.log(seconds) / self._log_base)
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total_s += seconds
+        self.min_s = min(self.min_s, seconds)
+        self.max_s = max(self.max_s, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the counts of a histogram with the same precision."""
+        for bucket, count in other._counts.items():
+            self._counts[bucket] = self._counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total_s += other.total_s
+        self.min_s = min(self.min_s, other.min_s)
+        self.max_s = max(self.max_s, other.max_s)
+
+    def percentile(self, pct: float) -> float:
+        """Latency in seconds at or below which `pct` percent of calls finished."""
+        if self.count == 0:
+            return 0.0
+        if pct >= 100:
+            return self.max_s
+        rank = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                return min(math.exp(bucket * self._log_base), self.max_s)
+        return self.max_s
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+
+class LoadCall:
+    """One proxy call and when to start it, in seconds from the start of the run."""
+
+    __slots__ = ("tool", "action", "params", "offset_s", "is_async")
+
+    def __init__(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        offset_s: float,
+        is_async: bool = False,
+    ):
+        self.tool = tool
+        self.action = action
+        self.params = params
+        self.offset_s = offset_s
+        self.is_async = is_async
+
+
+class LoadReport:
+    """Outcome of a load run."""
+
+    def __init__(self, target_rate: float):
+        self.target_rate = target_rate
+        self.latency = LatencyHistogram()
+        self.errors: Counter = Counter()
+        self.sent = 0
+        self.succeeded = 0
+        self.elapsed_s = 0.0
+        self.max_dispatch_lag_s = 0.0
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + sum(self.errors.values())
+
+    @property
+    def achieved_rate(self) -> float:
+        """Calls completed per second over the run."""
+        return self.completed / self.elapsed_s if self.elapsed_s else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target_rate": self.target_rate,
+            "achieved_rate": self.achieved_rate,
+            "sent": self.sent,
+            "succeeded": self.succeeded,
+            "errors": dict(self.errors),
+            "elapsed_s": self.elapsed_s,
+            "max_dispatch_lag_ms": self.max_dispatch_lag_s * 1000,
+            "latency_ms": {
+                "min": self.latency.min_s * 1000 if self.latency.count else 0.0,
+                "mean": self.latency.mean_s * 1000,
+                **{
+                    f"p{pct:g}": self.latency.percentile(pct) * 1000
+                    for pct in REPORT_PERCENTILES
+                },
+            },
+        }
+
+    def format(self) -> str:
+        lines = [
+            f"target rate      {self.target_rate:>10.1f} calls/s",
+            f"achieved rate    {self.achieved_rate:>10.1f} calls/s",
+            f"sent             {self.sent:>10}",
+            f"succeeded        {self.succeeded:>10}",
+            f"failed           {sum(self.errors.values()):>10}",
+            f"elapsed          {self.elapsed_s:>10.2f} s",
+            f"max dispatch lag {self.max_dispatch_lag_s * 1000:>10.2f} ms",
+            "",
+            "latency (from scheduled start)",
+        ]
+        for pct in REPORT_PERCENTILES:
+            label = "max" if pct == 100 else f"p{pct:g}"
+            lines.append(f"  {label:<8}{self.latency.percentile(pct) * 1000:>12.2f} ms")
+        if self.errors:
+            lines += ["", "errors"]
+            for name, count in self.errors.most_common():
+                lines.append(f"  {name:<28}{count:>8}")
+        if self.max_dispatch_lag_s > 0.01:
+            lines += [
+                "",
+                "warning: the generator fell behind its schedule; "
+                "latencies include its own delay",
+            ]
+        return "\n".join(lines)
+
+
+def constant_rate(
+    tool: str,
+    action: str,
+    params: Dict[str, Any],
+    rate: float,
+    duration_s: float,
+    poisson: bool = False,
+    seed: Optional[int] = None,
+) -> Iterator[LoadCall]:
+    """Calls at `rate` per second for `duration_s`, evenly spaced or as a Poisson process."""
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    rng = random.Random(seed)
+    offset_s = 0.0
+    while offset_s < duration_s:
+        yield LoadCall(tool, action, params, offset_s)
+        offset_s += rng.expovariate(rate) if poisson else 1.0 / rate
+
+
+def read_replay(
+    path: str, speed: float = 1.0, rate: Optional[float] = None
+) -> List[LoadCall]:
+    """
+    Load calls from a JSONL log.
+
+    Recorded timing is kept, divided by `speed`, unless `rate` is given or
+    lines carry no timing, in which case calls are spread evenly at `rate`.
+    """
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    if rate is not None and rate <= 0:
+        raise ValueError("rate must be positive")
+
+    records: List[Dict[str, Any]] = []
+    with open(path, encoding="utf-8") as fh:
+        for number, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "tool" not in record or "action" not in record:
+                raise ValueError(f"{path}:{number}: tool and action are required")
+            records.append(record)
+    if not records:
+        raise ValueError(f"{path}: replay file has no calls")
+
+    offsets = [_record_offset(record) for record in records]
+    timed = rate is None and all(offset is not None for offset in offsets)
+    if not timed and not rate:
+        raise ValueError("replay lines have no timing; pass a rate")
+    if timed:
+        start = min(offsets)
+    calls = []
+    for index, record in enumerate(records):
+        offset_s = (offsets[index] - start) / speed if timed else index / rate
+        calls.append(
+            LoadCall(
+                record["tool"],
+                record["action"],
+                record.get("params", {}),
+                offset_s,
+                bool(record.get("async")),
+            )
+        )
+    calls.sort(key=lambda call: call.offset_s)
+    return calls
+
+
+def _record_offset(record: Dict[str, Any]) -> Optional[float]:
+    """Start time of a replay record in seconds, on any consistent scale."""
+    if "offset_ms" in record:
+        return float(record["offset_ms"]) / 1000
+    timestamp = record.get("timestamp")
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+
+
+async def run_load(
+    client: GatewayClient,
+    calls: Iterable[LoadCall],
+    target_rate: float,
+    max_in_flight: int = 10000,
+) -> LoadReport:
+    """
+    Start each call at its scheduled time and record how it went.
+
+    At most `max_in_flight` calls run at once; a call waiting for a slot still
+    has its latency measured from its scheduled start.
+    """
+    loop = asyncio.get_running_loop()
+    report = LoadReport(target_rate)
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks: Set["asyncio.Task[None]"] = set()
+
+    async def _fire(call: LoadCall, scheduled: float) -> None:
+        try:
+            async with slots:
+                if call.is_async:
+                    await client.proxy_async(call.tool, call.action, call.params)
+                else:
+                    await client.proxy(call.tool, call.action, call.params)
+        except Exception as error:
+            report.errors[type(error).__name__] += 1
+        else:
+            report.succeeded += 1
+        report.latency.record(loop.time() - scheduled)
+
+    started = loop.time()
+    for call in calls:
+        scheduled = started + call.offset_s
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            report.max_dispatch_lag_s = max(report.max_dispatch_lag_s, -delay)
+            # Let started calls make progress while catching up
+            await asyncio.sleep(0)
+        report.sent += 1
+        task = asyncio.ensure_future(_fire(call, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    report.elapsed_s = loop.time() - started
+    return report
+
+
+def _positive(value: str) -> float:
+    """argparse type for a number above zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}") from None
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be positive, got {value}")
+    return number
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m runrgateway.loadgen", description=__doc__.split("\n\n")[0].strip()
+    )
+    parser.add_argument("--base-url", default=os.environ.get("GATEWAY_URL"))
+    parser.add_argument("--agent-id", default=os.environ.get("AGENT_ID"))
+    parser.add_argument("--agent-key", default=os.environ.get("AGENT_PRIVATE_KEY", ""))
+    parser.add_argument("--rate", type=_positive, help="target calls per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds (rate mode)")
+    parser.add_argument("--poisson", action="store_true", help="random arrivals at --rate")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--tool", default="serpapi")
+    parser.add_argument("--action", default="search")
+    parser.add_argument("--params", default="{}", help="JSON params for every call")
+    parser.add_argument("--replay", metavar="JSONL", help="replay calls from a JSONL log")
+    parser.add_argument("--speed", type=_positive, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--max-in-flight", type=int, default=10000)
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--timeout-ms", type=int, default=6000)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.base_url or not args.agent_id:
+        parser.error("--base-url and --agent-id (or GATEWAY_URL and AGENT_ID) are required")
+
+    if args.replay:
+        calls: List[LoadCall] = read_replay(args.replay, args.speed, args.rate)
+        span = calls[-1].offset_s
+        target_rate = args.rate or (len(calls) / span if span else float(len(calls)))
+        schedule: Iterable[LoadCall] = calls
+    else:
+        if not args.rate:
+            parser.error("--rate is required without --replay")
+        target_rate = args.rate
+        schedule = constant_rate(
+            args.tool,
+            args.action,
+            json.loads(args.params),
+            args.rate,
+            args.duration,
+            poisson=args.poisson,
+            seed=args.seed,
+        )
+
+    async def _run() -> LoadReport:
+        async with GatewayClient(
+            args.base_url,
+            args.agent_id,
+            args.agent_key,
+            timeout_ms=args.timeout_ms,
+            pool_options=PoolOptions(max_connections=args.max_connections),
+        ) as client:
+            return await run_load(client, schedule, target_rate, args.max_in_flight)
+
+    report = asyncio.run(_run())
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(report.format())
+    return 0 if report.succeeded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
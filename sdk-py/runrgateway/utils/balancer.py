@@ -0,0 +1,210 @@
+"""
+Client-side load balancing and failover across Gateway nodes.
+"""
+
+import asyncio
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+EWMA = "ewma"
+LEAST_OUTSTANDING = "least_outstanding"
+
+# Returns whether the node at a base URL passes its health checks
+HealthProbe = Callable[[str], Awaitable[bool]]
+
+
+class BalancerOptions:
+    """Configuration for load balancing across Gateway nodes."""
+
+    def __init__(
+        self,
+        policy: str = EWMA,
+        decay_ms: float = 10000,
+        failure_threshold: int = 3,
+        ejection_ms: int = 30000,
+        health_check_interval_ms: Optional[int] = 5000,
+        health_check_timeout_ms: int = 2000,
+        health_check_paths: Sequence[str] = ("/api/health",),
+    ):
+        if policy not in (EWMA, LEAST_OUTSTANDING):
+            raise ValueError(f"Unknown balancing policy: {policy}")
+        self.policy = policy
+        self.decay_ms = decay_ms
+        self.failure_threshold = failure_threshold
+        self.ejection_ms = ejection_ms
+        self.health_check_interval_ms = health_check_interval_ms
+        self.health_check_timeout_ms = health_check_timeout_ms
+        # Every path must answer 200; the default is the route the Gateway
+        # server serves, and "/health", "/ready" suit builds with the full
+        # health routes
+        self.health_check_paths = tuple(health_check_paths)
+
+
+class GatewayNode:
+    """One Gateway node and what the client has observed of it."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.ewma_s = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+        self._ejected_at = 0.0
+        self._updated_at = 0.0
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+
+    def cost(self) -> float:
+        """Expected wait for a new request: latency scaled by the requests ahead of it."""
+        return self.ewma_s * (self.outstanding + 1)
+
+
+class LoadBalancer:
+    """
+    Picks a Gateway node per request and ejects nodes that fail.
+
+    The "ewma" policy compares two random nodes and takes the one with the
+    lower peak-EWMA latency times outstanding requests, so a node that slows
+    down sheds load within a few requests. Latency rises to a slower sample
+    at once and decays back over `decay_ms`. The "least_outstanding" policy
+    takes the node with the fewest requests in flight.
+
+    A node is ejected for `ejection_ms` after `failure_threshold` consecutive
+    requests got no response, and whenever one of its `health_check_paths`
+    fails to answer 200. Checks run every `health_check_interval_ms`, and a passing check
+    returns an ejected node to service. If every node is ejected, requests
+    still go to the least-loaded one rather than failing outright.
+    """
+
+    def __init__(self, urls: Iterable[str], options: Optional[BalancerOptions] = None):
+        self.options = options or BalancerOptions()
+        self.nodes = [GatewayNode(url.rstrip("/")) for url in urls]
+        if not self.nodes:
+            raise ValueError("At least one Gateway URL is required")
+        self._probe: Optional[HealthProbe] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._random = random.Random()
+
+    def pick(self, exclude: Optional[Set[str]] = None) -> GatewayNode:
+        """Choose a node, avoiding ejected nodes and the URLs in `exclude`."""
+        candidates = [node for node in self.nodes if not node.ejected]
+        if exclude:
+            untried = [node for node in candidates if node.url not in exclude]
+            if not untried:
+                # Every healthy node was tried; an ejected one is worth a try
+                # before repeating one that just failed
+                untried = [node for node in self.nodes if node.url not in exclude]
+            candidates = untried or candidates
+        if not candidates:
+            candidates = self.nodes
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.options.policy == LEAST_OUTSTANDING:
+            fewest = min(node.outstanding for node in candidates)
+            return self._random.choice(
+                [node for node in candidates if node.outstanding == fewest]
+            )
+        first, second = self._random.sample(candidates, 2)
+        return first if first.cost() <= second.cost() else second
+
+    def on_start(self, node: GatewayNode) -> None:
+        """Record a request sent to `node`."""
+        node.outstanding += 1
+        node.requests += 1
+
+    def on_finish(self, node: GatewayNode, latency_s: float, responded: bool) -> None:
+        """Record a request's latency, and whether the node answered at all."""
+        node.outstanding -= 1
+        if not responded:
+            node.failures += 1
+            node.consecutive_failures += 1
+            if node.consecutive_failures >= self.options.failure_threshold:
+                self.eject(node)
+            return
+        node.consecutive_failures = 0
+        now = time.monotonic()
+        if latency_s > node.ewma_s:
+            node.ewma_s = latency_s
+        else:
+            weight = math.exp(-(now - node._updated_at) * 1000 / self.options.decay_ms)
+            node.ewma_s = node.ewma_s * weight + latency_s * (1 - weight)
+        node._updated_at = now
+
+    def on_abandon(self, node: GatewayNode) -> None:
+        """Record a request given up before it finished, e.g. cancelled."""
+        node.outstanding -= 1
+
+    def eject(self, node: GatewayNode) -> None:
+        """Take a node out of service for `ejection_ms`."""
+        if not node.ejected:
+            node.ejections += 1
+        node._ejected_at = time.monotonic()
+        node.ejected_until = node._ejected_at + self.options.ejection_ms / 1000
+
+    def start(self, probe: HealthProbe) -> None:
+        """Start periodic health checks with `probe`, if configured."""
+        if self.options.health_check_interval_ms is None or len(self.nodes) < 2:
+            return
+        self._probe = probe
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def check(self) -> None:
+        """Check every node now, ejecting failures and restoring passes."""
+        if self._probe is None:
+            return
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._check_node(node) for node in self.nodes), return_exceptions=True
+        )
+        for node, healthy in zip(self.nodes, results):
+            if healthy is True:
+                # A node ejected while the check ran failed after it passed
+                if node._ejected_at > started:
+                    continue
+                node.ejected_until = 0.0
+                node.consecutive_failures = 0
+            else:
+                self.eject(node)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-node load, latency and failure counts."""
+        return [
+            {
+                "url": node.url,
+                "ejected": node.ejected,
+                "outstanding": node.outstanding,
+                "ewma_ms": node.ewma_s * 1000,
+                "requests": node.requests,
+                "failures": node.failures,
+                "ejections": node.ejections,
+            }
+            for node in self.nodes
+        ]
+
+    async def close(self) -> None:
+        """Stop health checks."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _check_node(self, node: GatewayNode) -> bool:
+        return await asyncio.wait_for(
+            self._probe(node.url), self.options.health_check_timeout_ms / 1000
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.options.health_check_interval_ms / 1000)
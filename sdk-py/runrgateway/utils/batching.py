@@ -0,0 +1,104 @@
+"""
+Micro-batching of concurrent proxy calls into single Gateway requests.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class BatchOptions:
+    """Configuration for proxy call batching."""
+
+    def __init__(self, max_batch_size: int = 50, max_delay_ms: float = 2.0):
+        self.max_batch_size = max_batch_size
+        self.max_delay_ms = max_delay_ms
+
+
+# Sends request bodies as one batch and returns one result per body
+BatchSender = Callable[[List[Dict[str, Any]]], Awaitable[List[Any]]]
+
+
+class ProxyBatcher:
+    """
+    Gathers concurrent proxy calls and sends them as one request.
+
+    A call waits at most `max_delay_ms` for others to join it; a batch is sent
+    as soon as it reaches `max_batch_size`. Each caller gets back its own
+    result. Callers that stop waiting (cancelled, or past their deadline)
+    before their batch is sent are left out of it. If the batch request
+    itself fails, every caller in it gets the error.
+    """
+
+    def __init__(self, send: BatchSender, options: Optional[BatchOptions] = None):
+        self.options = options or BatchOptions()
+        self._send = send
+        self._pending: List[Tuple[Dict[str, Any], "asyncio.Future[Any]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Future[None]"] = set()
+        self.batches = 0
+        self.calls = 0
+
+    async def submit(self, body: Dict[str, Any]) -> Any:
+        """Queue a request body and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Any]" = loop.create_future()
+        self._pending.append((body, future))
+        if len(self._pending) >= self.options.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.options.max_delay_ms / 1000, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Send the pending calls now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = [(body, future) for body, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        self.batches += 1
+        self.calls += len(batch)
+        task = asyncio.ensure_future(self._send_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, float]:
+        """Batches sent, calls carried and the mean batch size."""
+        return {
+            "batches": self.batches,
+            "calls": self.calls,
+            "mean_batch_size": self.calls / self.batches if self.batches else 0.0,
+        }
+
+    async def close(self) -> None:
+        """Cancel queued calls and batches in flight."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _send_batch(
+        self, batch: List[Tuple[Dict[str, Any], "asyncio.Future[Any]"]]
+    ) -> None:
+        try:
+            results = await self._send([body for body, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,137 @@
+"""
+Request body compression negotiated with the Gateway.
+"""
+
+import gzip
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+import httpx
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+HAS_ZSTD = zstandard is not None
+
+
+class CompressionOptions:
+    """Configuration for request compression."""
+
+    def __init__(
+        self,
+        min_size: int = 1024,
+        encodings: Sequence[str] = (ZSTD, GZIP),
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ):
+        self.min_size = min_size
+        self.encodings = tuple(encodings)
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+
+class Compressor:
+    """
+    Compresses request bodies and counts the bytes saved in both directions.
+
+    Bodies are only compressed once the Gateway has advertised the encodings it
+    accepts (an `Accept-Encoding` header on any response, as in RFC 7694), so
+    the first request to a Gateway goes out uncompressed. The first encoding in
+    `encodings` that the Gateway accepts and is installed locally is used; zstd
+    needs the `zstandard` package. Bodies smaller than `min_size`, or that do
+    not get smaller, are sent as-is. A 415 reply drops the encoding for the
+    rest of the client's life.
+
+    Compressed responses are decoded by httpx; `count_response` records how
+    many bytes arrived on the wire against the decoded size.
+    """
+
+    def __init__(self, options: Optional[CompressionOptions] = None):
+        self.options = options or CompressionOptions()
+        self._accepted: Optional[Tuple[str, ...]] = None
+        self._rejected: Set[str] = set()
+        self._encoding: Optional[str] = None
+        self._zstd = (
+            zstandard.ZstdCompressor(level=self.options.zstd_level) if HAS_ZSTD else None
+        )
+        self.requests_compressed = 0
+        self.request_bytes = 0
+        self.request_bytes_sent = 0
+        self.responses_compressed = 0
+        self.response_bytes = 0
+        self.response_bytes_received = 0
+
+    @property
+    def encoding(self) -> Optional[str]:
+        """Encoding used for large request bodies, or None until negotiated."""
+        return self._encoding
+
+    def compress(self, content: bytes) -> Tuple[bytes, Optional[str]]:
+        """Return the body to send and its Content-Encoding, if compressed."""
+        encoding = self._encoding
+        self.request_bytes += len(content)
+        if encoding is None or len(content) < self.options.min_size:
+            self.request_bytes_sent += len(content)
+            return content, None
+
+        if encoding == ZSTD:
+            compressed = self._zstd.compress(content)
+        else:
+            compressed = gzip.compress(content, compresslevel=self.options.gzip_level, mtime=0)
+        if len(compressed) >= len(content):
+            self.request_bytes_sent += len(content)
+            return content, None
+
+        self.requests_compressed += 1
+        self.request_bytes_sent += len(compressed)
+        return compressed, encoding
+
+    def negotiate(self, response: httpx.Response) -> None:
+        """Learn the encodings the Gateway accepts from a response's headers."""
+        advertised = response.headers.get("Accept-Encoding")
+        if advertised is not None:
+            accepted = tuple(
+                value.split(";", 1)[0].strip().lower() for value in advertised.split(",")
+            )
+            if accepted != self._accepted:
+                self._accepted = accepted
+                self._encoding = self._choose()
+
+    def count_response(self, response: httpx.Response, decoded_bytes: int) -> None:
+        """Count a fully read response body against its size on the wire."""
+        self.response_bytes += decoded_bytes
+        self.response_bytes_received += response.num_bytes_downloaded or decoded_bytes
+        if response.headers.get("Content-Encoding", "identity") != "identity":
+            self.responses_compressed += 1
+
+    def reject(self, encoding: str) -> None:
+        """Stop using an encoding the Gateway refused with a 415."""
+        self._rejected.add(encoding)
+        self._encoding = self._choose()
+
+    def stats(self) -> Dict[str, int]:
+        """Compressed message counts and bytes before and after compression."""
+        request_saved = self.request_bytes - self.request_bytes_sent
+        response_saved = self.response_bytes - self.response_bytes_received
+        return {
+            "requests_compressed": self.requests_compressed,
+            "request_bytes": self.request_bytes,
+            "request_bytes_sent": self.request_bytes_sent,
+            "responses_compressed": self.responses_compressed,
+            "response_bytes": self.response_bytes,
+            "response_bytes_received": self.response_bytes_received,
+            "bytes_saved": request_saved + response_saved,
+        }
+
+    def _choose(self) -> Optional[str]:
+        for encoding in self.options.encodings:
+            if (encoding == ZSTD and not HAS_ZSTD) or encoding in self._rejected:
+                continue
+            if encoding in (self._accepted or ()) and encoding in (GZIP, ZSTD):
+                return encoding
+        return None
+
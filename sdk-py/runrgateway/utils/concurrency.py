@@ -0,0 +1,220 @@
+"""
+Adaptive per-tool concurrency limits driven by observed latency and errors.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from ..errors import GatewayError, GatewayRateLimitError
+from .retry import is_retryable_error
+
+GRADIENT = "gradient"
+AIMD = "aimd"
+
+
+class ConcurrencyOptions:
+    """Configuration for an adaptive concurrency limit."""
+
+    def __init__(
+        self,
+        algorithm: str = GRADIENT,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff_ratio: float = 0.9,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        baseline_window: int = 600,
+    ):
+        if algorithm not in (GRADIENT, AIMD):
+            raise ValueError(f"Unknown concurrency algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.baseline_window = baseline_window
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit for one tool that adapts to the Gateway's responses.
+
+    Callers beyond the limit wait in FIFO order. A call the Gateway could not
+    serve (429, 5xx or no response) cuts the limit by `backoff_ratio`, at most
+    once per batch of calls in flight when the cut happened. Other calls feed
+    their round-trip time to the algorithm (that of the attempt that succeeded,
+    if the caller reports one, so retry backoff does not count as latency):
+
+    - "gradient" keeps the lowest recent RTT as a baseline and scales the
+      limit by baseline / RTT, allowing RTTs up to `tolerance` times the
+      baseline before shrinking, plus a sqrt(limit) allowance for queueing.
+      `smoothing` damps each change. The baseline drifts up towards slower
+      RTTs over about `baseline_window` calls, so it follows a lasting change
+      in the tool's latency.
+    - "aimd" adds one per successful call and relies on the cuts alone.
+
+    The limit only grows while at least half of it is in use, so an idle tool
+    does not build up a limit it never tested.
+    """
+
+    def __init__(self, options: ConcurrencyOptions):
+        self.options = options
+        self.limit = float(options.initial_limit)
+        self.in_flight = 0
+        self.baseline_rtt_s = 0.0
+        self.last_rtt_s = 0.0
+        self.dropped = 0
+        self._decreased_at = float("-inf")
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Wait for a slot and return the call's start time for `release`."""
+        if self.in_flight >= int(self.limit) or self._waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # Handed a slot as it was cancelled; pass it on
+                    self.in_flight -= 1
+                    self._wake()
+                raise
+        else:
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(
+        self,
+        started: float,
+        error: Optional[BaseException] = None,
+        rtt_s: Optional[float] = None,
+    ) -> None:
+        """
+        Free a slot and adjust the limit from the call's outcome.
+
+        `rtt_s` is the round trip of the call's last attempt; without it the
+        time since `started` is used.
+        """
+        self.in_flight -= 1
+        now = time.monotonic()
+        if error is None:
+            self._on_sample(now - started if rtt_s is None else rtt_s)
+        elif _is_overload(error):
+            self.dropped += 1
+            # Calls already in flight when the limit was cut say nothing new
+            if started > self._decreased_at:
+                self._decreased_at = now
+                self._set_limit(self.limit * self.options.backoff_ratio)
+        self._wake()
+
+    def stats(self) -> Dict[str, float]:
+        """Current limit, calls in flight, queue depth and RTTs."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "baseline_rtt_ms": self.baseline_rtt_s * 1000,
+            "last_rtt_ms": self.last_rtt_s * 1000,
+            "dropped": self.dropped,
+        }
+
+    def _on_sample(self, rtt_s: float) -> None:
+        self.last_rtt_s = rtt_s
+        if self.baseline_rtt_s == 0 or rtt_s < self.baseline_rtt_s:
+            self.baseline_rtt_s = rtt_s
+        else:
+            self.baseline_rtt_s += (rtt_s - self.baseline_rtt_s) / self.options.baseline_window
+
+        if self.in_flight + 1 < self.limit / 2:
+            return
+        if self.options.algorithm == AIMD:
+            self._set_limit(self.limit + 1)
+            return
+
+        if rtt_s <= 0:
+            return
+        gradient = max(0.5, min(1.0, self.options.tolerance * self.baseline_rtt_s / rtt_s))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        smoothing = self.options.smoothing
+        self._set_limit(self.limit * (1 - smoothing) + target * smoothing)
+
+    def _set_limit(self, limit: float) -> None:
+        self.limit = float(min(self.options.max_limit, max(self.options.min_limit, limit)))
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class _Slot:
+    """Async context manager holding one slot of an AdaptiveLimit."""
+
+    __slots__ = ("_limit", "_started", "_rtt_s")
+
+    def __init__(self, limit: AdaptiveLimit):
+        self._limit = limit
+        self._started = 0.0
+        self._rtt_s: Optional[float] = None
+
+    def record_attempt(self, rtt_s: float) -> None:
+        """Report the round trip of one attempt; the last one is sampled."""
+        self._rtt_s = rtt_s
+
+    async def __aenter__(self) -> "_Slot":
+        self._started = await self._limit.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._limit.release(self._started, exc_val, self._rtt_s)
+
+
+class ConcurrencyLimiter:
+    """Adaptive concurrency limits keyed by tool, created on first use."""
+
+    def __init__(
+        self,
+        options: Optional[ConcurrencyOptions] = None,
+        tools: Optional[Dict[str, ConcurrencyOptions]] = None,
+    ):
+        self.options = options or ConcurrencyOptions()
+        self.tool_options = tools or {}
+        self._limits: Dict[str, AdaptiveLimit] = {}
+
+    def limit(self, tool: str) -> AdaptiveLimit:
+        """Get the limit for a tool."""
+        limit = self._limits.get(tool)
+        if limit is None:
+            limit = AdaptiveLimit(self.tool_options.get(tool, self.options))
+            self._limits[tool] = limit
+        return limit
+
+    def slot(self, tool: str) -> _Slot:
+        """Async context manager that holds a slot for one call to the tool."""
+        return _Slot(self.limit(tool))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current limit, calls in flight and queue depth per tool."""
+        return {tool: limit.stats() for tool, limit in self._limits.items()}
+
+
+def _is_overload(error: BaseException) -> bool:
+    """Whether an error means the Gateway or the tool could not keep up."""
+    if isinstance(error, GatewayRateLimitError):
+        return True
+    return isinstance(error, GatewayError) and is_retryable_error(error)
@@ -0,0 +1,52 @@
+"""
+End-to-end call deadlines shared across retries, backoff and token fetches.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+# Absolute time.monotonic() deadline for the current call, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "runrgateway_deadline", default=None
+)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextmanager
+def deadline_scope(timeout_ms: int) -> Iterator[float]:
+    """
+    Apply a deadline `timeout_ms` from now to the enclosed calls.
+
+    A scope nested inside another never extends it; the earlier deadline
+    wins. Yields the seconds remaining.
+    """
+    deadline = time.monotonic() + timeout_ms / 1000
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    reset_token = _deadline.set(deadline)
+    try:
+        yield deadline - time.monotonic()
+    finally:
+        _deadline.reset(reset_token)
+
+
+@contextmanager
+def without_deadline() -> Iterator[None]:
+    """Run the enclosed calls with no deadline, e.g. work shared between callers."""
+    reset_token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(reset_token)
@@ -0,0 +1,294 @@
+"""
+Event-loop lag, connection-pool wait and in-flight request diagnostics.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, ContextManager, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger("runrgateway.diagnostics")
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+# Location of the code that called the client's public entry point; tasks the
+# SDK spawns for that call (coalesced reads, hedges, batch flushes) inherit it
+_entry_call_site: ContextVar[Optional[str]] = ContextVar(
+    "runrgateway_call_site", default=None
+)
+
+
+class DiagnosticsOptions:
+    """Configuration for client diagnostics."""
+
+    def __init__(
+        self,
+        lag_interval_ms: int = 100,
+        summary_interval_ms: Optional[int] = 60000,
+        sample_size: int = 1000,
+        slow_call_sites: int = 5,
+        capture_call_sites: bool = True,
+    ):
+        self.lag_interval_ms = lag_interval_ms
+        self.summary_interval_ms = summary_interval_ms
+        self.sample_size = sample_size
+        self.slow_call_sites = slow_call_sites
+        self.capture_call_sites = capture_call_sites
+
+
+class RequestTiming:
+    """
+    Timing of one HTTP attempt, filled in from httpcore trace events.
+
+    `pool_wait_s` runs from the start of the attempt until a connection
+    starts connecting or sending, `connect_s` covers TCP/TLS setup on a new
+    connection, and `wire_s` runs from sending the request headers until the
+    response body has been read. Transports that emit no trace events (such
+    as mock transports) report the whole attempt as wire time.
+    """
+
+    def __init__(self, call_site: str):
+        self.call_site = call_site
+        self.started = time.perf_counter()
+        self.connect_started: Optional[float] = None
+        self.send_started: Optional[float] = None
+        self.pool_wait_s = 0.0
+        self.connect_s = 0.0
+        self.wire_s = 0.0
+        self.duration_s = 0.0
+
+    async def trace(self, event: str, info: Dict[str, Any]) -> None:
+        """httpcore `trace` extension callback."""
+        now = time.perf_counter()
+        if event.endswith("connect_tcp.started"):
+            self.connect_started = now
+        elif event.endswith("send_request_headers.started") and self.send_started is None:
+            self.send_started = now
+
+    def finish(self) -> None:
+        """Split the attempt into pool wait, connect and wire time."""
+        now = time.perf_counter()
+        self.duration_s = now - self.started
+        if self.send_started is None:
+            self.wire_s = self.duration_s
+            return
+        first_event = self.connect_started or self.send_started
+        self.pool_wait_s = first_event - self.started
+        if self.connect_started is not None:
+            self.connect_s = self.send_started - self.connect_started
+        self.wire_s = now - self.send_started
+
+
+class _CallSiteScope:
+    """
+    Attributes the requests made inside it to one calling code location.
+
+    The location is taken from the first frame outside the SDK when the scope
+    is entered, unless given. An enclosing scope wins, so a public entry point
+    called from another keeps the outer caller.
+    """
+
+    __slots__ = ("_call_site", "_token")
+
+    def __init__(self, call_site: Optional[str] = None):
+        self._call_site = call_site
+        self._token = None
+
+    def __enter__(self) -> None:
+        if _entry_call_site.get() is None:
+            call_site = self._call_site or _call_site(sys._getframe(1))
+            self._token = _entry_call_site.set(call_site)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._token is not None:
+            _entry_call_site.reset(self._token)
+            self._token = None
+
+
+class _CallSiteStats:
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+
+class Diagnostics:
+    """
+    Opt-in diagnostics for GatewayClient.
+
+    Measures event-loop lag with a monitor task that sleeps for
+    `lag_interval_ms` and records how late it wakes up. Tracks in-flight
+    requests, splits each attempt into connection-pool wait, connect and wire
+    time, and aggregates attempt time per calling code location. Read the
+    numbers with `snapshot()`; with `summary_interval_ms` set, a summary is
+    also logged periodically to the `runrgateway.diagnostics` logger.
+
+    Several clients may share one instance; its background tasks run while
+    at least one client using it is open.
+    """
+
+    def __init__(self, options: Optional[DiagnosticsOptions] = None):
+        self.options = options or DiagnosticsOptions()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self._lag: Deque[float] = deque(maxlen=self.options.sample_size)
+        self._pool_wait: Deque[float] = deque(maxlen=self.options.sample_size)
+        self._connect: Deque[float] = deque(maxlen=self.options.sample_size)
+        self._wire: Deque[float] = deque(maxlen=self.options.sample_size)
+        self._max_lag = 0.0
+        self._call_sites: Dict[str, _CallSiteStats] = {}
+        self._owners: Set[int] = set()
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    def start(self, owner: Any) -> None:
+        """Register a client and start the background tasks if needed."""
+        self._owners.add(id(owner))
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        self._tasks = [asyncio.ensure_future(self._monitor_lag())]
+        if self.options.summary_interval_ms:
+            self._tasks.append(asyncio.ensure_future(self._log_summaries()))
+
+    async def stop(self, owner: Any) -> None:
+        """Unregister a client, stopping the background tasks after the last one."""
+        self._owners.discard(id(owner))
+        if not self._owners:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stop the background tasks."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def call_site(self) -> Optional[str]:
+        """The calling code location to attribute requests to, if captured."""
+        if not self.options.capture_call_sites:
+            return None
+        return _entry_call_site.get() or _call_site(sys._getframe(1))
+
+    def call_site_scope(self, call_site: Optional[str] = None) -> ContextManager[None]:
+        """
+        Attribute requests made inside the scope to the code calling the SDK.
+
+        The client enters one in each public entry point, so requests sent
+        from tasks the SDK spawns are still reported against the caller.
+        """
+        if not self.options.capture_call_sites:
+            return nullcontext()
+        return _CallSiteScope(call_site)
+
+    def request_started(self) -> RequestTiming:
+        """Record the start of an HTTP attempt."""
+        self.in_flight += 1
+        self.requests += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        call_site = self.call_site() or ""
+        return RequestTiming(call_site)
+
+    def request_finished(self, timing: RequestTiming) -> None:
+        """Record the end of an HTTP attempt."""
+        self.in_flight -= 1
+        timing.finish()
+        self._pool_wait.append(timing.pool_wait_s)
+        if timing.connect_s:
+            self._connect.append(timing.connect_s)
+        self._wire.append(timing.wire_s)
+
+        if timing.call_site:
+            stats = self._call_sites.get(timing.call_site)
+            if stats is None:
+                stats = self._call_sites[timing.call_site] = _CallSiteStats()
+            stats.count += 1
+            stats.total_s += timing.duration_s
+            stats.max_s = max(stats.max_s, timing.duration_s)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current diagnostics, with durations in milliseconds."""
+        slowest = sorted(
+            self._call_sites.items(), key=lambda item: item[1].max_s, reverse=True
+        )[: self.options.slow_call_sites]
+        return {
+            "loop_lag_ms": {**_summarize(self._lag), "max": self._max_lag * 1000},
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "requests": self.requests,
+            "pool_wait_ms": _summarize(self._pool_wait),
+            "connect_ms": _summarize(self._connect),
+            "wire_ms": _summarize(self._wire),
+            "slowest_call_sites": [
+                {
+                    "call_site": site,
+                    "count": stats.count,
+                    "mean_ms": stats.total_s / stats.count * 1000,
+                    "max_ms": stats.max_s * 1000,
+                }
+                for site, stats in slowest
+            ],
+        }
+
+    def summary(self) -> str:
+        """One-line summary of the current diagnostics."""
+        snap = self.snapshot()
+        lag, pool, wire = snap["loop_lag_ms"], snap["pool_wait_ms"], snap["wire_ms"]
+        line = (
+            f"loop lag p50={lag['p50']:.1f}ms p99={lag['p99']:.1f}ms max={lag['max']:.1f}ms; "
+            f"in flight={snap['in_flight']} (max {snap['max_in_flight']}); "
+            f"pool wait p50={pool['p50']:.1f}ms p99={pool['p99']:.1f}ms; "
+            f"wire p50={wire['p50']:.1f}ms p99={wire['p99']:.1f}ms"
+        )
+        if snap["slowest_call_sites"]:
+            slowest = snap["slowest_call_sites"][0]
+            line += f"; slowest {slowest['call_site']} max={slowest['max_ms']:.1f}ms"
+        return line
+
+    async def _monitor_lag(self) -> None:
+        interval = self.options.lag_interval_ms / 1000
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            self._lag.append(lag)
+            self._max_lag = max(self._max_lag, lag)
+
+    async def _log_summaries(self) -> None:
+        interval = self.options.summary_interval_ms / 1000
+        while True:
+            await asyncio.sleep(interval)
+            logger.info("GatewayClient diagnostics: %s", self.summary())
+
+
+def _call_site(frame: Any) -> str:
+    """First caller frame outside the SDK, as `file:line in function`."""
+    while frame is not None and frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        frame = frame.f_back
+    # Past the SDK frames is the event loop when the call is a task's coroutine
+    if frame is None or frame.f_code.co_filename.startswith(_ASYNCIO_DIR):
+        return "<task>"
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+
+
+def _summarize(samples: Deque[float]) -> Dict[str, float]:
+    """p50/p99 of samples in seconds, returned in milliseconds."""
+    if not samples:
+        return {"p50": 0.0, "p99": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "p50": ordered[int(last * 0.5)] * 1000,
+        "p99": ordered[int(last * 0.99)] * 1000,
+    }
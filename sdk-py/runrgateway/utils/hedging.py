@@ -0,0 +1,157 @@
+"""
+Hedged requests for idempotent reads.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from .retry import RetryBudget
+
+
+class HedgeOptions:
+    """Configuration for request hedging."""
+
+    def __init__(
+        self,
+        delay_ms: Optional[int] = None,
+        percentile: float = 95.0,
+        min_delay_ms: int = 10,
+        max_delay_ms: int = 5000,
+        min_samples: int = 20,
+        sample_size: int = 500,
+        budget_ratio: float = 0.05,
+        min_hedges_per_second: float = 1.0,
+    ):
+        self.delay_ms = delay_ms
+        self.percentile = percentile
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.min_samples = min_samples
+        self.sample_size = sample_size
+        self.budget_ratio = budget_ratio
+        self.min_hedges_per_second = min_hedges_per_second
+
+
+class _LatencyWindow:
+    """Recent latencies for one tool/action, with a cached percentile."""
+
+    def __init__(self, size: int):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self._percentile: Optional[float] = None
+        self._stale = 0
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self._stale += 1
+
+    def percentile(self, pct: float) -> float:
+        # Re-sorting on every call would dominate fast calls; refresh periodically
+        if self._percentile is None or self._stale >= 10:
+            ordered = sorted(self.samples)
+            self._percentile = ordered[int((len(ordered) - 1) * pct / 100)]
+            self._stale = 0
+        return self._percentile
+
+
+class RequestHedger:
+    """
+    Sends a second copy of a slow idempotent request and keeps the first answer.
+
+    If the first request has not finished after the hedge delay, an identical
+    request is sent and whichever succeeds first wins; the other is
+    cancelled. The delay is `delay_ms` when set, otherwise the `percentile`
+    of recently observed latencies for the tool/action (clamped to
+    `min_delay_ms`..`max_delay_ms`); until `min_samples` latencies have been
+    seen, requests are not hedged. Hedges draw from a RetryBudget so they
+    add at most `budget_ratio` extra load.
+    """
+
+    def __init__(self, options: Optional[HedgeOptions] = None):
+        self.options = options or HedgeOptions()
+        self.budget = RetryBudget(
+            ratio=self.options.budget_ratio,
+            min_retries_per_second=self.options.min_hedges_per_second,
+        )
+        self._windows: Dict[str, _LatencyWindow] = {}
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay_s(self, key: str) -> Optional[float]:
+        """Hedge delay for a tool/action key, or None if it should not be hedged yet."""
+        if self.options.delay_ms is not None:
+            return self.options.delay_ms / 1000
+        window = self._windows.get(key)
+        if window is None or len(window.samples) < self.options.min_samples:
+            return None
+        delay = window.percentile(self.options.percentile)
+        return min(
+            max(delay, self.options.min_delay_ms / 1000), self.options.max_delay_ms / 1000
+        )
+
+    def record_latency(self, key: str, latency_s: float) -> None:
+        """Record the latency of a successful call."""
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _LatencyWindow(self.options.sample_size)
+        window.add(latency_s)
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Call `fn`, hedging it with a second call if the first is slow."""
+        self.requests += 1
+        started = time.perf_counter()
+        delay = self.delay_s(key)
+        if delay is None:
+            result = await fn()
+            self.record_latency(key, time.perf_counter() - started)
+            return result
+
+        self.budget.record_request()
+        primary = asyncio.ensure_future(fn())
+        pending: Set["asyncio.Future[Any]"] = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and self.budget.try_acquire_retry():
+                self.hedged += 1
+                pending.add(asyncio.ensure_future(fn()))
+
+            error: Optional[BaseException] = None
+            while True:
+                winner = None
+                for task in done:
+                    task_error = task.exception()
+                    if task_error is None:
+                        winner = winner or task
+                    else:
+                        # Keep waiting on the other copy; report the first error if both fail
+                        error = error or task_error
+                if winner is not None:
+                    if winner is not primary:
+                        self.hedge_wins += 1
+                    self.record_latency(key, time.perf_counter() - started)
+                    return winner.result()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedging counters and current delays per tool/action."""
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_rejected": self.budget.rejected,
+            "delays_ms": {
+                key: delay * 1000
+                for key in self._windows
+                for delay in [self.delay_s(key)]
+                if delay is not None
+            },
+        }
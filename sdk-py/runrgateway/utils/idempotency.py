@@ -6,7 +6,14 @@ import hashlib
 import json
 import time
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, Set
+
+# Actions that only read, so repeating or sharing them is safe
+READ_ACTIONS: Dict[str, Set[str]] = {
+    "serpapi": {"search"},
+    "http_fetch": {"get", "head"},
+    "gmail_send": {"profile"},
+}
 
 
 def generate_idempotency_key() -> str:
@@ -23,3 +30,8 @@ def generate_idempotency_key_from_data(
     data_string = json.dumps({"tool": tool, "action": action, "params": params}, sort_keys=True)
     hash_obj = hashlib.sha256(data_string.encode())
     return f"idemp_{hash_obj.hexdigest()[:16]}"
+
+
+def is_read_action(tool: str, action: str) -> bool:
+    """Check if a tool action only reads data."""
+    return action in READ_ACTIONS.get(tool, ())
@@ -0,0 +1,168 @@
+"""
+Shared job poller with adaptive backoff and batched status lookups.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..errors import GatewayError, GatewayRateLimitError
+from .retry import is_retryable_error
+
+# Fetches job records for many ids at once; ids missing from the result are unknown
+JobFetcher = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+TERMINAL_JOB_STATUSES = ("done", "failed")
+
+
+class JobPollerOptions:
+    """Configuration for job polling."""
+
+    def __init__(
+        self,
+        min_interval: float = 0.1,
+        max_interval: float = 5.0,
+        backoff_factor: float = 1.5,
+        max_batch_size: int = 100,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.max_batch_size = max_batch_size
+
+
+class JobPoller:
+    """
+    Single background poller that resolves one future per watched job.
+
+    Each poll round looks up all outstanding jobs in batches. The interval
+    between rounds backs off while no job changes status and resets as soon as
+    one does, or when a new job is watched.
+    """
+
+    def __init__(self, fetch_jobs: JobFetcher, options: Optional[JobPollerOptions] = None):
+        self._fetch_jobs = fetch_jobs
+        self.options = options or JobPollerOptions()
+        self._futures: Dict[str, "asyncio.Future[Any]"] = {}
+        self._statuses: Dict[str, str] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.polls = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs still being polled."""
+        return len(self._futures)
+
+    def watch(self, job_id: str) -> "asyncio.Future[Any]":
+        """Return a future that resolves with the job once it finishes."""
+        future = self._futures.get(job_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[job_id] = future
+            self._ensure_running()
+            self._wakeup.set()
+        return future
+
+    async def close(self) -> None:
+        """Stop polling and cancel every outstanding future."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._statuses.clear()
+
+    def _ensure_running(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        interval = self.options.min_interval
+        while self._futures:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                # New jobs reset the backoff; the short wait coalesces bursts of watches
+                interval = self.options.min_interval
+                await asyncio.sleep(interval)
+            except asyncio.TimeoutError:
+                pass
+
+            if await self._poll_once():
+                interval = self.options.min_interval
+            else:
+                interval = min(interval * self.options.backoff_factor, self.options.max_interval)
+
+    async def _poll_once(self) -> bool:
+        # Callers may cancel their futures; stop polling those jobs
+        for job_id in [j for j, f in self._futures.items() if f.done()]:
+            self._forget(job_id)
+
+        job_ids = list(self._futures)
+        size = self.options.max_batch_size
+        batches = [job_ids[i:i + size] for i in range(0, len(job_ids), size)]
+        results = await asyncio.gather(
+            *(self._fetch_jobs(batch) for batch in batches), return_exceptions=True
+        )
+
+        progressed = False
+        self.polls += len(batches)
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                # Transient and rate-limit failures just wait for the next round;
+                # anything else fails the batch's jobs
+                if _is_fatal(result):
+                    for job_id in batch:
+                        self._resolve(job_id, error=result)
+                    progressed = True
+                continue
+
+            for job_id in batch:
+                job = result.get(job_id)
+                if job is None:
+                    self._resolve(
+                        job_id, error=GatewayError(f"Job not found: {job_id}", 404)
+                    )
+                    progressed = True
+                    continue
+
+                if self._statuses.get(job_id) != job.status:
+                    self._statuses[job_id] = job.status
+                    progressed = True
+                if job.status in TERMINAL_JOB_STATUSES:
+                    self._resolve(job_id, job=job)
+
+        return progressed
+
+    def _resolve(
+        self, job_id: str, job: Any = None, error: Optional[Exception] = None
+    ) -> None:
+        future = self._futures.get(job_id)
+        if future is not None and not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(job)
+        self._forget(job_id)
+
+    def _forget(self, job_id: str) -> None:
+        self._futures.pop(job_id, None)
+        self._statuses.pop(job_id, None)
+
+
+def _is_fatal(error: BaseException) -> bool:
+    """Whether a lookup failure should fail the jobs instead of being retried."""
+    if not isinstance(error, GatewayError):
+        # A malformed response or a bug fails the same way every round;
+        # cancellation is not a lookup failure
+        return isinstance(error, Exception)
+    if isinstance(error, GatewayRateLimitError):
+        return False
+    return not is_retryable_error(error)
@@ -0,0 +1,349 @@
+"""
+Per-request metrics and OpenMetrics text export.
+"""
+
+import math
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+TOKEN_ENDPOINT = "/api/generate-token"
+BATCH_TOKEN_ENDPOINT = "/api/generate-tokens"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_JOB_PATH = re.compile(r"^/api/jobs/[^/]+$")
+
+
+class RequestMetrics:
+    """
+    Measurements for one logical request, including its retries.
+
+    `duration_s` is the time spent in the SDK from the first attempt to the
+    final outcome, backoff sleeps included. `network_s` is the sum of the HTTP
+    round trips, so `duration_s - network_s` is client-side overhead.
+    `queue_s` is the time spent waiting for the client-side rate limiter
+    before the request started.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        method: str,
+        tool: str = "",
+        action: str = "",
+        outcome: str = "success",
+        status_code: Optional[int] = None,
+        duration_s: float = 0.0,
+        network_s: float = 0.0,
+        queue_s: float = 0.0,
+        attempt_statuses: Optional[List[int]] = None,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+    ):
+        self.endpoint = endpoint
+        self.method = method
+        self.tool = tool
+        self.action = action
+        self.outcome = outcome
+        self.status_code = status_code
+        self.duration_s = duration_s
+        self.network_s = network_s
+        self.queue_s = queue_s
+        # One entry per attempt; 0 for attempts that got no HTTP response
+        self.attempt_statuses = attempt_statuses if attempt_statuses is not None else []
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+
+    def set_error(self, error: Exception) -> None:
+        """Record the error a request finally failed with."""
+        self.status_code = getattr(error, "status_code", None)
+        self.outcome = outcome_for_status(self.status_code, getattr(error, "code", None))
+
+    @property
+    def attempts(self) -> int:
+        """Number of HTTP attempts made."""
+        return len(self.attempt_statuses)
+
+    @property
+    def retries(self) -> int:
+        """Number of attempts after the first."""
+        return max(0, self.attempts - 1)
+
+
+MetricsHook = Callable[[RequestMetrics], None]
+
+
+def endpoint_label(path: str) -> str:
+    """Endpoint label for a request path, with IDs collapsed to keep cardinality low."""
+    path = path.split("?", 1)[0]
+    if _JOB_PATH.match(path):
+        return "/api/jobs/:job_id"
+    return path
+
+
+def outcome_for_status(status_code: Optional[int], code: Optional[str] = None) -> str:
+    """Classify a request outcome from its final status code or error code."""
+    if code == "CIRCUIT_OPEN":
+        return "circuit_open"
+    if code == "DEADLINE_EXCEEDED":
+        return "deadline_exceeded"
+    if status_code is None or status_code == 0:
+        return "network_error"
+    if status_code == 429:
+        return "rate_limited"
+    if status_code >= 500:
+        return "server_error"
+    if status_code >= 400:
+        return "client_error"
+    return "success"
+
+
+class _Histogram:
+    """Cumulative histogram with fixed upper bounds."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def merge(self, other: "_Histogram") -> None:
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.count += other.count
+        self.sum += other.sum
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+
+
+LabelValues = Tuple[str, ...]
+
+
+class _Family:
+    """One metric family with samples keyed by label values."""
+
+    def __init__(
+        self, name: str, kind: str, help_text: str, labels: Sequence[str], unit: str = ""
+    ):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.unit = unit
+        self.samples: Dict[LabelValues, object] = {}
+
+
+class MetricsCollector:
+    """
+    Aggregates RequestMetrics into counters and histograms.
+
+    Pass one to `GatewayClient(metrics=...)`; several clients may share a
+    collector. Hooks added with `add_hook` receive every RequestMetrics as it
+    is recorded, for forwarding to another metrics system. `to_openmetrics`
+    renders the aggregates in the OpenMetrics text format.
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        hooks: Optional[List[MetricsHook]] = None,
+        prefix: str = "runrgateway",
+    ):
+        self.buckets = tuple(sorted(buckets))
+        self.hooks: List[MetricsHook] = list(hooks or [])
+        self.prefix = prefix
+        self._families: List[_Family] = []
+        request_labels = ("endpoint", "tool", "action")
+        self._requests = self._family(
+            "requests", "counter", "Logical requests by final outcome.",
+            request_labels + ("outcome",),
+        )
+        self._responses = self._family(
+            "responses", "counter",
+            "HTTP responses per attempt by status code (0 means no response).",
+            request_labels + ("status",),
+        )
+        self._retries = self._family(
+            "retries", "counter", "Attempts after the first.", request_labels
+        )
+        self._bytes_sent = self._family(
+            "sent_bytes", "counter", "Request body bytes sent on the wire, retries included.",
+            request_labels, unit="bytes",
+        )
+        self._bytes_received = self._family(
+            "received_bytes", "counter",
+            "Response body bytes received on the wire, retries included.",
+            request_labels, unit="bytes",
+        )
+        self._duration = self._family(
+            "request_duration_seconds", "histogram",
+            "Time in the SDK per logical request, retries and backoff included.",
+            request_labels + ("outcome",), unit="seconds",
+        )
+        self._network = self._family(
+            "request_network_seconds", "histogram",
+            "Sum of HTTP round trips per logical request.",
+            request_labels, unit="seconds",
+        )
+        self._queue = self._family(
+            "queue_wait_seconds", "histogram",
+            "Time waiting for the client-side rate limiter.",
+            ("tool",), unit="seconds",
+        )
+        self._token_issue = self._family(
+            "token_issue_seconds", "histogram",
+            "Latency of token issuance requests, single and batched.",
+            ("endpoint", "outcome"), unit="seconds",
+        )
+
+    def _family(
+        self, name: str, kind: str, help_text: str, labels: Sequence[str], unit: str = ""
+    ) -> _Family:
+        family = _Family(f"{self.prefix}_{name}", kind, help_text, labels, unit)
+        self._families.append(family)
+        return family
+
+    def start_request(
+        self, path: str, method: str, tool: str = "", action: str = "", queue_s: float = 0.0
+    ) -> RequestMetrics:
+        """Begin measuring a request to `path`."""
+        return RequestMetrics(
+            endpoint_label(path), method, tool=tool, action=action, queue_s=queue_s
+        )
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        """Call `hook` with every recorded RequestMetrics."""
+        self.hooks.append(hook)
+
+    def record(self, metrics: RequestMetrics) -> None:
+        """Aggregate one request and pass it to the hooks."""
+        labels = (metrics.endpoint, metrics.tool, metrics.action)
+        self._inc(self._requests, labels + (metrics.outcome,))
+        for status in metrics.attempt_statuses:
+            self._inc(self._responses, labels + (str(status),))
+        if metrics.retries:
+            self._inc(self._retries, labels, metrics.retries)
+        self._inc(self._bytes_sent, labels, metrics.bytes_sent)
+        self._inc(self._bytes_received, labels, metrics.bytes_received)
+        self._observe(self._duration, labels + (metrics.outcome,), metrics.duration_s)
+        if metrics.attempts:
+            self._observe(self._network, labels, metrics.network_s)
+        if metrics.tool and metrics.endpoint == "/api/proxy-request":
+            self._observe(self._queue, (metrics.tool,), metrics.queue_s)
+        if metrics.endpoint in (TOKEN_ENDPOINT, BATCH_TOKEN_ENDPOINT):
+            self._observe(
+                self._token_issue, (metrics.endpoint, metrics.outcome), metrics.duration_s
+            )
+
+        for hook in self.hooks:
+            hook(metrics)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Current value of a counter sample, e.g. `counter("retries", tool="serpapi")`."""
+        family = self._get(name)
+        return float(family.samples.get(self._key(family, labels), 0))
+
+    def histogram(self, name: str, **labels: str) -> Dict[str, float]:
+        """Count and sum of a histogram sample."""
+        family = self._get(name)
+        hist = family.samples.get(self._key(family, labels))
+        if hist is None:
+            return {"count": 0, "sum": 0.0}
+        return {"count": hist.count, "sum": hist.sum}
+
+    def merge(self, other: "MetricsCollector") -> None:
+        """
+        Add the samples of another collector, e.g. one from a worker process.
+
+        Both collectors need the same buckets and prefix. Hooks are not called
+        for merged samples.
+        """
+        if other.buckets != self.buckets or other.prefix != self.prefix:
+            raise ValueError("Cannot merge collectors with different buckets or prefix")
+        for family, theirs in zip(self._families, other._families):
+            for labels, sample in theirs.samples.items():
+                if family.kind == "counter":
+                    self._inc(family, labels, sample)
+                    continue
+                hist = family.samples.get(labels)
+                if hist is None:
+                    hist = _Histogram(self.buckets)
+                    family.samples[labels] = hist
+                hist.merge(sample)
+
+    def reset(self) -> None:
+        """Drop every recorded sample."""
+        for family in self._families:
+            family.samples.clear()
+
+    def to_openmetrics(self) -> str:
+        """Render every metric in the OpenMetrics text exposition format."""
+        lines: List[str] = []
+        for family in self._families:
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            if family.unit:
+                lines.append(f"# UNIT {family.name} {family.unit}")
+            lines.append(f"# HELP {family.name} {_escape(family.help)}")
+            for values, sample in sorted(family.samples.items()):
+                label_pairs = list(zip(family.labels, values))
+                if family.kind == "counter":
+                    lines.append(
+                        f"{family.name}_total{_format_labels(label_pairs)} {_format_value(sample)}"
+                    )
+                    continue
+                for bound, count in zip(sample.buckets, sample.counts):
+                    bucket_labels = _format_labels(label_pairs + [("le", _format_value(bound))])
+                    lines.append(f"{family.name}_bucket{bucket_labels} {count}")
+                inf_labels = _format_labels(label_pairs + [("le", "+Inf")])
+                lines.append(f"{family.name}_bucket{inf_labels} {sample.count}")
+                lines.append(f"{family.name}_count{_format_labels(label_pairs)} {sample.count}")
+                lines.append(
+                    f"{family.name}_sum{_format_labels(label_pairs)} {_format_value(sample.sum)}"
+                )
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _get(self, name: str) -> _Family:
+        full_name = f"{self.prefix}_{name}"
+        for family in self._families:
+            if family.name == full_name:
+                return family
+        raise KeyError(name)
+
+    def _key(self, family: _Family, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in family.labels)
+
+    def _inc(self, family: _Family, labels: LabelValues, amount: float = 1) -> None:
+        family.samples[labels] = family.samples.get(labels, 0) + amount
+
+    def _observe(self, family: _Family, labels: LabelValues, value: float) -> None:
+        hist = family.samples.get(labels)
+        if hist is None:
+            hist = _Histogram(self.buckets)
+            family.samples[labels] = hist
+        hist.observe(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
@@ -0,0 +1,389 @@
+"""
+Durable local outbox for async proxy requests.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..errors import GatewayError, GatewayRateLimitError
+from .idempotency import generate_idempotency_key
+from .retry import is_retryable_error
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+
+class OutboxEntry:
+    """One queued async proxy request."""
+
+    def __init__(
+        self,
+        idempotency_key: str,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        status: str = PENDING,
+        attempts: int = 0,
+        job_id: Optional[str] = None,
+        last_error: Optional[str] = None,
+        created_at: float = 0.0,
+        intent: str = "",
+    ):
+        self.idempotency_key = idempotency_key
+        self.tool = tool
+        self.action = action
+        self.params = params
+        self.status = status
+        self.attempts = attempts
+        self.job_id = job_id
+        self.last_error = last_error
+        self.created_at = created_at
+        # Intent in effect when the entry was queued
+        self.intent = intent
+
+
+class OutboxOptions:
+    """Configuration for the outbox and its flusher."""
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        concurrency: int = 5,
+        flush_interval_ms: int = 1000,
+        retry_base_ms: int = 1000,
+        retry_max_ms: int = 60000,
+        max_attempts: Optional[int] = None,
+        lease_ms: int = 30000,
+        retention_ms: int = 24 * 60 * 60 * 1000,
+    ):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.flush_interval_ms = flush_interval_ms
+        self.retry_base_ms = retry_base_ms
+        self.retry_max_ms = retry_max_ms
+        self.max_attempts = max_attempts
+        self.lease_ms = lease_ms
+        self.retention_ms = retention_ms
+
+
+class Outbox:
+    """
+    SQLite spool of async proxy requests waiting to reach the Gateway.
+
+    `put` commits the entry before returning, so queued work survives a crash
+    of the agent process (WAL mode with synchronous=NORMAL; a power loss may
+    drop the latest entries). Entries are keyed by idempotency key and a key
+    that is already queued or sent is ignored. Senders claim entries with a
+    lease, so several processes can share one file and an entry claimed by a
+    process that died is retried once its lease expires. Delivery is
+    at-least-once; the key is sent with the request, so the Gateway turns a
+    redelivery into a lookup of the job it already created.
+
+    Methods block on SQLite (for up to the 5s busy timeout while another
+    process holds the write lock); OutboxFlusher calls them in a worker thread.
+    """
+
+    def __init__(self, path: str, options: Optional[OutboxOptions] = None):
+        self.path = path
+        self.options = options or OutboxOptions()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "idempotency_key TEXT PRIMARY KEY, tool TEXT NOT NULL, action TEXT NOT NULL, "
+            "params TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+            "next_attempt_at REAL NOT NULL, job_id TEXT, last_error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, intent TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)"
+        )
+
+    def put(
+        self,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        intent: str = "",
+    ) -> str:
+        """Queue a request, to be sent under `intent`, and return its idempotency key."""
+        key = idempotency_key or generate_idempotency_key()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, tool, action, params, status, "
+                "attempts, next_attempt_at, created_at, updated_at, intent) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?)",
+                (key, tool, action, json.dumps(params), PENDING, now, now, now, intent),
+            )
+        return key
+
+    def get(self, idempotency_key: str) -> Optional[OutboxEntry]:
+        """Look up an entry by idempotency key."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT idempotency_key, tool, action, params, status, attempts, job_id, "
+                "last_error, created_at, intent FROM outbox WHERE idempotency_key = ?",
+                (idempotency_key,),
+            ).fetchone()
+        return _entry(row) if row is not None else None
+
+    def claim(self, limit: int) -> List[OutboxEntry]:
+        """Lease up to `limit` due entries for sending."""
+        now = time.time()
+        lease_until = now + self.options.lease_ms / 1000
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT idempotency_key, tool, action, params, status, attempts, job_id, "
+                    "last_error, created_at, intent FROM outbox "
+                    "WHERE status IN (?, ?) AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (PENDING, SENDING, now, limit),
+                ).fetchall()
+                # While sending, next_attempt_at holds the lease expiry
+                self._conn.executemany(
+                    "UPDATE outbox SET status = ?, next_attempt_at = ?, updated_at = ? "
+                    "WHERE idempotency_key = ?",
+                    [(SENDING, lease_until, now, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [_entry(row) for row in rows]
+
+    def mark_sent(self, idempotency_key: str, job_id: str) -> None:
+        """Record that the Gateway accepted an entry."""
+        self._update(idempotency_key, SENT, job_id=job_id)
+
+    def mark_failed(
+        self, idempotency_key: str, error: str, retry_after_s: Optional[float] = None
+    ) -> None:
+        """Record a failed send; retry after `retry_after_s`, or give up if None."""
+        if retry_after_s is None:
+            self._update(idempotency_key, DEAD, last_error=error, attempted=True)
+        else:
+            self._update(
+                idempotency_key,
+                PENDING,
+                last_error=error,
+                attempted=True,
+                next_attempt_at=time.time() + retry_after_s,
+            )
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next entry is due (0 if one is due now), or None if idle."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status IN (?, ?)",
+                (PENDING, SENDING),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def purge(self) -> int:
+        """Delete sent and dead entries older than `retention_ms`; return how many."""
+        cutoff = time.time() - self.options.retention_ms / 1000
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE status IN (?, ?) AND updated_at <= ?",
+                (SENT, DEAD, cutoff),
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Number of entries per status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+            ).fetchall()
+        counts = {PENDING: 0, SENDING: 0, SENT: 0, DEAD: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _update(
+        self,
+        idempotency_key: str,
+        status: str,
+        job_id: Optional[str] = None,
+        last_error: Optional[str] = None,
+        attempted: bool = False,
+        next_attempt_at: float = 0.0,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, job_id = COALESCE(?, job_id), last_error = ?, "
+                "attempts = attempts + ?, next_attempt_at = ?, updated_at = ? "
+                "WHERE idempotency_key = ?",
+                (
+                    status,
+                    job_id,
+                    last_error,
+                    1 if attempted else 0,
+                    next_attempt_at,
+                    time.time(),
+                    idempotency_key,
+                ),
+            )
+
+
+# Submits one entry to the Gateway and returns its job id
+OutboxSender = Callable[[OutboxEntry], Awaitable[str]]
+
+
+class OutboxFlusher:
+    """
+    Background task that drains an Outbox through the Gateway.
+
+    Outbox reads and writes run in a worker thread, so a database locked by
+    another process does not stall the event loop.
+
+    Each round claims up to `batch_size` due entries and sends them with at
+    most `concurrency` in flight. Retryable failures (network, 5xx, 429,
+    open circuit) are rescheduled with exponential backoff, honouring
+    Retry-After; other failures, or running out of `max_attempts`, mark the
+    entry dead. Between rounds the flusher sleeps until the next entry is due,
+    or `flush_interval_ms` at most, and wakes early when an entry is added.
+    """
+
+    def __init__(self, outbox: Outbox, send: OutboxSender):
+        self.outbox = outbox
+        self.options = outbox.options
+        self._send = send
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.sent = 0
+        self.failed = 0
+
+    def notify(self) -> None:
+        """
+        Start the flusher if needed and wake it to send new entries.
+
+        Outside a running event loop this does nothing; the entries wait in
+        the outbox until the next `flush()` or `notify()` inside a loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.start()
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the background task in the running loop if it is not running there."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # A task left behind by a loop that has since closed never finishes
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def flush(self) -> int:
+        """Send every entry that is due now and return how many were sent."""
+        sent = 0
+        while True:
+            entries = await asyncio.to_thread(self.outbox.claim, self.options.batch_size)
+            if entries:
+                sent += await self._send_batch(entries)
+            if len(entries) < self.options.batch_size:
+                return sent
+
+    async def close(self) -> None:
+        """Stop the background task; unsent entries stay in the outbox."""
+        if self._task is not None:
+            # A task of an earlier, closed loop cannot be awaited here
+            if self._task.get_loop() is asyncio.get_running_loop():
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    pass
+            self._task = None
+
+    async def _run(self) -> None:
+        max_wait = self.options.flush_interval_ms / 1000
+        while True:
+            await self.flush()
+            await asyncio.to_thread(self.outbox.purge)
+
+            due_in = await asyncio.to_thread(self.outbox.next_due_in)
+            wait = max_wait if due_in is None else min(max(due_in, 0.01), max_wait)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send_batch(self, entries: List[OutboxEntry]) -> int:
+        semaphore = asyncio.Semaphore(self.options.concurrency)
+
+        async def _deliver(entry: OutboxEntry) -> bool:
+            async with semaphore:
+                try:
+                    job_id = await self._send(entry)
+                except Exception as error:
+                    self.failed += 1
+                    await asyncio.to_thread(
+                        self.outbox.mark_failed,
+                        entry.idempotency_key,
+                        str(error),
+                        self._retry_after(entry, error),
+                    )
+                    return False
+                await asyncio.to_thread(self.outbox.mark_sent, entry.idempotency_key, job_id)
+                self.sent += 1
+                return True
+
+        results = await asyncio.gather(*(_deliver(entry) for entry in entries))
+        return sum(results)
+
+    def _retry_after(self, entry: OutboxEntry, error: Exception) -> Optional[float]:
+        """Seconds to wait before retrying an entry, or None to give up on it."""
+        if isinstance(error, GatewayError) and not (
+            is_retryable_error(error)
+            or isinstance(error, GatewayRateLimitError)
+            or error.code in ("CIRCUIT_OPEN", "DEADLINE_EXCEEDED")
+        ):
+            return None
+        attempts = entry.attempts + 1
+        if self.options.max_attempts is not None and attempts >= self.options.max_attempts:
+            return None
+        delay = min(
+            self.options.retry_base_ms * (2 ** (attempts - 1)), self.options.retry_max_ms
+        ) / 1000
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, float(retry_after))
+        return delay
+
+
+def _entry(row: Any) -> OutboxEntry:
+    return OutboxEntry(
+        idempotency_key=row[0],
+        tool=row[1],
+        action=row[2],
+        params=json.loads(row[3]),
+        status=row[4],
+        attempts=row[5],
+        job_id=row[6],
+        last_error=row[7],
+        created_at=row[8],
+        intent=row[9],
+    )
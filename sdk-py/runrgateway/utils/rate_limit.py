@@ -0,0 +1,136 @@
+"""
+Client-side per-tool rate limiting with adaptive token buckets.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class RateLimitOptions:
+    """Configuration for a per-tool token bucket."""
+
+    def __init__(
+        self,
+        rate_per_second: float = 10.0,
+        burst: int = 10,
+        min_rate_per_second: float = 0.1,
+        decrease_factor: float = 0.5,
+        increase_per_success: float = 0.1,
+        default_retry_after_ms: int = 1000,
+        max_rate_limit_retries: int = 3,
+        decrease_cooldown_ms: int = 1000,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.min_rate_per_second = min_rate_per_second
+        self.decrease_factor = decrease_factor
+        self.increase_per_success = increase_per_success
+        self.default_retry_after_ms = default_retry_after_ms
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.decrease_cooldown_ms = decrease_cooldown_ms
+
+
+class TokenBucket:
+    """
+    Token bucket that paces callers in FIFO order.
+
+    The fill rate adapts AIMD-style: it is cut multiplicatively when the
+    Gateway answers 429 and recovers additively on success, never exceeding
+    the configured rate. A burst of 429s from calls that were already in
+    flight cuts the rate only once per `decrease_cooldown_ms`.
+    """
+
+    def __init__(self, options: RateLimitOptions):
+        self.options = options
+        self.rate = options.rate_per_second
+        self._tokens = float(options.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+
+    async def acquire(self) -> None:
+        """Wait until a call may be sent."""
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self._blocked_until:
+                        await asyncio.sleep(self._blocked_until - now)
+                        continue
+
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def on_success(self) -> None:
+        """Record a call the Gateway accepted."""
+        self.rate = min(
+            self.options.rate_per_second, self.rate + self.options.increase_per_success
+        )
+
+    def on_rate_limited(self, retry_after_s: Optional[float] = None) -> None:
+        """Record a 429 and hold every caller until the Retry-After window passes."""
+        if retry_after_s is None:
+            retry_after_s = self.options.default_retry_after_ms / 1000
+        now = time.monotonic()
+        self._refill(now)
+        self._blocked_until = max(self._blocked_until, now + retry_after_s)
+        self._tokens = 0.0
+        if now - self._last_decrease >= self.options.decrease_cooldown_ms / 1000:
+            self._last_decrease = now
+            self.rate = max(
+                self.options.min_rate_per_second, self.rate * self.options.decrease_factor
+            )
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(float(self.options.burst), self._tokens + elapsed * self.rate)
+
+
+class RateLimiter:
+    """Token buckets keyed by tool, created on first use."""
+
+    def __init__(
+        self,
+        options: Optional[RateLimitOptions] = None,
+        tools: Optional[Dict[str, RateLimitOptions]] = None,
+    ):
+        self.options = options or RateLimitOptions()
+        self.tool_options = tools or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, tool: str) -> TokenBucket:
+        """Get the bucket for a tool."""
+        bucket = self._buckets.get(tool)
+        if bucket is None:
+            bucket = TokenBucket(self.tool_options.get(tool, self.options))
+            self._buckets[tool] = bucket
+        return bucket
+
+    async def acquire(self, tool: str) -> None:
+        """Wait until a call to the tool may be sent."""
+        await self.bucket(tool).acquire()
+
+    def on_success(self, tool: str) -> None:
+        """Record a call to the tool the Gateway accepted."""
+        self.bucket(tool).on_success()
+
+    def on_rate_limited(self, tool: str, retry_after_s: Optional[float] = None) -> None:
+        """Record a 429 for the tool."""
+        self.bucket(tool).on_rate_limited(retry_after_s)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Current rate and queue depth per tool."""
+        return {
+            tool: {"rate_per_second": bucket.rate, "waiting": bucket.waiting}
+            for tool, bucket in self._buckets.items()
+        }
@@ -0,0 +1,194 @@
+"""
+TTL/LRU cache for idempotent read responses.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .idempotency import READ_ACTIONS, generate_idempotency_key_from_data
+
+_MISSING = object()
+
+
+class DiskCacheBackend:
+    """
+    SQLite-backed cache storage shared between processes.
+
+    Values must be JSON-serializable. Writes use WAL mode so concurrent agent
+    processes can read while one of them writes. Every `max_entries // 10`
+    writes (at least one), expired entries are deleted and the table is cut
+    back to `max_entries`, dropping the entries closest to expiry first.
+
+    Calls block on disk I/O; ResponseCache runs them in a worker thread.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._purge_every = max(1, max_entries // 10)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)"
+        )
+
+    def get(self, key: str) -> Tuple[Any, float]:
+        """Return (value, expires_at), or (_MISSING, 0) if absent or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return _MISSING, 0.0
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        """Store a value until `expires_at` (epoch seconds)."""
+        try:
+            encoded = json.dumps(value)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, encoded, expires_at),
+            )
+            self._writes += 1
+            if self._writes >= self._purge_every:
+                self._writes = 0
+                self._purge()
+
+    def purge_expired(self) -> None:
+        """Delete expired entries and trim the table to `max_entries`."""
+        with self._lock:
+            self._purge()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _purge(self) -> None:
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of proxy results with per-tool TTLs.
+
+    Entries are keyed by agent, explicit agent token and intent, and by the
+    canonical request hash from `generate_idempotency_key_from_data`, so
+    callers never see results fetched with other credentials or under another
+    intent. Only actions listed in
+    `cacheable_actions` for a tool with a non-zero TTL are cached. Cached
+    results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        default_ttl_ms: int = 60000,
+        tool_ttls_ms: Optional[Dict[str, int]] = None,
+        cacheable_actions: Optional[Dict[str, Set[str]]] = None,
+        backend: Optional[DiskCacheBackend] = None,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl_ms = default_ttl_ms
+        self.tool_ttls_ms = tool_ttls_ms or {}
+        self.cacheable_actions = (
+            cacheable_actions if cacheable_actions is not None else READ_ACTIONS
+        )
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_ms(self, tool: str, action: str) -> int:
+        """TTL for a tool/action, or 0 if it is not cacheable."""
+        if action not in self.cacheable_actions.get(tool, ()):
+            return 0
+        return self.tool_ttls_ms.get(tool, self.default_ttl_ms)
+
+    def make_key(
+        self,
+        agent_id: str,
+        tool: str,
+        action: str,
+        params: Dict[str, Any],
+        agent_token: Optional[str] = None,
+        intent: Optional[str] = None,
+    ) -> str:
+        """Cache key for a request, made with the client's tokens unless `agent_token` is given."""
+        token_hash = (
+            hashlib.sha256(agent_token.encode("utf-8")).hexdigest()[:32] if agent_token else ""
+        )
+        request_key = generate_idempotency_key_from_data(tool, action, params)
+        return f"{agent_id}:{token_hash}:{intent or ''}:{request_key}"
+
+    async def get(self, key: str) -> Any:
+        """Return the cached value, or raise KeyError on a miss."""
+        entry = self._entries.get(key)
+        now = time.time()
+
+        if entry is not None:
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            del self._entries[key]
+
+        if self.backend is not None:
+            value, expires_at = await asyncio.to_thread(self.backend.get, key)
+            if value is not _MISSING:
+                self._store(key, value, expires_at)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        raise KeyError(key)
+
+    async def set(self, key: str, value: Any, ttl_ms: int) -> None:
+        """Cache a value for `ttl_ms` milliseconds."""
+        expires_at = time.time() + ttl_ms / 1000
+        self._store(key, value, expires_at)
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.set, key, value, expires_at)
+
+    def clear(self) -> None:
+        """Drop every in-memory entry."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def _store(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
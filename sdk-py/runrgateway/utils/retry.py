@@ -5,9 +5,15 @@ Retry utilities with exponential backoff.
 import asyncio
 import random
 import time
-from typing import Any, Callable, Optional, TypeVar
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 
-from ..errors import GatewayError, GatewayRateLimitError, GatewayUpstreamError
+from ..errors import (
+    GatewayCircuitOpenError,
+    GatewayError,
+    GatewayRateLimitError,
+    GatewayUpstreamError,
+)
+from . import deadline
 
 T = TypeVar('T')
 
@@ -61,35 +67,225 @@ def calculate_delay(attempt: int, options: RetryOptions) -> float:
     return delay
 
 
+class CircuitBreaker:
+    """
+    Circuit breaker for a single tool or endpoint.
+
+    Opens after `failure_threshold` consecutive retryable failures. While open,
+    calls fail immediately with GatewayCircuitOpenError. After
+    `reset_timeout_ms` the breaker lets `half_open_max_calls` trial calls
+    through; a success closes it and a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str = "",
+        failure_threshold: int = 5,
+        reset_timeout_ms: int = 30000,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_ms = reset_timeout_ms
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+    def before_call(self) -> None:
+        """Raise GatewayCircuitOpenError if the call must not be sent."""
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.reset_timeout_ms / 1000 - time.monotonic()
+            if remaining > 0:
+                raise GatewayCircuitOpenError(
+                    f"Circuit breaker open for {self.name}", retry_after=remaining
+                )
+            self.state = self.HALF_OPEN
+            self._half_open_calls = 0
+
+        if self.state == self.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                raise GatewayCircuitOpenError(
+                    f"Circuit breaker half-open for {self.name}, trial call in progress"
+                )
+            self._half_open_calls += 1
+
+    def on_success(self) -> None:
+        """Record a call that reached a healthy service."""
+        self.state = self.CLOSED
+        self.failures = 0
+        self._half_open_calls = 0
+
+    def on_failure(self) -> None:
+        """Record a retryable failure."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._half_open_calls = 0
+
+    def on_cancelled(self) -> None:
+        """Release a trial slot taken by a call that was cancelled."""
+        if self.state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+
+class CircuitBreakers:
+    """Circuit breakers keyed by tool or endpoint, created on first use."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout_ms: int = 30000,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_ms = reset_timeout_ms
+        self.half_open_max_calls = half_open_max_calls
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        """Get the breaker for a key."""
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                key,
+                self.failure_threshold,
+                self.reset_timeout_ms,
+                self.half_open_max_calls,
+            )
+            self._breakers[key] = breaker
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        """Current state of every breaker."""
+        return {key: breaker.state for key, breaker in self._breakers.items()}
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent requests.
+
+    Over a sliding window of `window_s` seconds, retries are allowed while
+    they stay below `ratio` times the number of requests, plus a floor of
+    `min_retries_per_second` so low-traffic clients can still retry.
+    Share one budget between clients to cap retries process-wide.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_retries_per_second: float = 1.0,
+        window_s: int = 10,
+    ):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.window_s = window_s
+        # One [second, requests, retries] slot per second of the window
+        self._slots: List[List[int]] = [[0, 0, 0] for _ in range(window_s)]
+        self.rejected = 0
+
+    def record_request(self) -> None:
+        """Count an original (non-retry) request."""
+        self._slot()[1] += 1
+
+    def try_acquire_retry(self) -> bool:
+        """Consume a retry from the budget, or return False if it is spent."""
+        requests, retries = self._totals()
+        allowed = self.ratio * requests + self.min_retries_per_second * self.window_s
+        if retries >= allowed:
+            self.rejected += 1
+            return False
+        self._slot()[2] += 1
+        return True
+
+    def _slot(self) -> List[int]:
+        second = int(time.monotonic())
+        slot = self._slots[second % self.window_s]
+        if slot[0] != second:
+            slot[0], slot[1], slot[2] = second, 0, 0
+        return slot
+
+    def _totals(self) -> Tuple[int, int]:
+        oldest = int(time.monotonic()) - self.window_s
+        requests = retries = 0
+        for second, slot_requests, slot_retries in self._slots:
+            if second > oldest:
+                requests += slot_requests
+                retries += slot_retries
+        return requests, retries
+
+
 async def with_retry(
     fn: Callable[[], Any],
     options: Optional[RetryOptions] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    budget: Optional[RetryBudget] = None,
 ) -> T:
-    """Retry a function with exponential backoff."""
+    """
+    Retry a function with exponential backoff.
+
+    With a circuit breaker, every attempt is checked against it and raises
+    GatewayCircuitOpenError without calling `fn` while it is open. With a retry
+    budget, retries stop once the budget is spent. Inside a deadline scope, a
+    retry whose backoff would outlast the deadline is not attempted.
+    """
     if options is None:
         options = RetryOptions()
 
+    if budget is not None:
+        budget.record_request()
+
     last_error: Exception
 
     for attempt in range(options.max_retries + 1):
+        if breaker is not None:
+            breaker.before_call()
+
         try:
             result = fn()
             if asyncio.iscoroutine(result):
-                return await result
-            return result
+                result = await result
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.on_cancelled()
+            raise
         except Exception as error:
             last_error = error
+            retryable = not isinstance(error, GatewayError) or is_retryable_error(error)
+
+            if breaker is not None:
+                # Non-retryable errors (4xx, 429) still mean the service answered
+                if retryable:
+                    breaker.on_failure()
+                else:
+                    breaker.on_success()
 
             # Don't retry on last attempt
             if attempt == options.max_retries:
                 raise error
 
             # Check if error is retryable
-            if isinstance(error, GatewayError) and not is_retryable_error(error):
+            if not retryable:
+                raise error
+
+            if budget is not None and not budget.try_acquire_retry():
                 raise error
 
-            # Calculate delay and wait
+            # Calculate delay and wait, unless the call's deadline would pass first
             delay = calculate_delay(attempt, options)
+            remaining = deadline.remaining()
+            if remaining is not None and delay >= remaining:
+                raise error
             await asyncio.sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.on_success()
+            return result
 
     raise last_error
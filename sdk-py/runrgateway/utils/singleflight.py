@@ -0,0 +1,49 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same result or error. Nothing is kept once the call
+    finishes, so this only collapses bursts and never serves stale data.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently in flight."""
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn`, or join the call already in flight for `key`."""
+        future = self._calls.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._on_done(key, f))
+        else:
+            self.shared += 1
+        # A cancelled caller must not cancel the call for everyone else
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, int]:
+        """Call and sharing counters."""
+        return {"calls": self.calls, "shared": self.shared, "in_flight": self.in_flight}
+
+    def _on_done(self, key: str, future: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()
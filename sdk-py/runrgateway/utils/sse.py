@@ -0,0 +1,104 @@
+"""
+Incremental Server-Sent Events parsing.
+"""
+
+import json
+from typing import Any, AsyncIterator, List, Optional
+
+from pydantic import BaseModel
+
+from ..errors import GatewayError
+
+
+class StreamEvent(BaseModel):
+    """A message received on an SSE stream."""
+
+    event: str = "message"
+    data: Any = None
+    id: Optional[str] = None
+
+
+class StreamConnected(StreamEvent):
+    """The Gateway accepted the stream."""
+
+    event: str = "connected"
+
+
+class StreamEnd(StreamEvent):
+    """The Gateway closed the stream normally."""
+
+    event: str = "end"
+
+
+class StreamError(StreamEvent):
+    """The Gateway reported an error and closed the stream."""
+
+    event: str = "error"
+
+    @property
+    def message(self) -> str:
+        """Error message sent by the Gateway."""
+        if isinstance(self.data, dict):
+            return str(self.data.get("error", self.data))
+        return str(self.data)
+
+
+_EVENT_TYPES = {
+    "connected": StreamConnected,
+    "end": StreamEnd,
+    "error": StreamError,
+}
+
+
+def make_stream_event(event: str, data: str, event_id: Optional[str] = None) -> StreamEvent:
+    """Build a typed stream event, decoding JSON data where possible."""
+    try:
+        payload: Any = json.loads(data)
+    except ValueError:
+        payload = data
+    # The Sentinel stream announces itself with an unnamed message
+    if event == "message" and isinstance(payload, dict) and payload.get("type") == "connection":
+        event = "connected"
+    event_type = _EVENT_TYPES.get(event, StreamEvent)
+    return event_type(event=event, data=payload, id=event_id)
+
+
+async def parse_sse(
+    lines: AsyncIterator[str], max_event_bytes: int = 1024 * 1024
+) -> AsyncIterator[StreamEvent]:
+    """
+    Parse SSE lines into events as they arrive.
+
+    Only one event is buffered at a time, so a slow consumer applies
+    backpressure all the way down to the socket.
+    """
+    event = "message"
+    event_id: Optional[str] = None
+    data: List[str] = []
+    size = 0
+
+    async for line in lines:
+        if not line:
+            if data:
+                yield make_stream_event(event, "\n".join(data), event_id)
+            event, data, size = "message", [], 0
+            continue
+
+        if line.startswith(":"):
+            continue  # Comment / keepalive
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if field == "data":
+            size += len(value)
+            if size > max_event_bytes:
+                raise GatewayError(
+                    f"SSE event exceeds {max_event_bytes} bytes", code="STREAM_ERROR"
+                )
+            data.append(value)
+        elif field == "event":
+            event = value or "message"
+        elif field == "id":
+            event_id = value
@@ -0,0 +1,48 @@
+"""
+Helpers for consuming streamed proxy responses at constant memory.
+"""
+
+import inspect
+from typing import Any, AsyncIterator
+
+from ..errors import GatewayError
+
+
+async def iter_json_items(chunks: AsyncIterator[bytes], prefix: str) -> AsyncIterator[Any]:
+    """Yield the JSON values under `prefix` (ijson notation) as chunks arrive."""
+    try:
+        import ijson
+    except ImportError:
+        raise ImportError(
+            "Parsing streamed responses requires ijson: pip install runrgateway[stream]"
+        ) from None
+
+    items = ijson.sendable_list()
+    parser = ijson.items_coro(items, prefix, use_float=True)
+    try:
+        async for chunk in chunks:
+            parser.send(chunk)
+            for item in items:
+                yield item
+            del items[:]
+        parser.close()
+    except ijson.JSONError as e:
+        raise GatewayError(f"Invalid JSON in streamed response: {e}", code="DECODE_ERROR")
+    finally:
+        await chunks.aclose()
+    for item in items:
+        yield item
+
+
+async def write_chunks(chunks: AsyncIterator[bytes], sink: Any) -> int:
+    """Write chunks to a sync or async file-like `sink` and return the bytes written."""
+    written = 0
+    try:
+        async for chunk in chunks:
+            result = sink.write(chunk)
+            if inspect.isawaitable(result):
+                await result
+            written += len(chunk)
+    finally:
+        await chunks.aclose()
+    return written
@@ -0,0 +1,131 @@
+"""
+Token cache with proactive refresh and single-flight issuance.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+TokenKey = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+TokenIssuer = Callable[[TokenKey], Awaitable[Tuple[str, float]]]
+
+
+def make_token_key(
+    agent_id: str, tools: Iterable[str], permissions: Iterable[str]
+) -> TokenKey:
+    """Build a cache key from an agent ID, tool set and permission set."""
+    return (agent_id, tuple(sorted(set(tools))), tuple(sorted(set(permissions))))
+
+
+class CachedToken:
+    """A cached agent token and its expiry (epoch seconds)."""
+
+    __slots__ = ("token", "issued_at", "expires_at")
+
+    def __init__(self, token: str, issued_at: float, expires_at: float):
+        self.token = token
+        self.issued_at = issued_at
+        self.expires_at = expires_at
+
+    def refresh_at(self, refresh_ahead: float) -> float:
+        """Time at which a background refresh should start."""
+        lifetime = max(0.0, self.expires_at - self.issued_at)
+        return self.expires_at - min(refresh_ahead, lifetime / 2)
+
+
+class TokenCache:
+    """
+    Cache of agent tokens keyed by (agent_id, tools, permissions).
+
+    Tokens are refreshed in the background once they enter the refresh window,
+    and concurrent misses for the same key share a single issuance request.
+    """
+
+    def __init__(
+        self,
+        issue_token: TokenIssuer,
+        refresh_ahead: float = 60.0,
+        min_validity: float = 5.0,
+    ):
+        self._issue_token = issue_token
+        self.refresh_ahead = refresh_ahead
+        self.min_validity = min_validity
+        self._entries: Dict[TokenKey, CachedToken] = {}
+        self._inflight: Dict[TokenKey, "asyncio.Future[str]"] = {}
+        self._refresh_tasks: Set["asyncio.Future[str]"] = set()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    async def get(self, key: TokenKey) -> str:
+        """Return a valid token for the key, issuing one if necessary."""
+        entry = self._entries.get(key)
+        now = time.time()
+
+        if entry is not None and entry.expires_at - self.min_validity > now:
+            self.hits += 1
+            if now >= entry.refresh_at(self.refresh_ahead):
+                self._schedule_refresh(key)
+            return entry.token
+
+        self.misses += 1
+        return await asyncio.shield(self._issue(key))
+
+    def peek(self, key: TokenKey) -> Optional[CachedToken]:
+        """Return the cached entry for a key without issuing or refreshing."""
+        return self._entries.get(key)
+
+    def put(self, key: TokenKey, token: str, expires_at: float) -> None:
+        """Store a token issued outside the cache, e.g. by a batch request."""
+        self._entries[key] = CachedToken(token, time.time(), expires_at)
+
+    def mark_rotation(self, token: str, expires_at: Optional[float] = None) -> None:
+        """Handle a rotation recommendation from the Gateway for a token."""
+        for key, entry in list(self._entries.items()):
+            if entry.token != token:
+                continue
+            if expires_at is not None and expires_at < entry.expires_at:
+                entry.expires_at = expires_at
+            self._schedule_refresh(key)
+
+    def invalidate(self, token: str) -> None:
+        """Drop every cache entry holding the given token."""
+        for key, entry in list(self._entries.items()):
+            if entry.token == token:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all cached tokens and cancel background refreshes."""
+        self._entries.clear()
+        for task in list(self._refresh_tasks):
+            task.cancel()
+        self._refresh_tasks.clear()
+
+    def _schedule_refresh(self, key: TokenKey) -> None:
+        if key in self._inflight:
+            return
+        self.refreshes += 1
+        task = self._issue(key)
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def _issue(self, key: TokenKey) -> "asyncio.Future[str]":
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._on_issued(key, f))
+        return future
+
+    async def _fetch(self, key: TokenKey) -> str:
+        issued_at = time.time()
+        token, expires_at = await self._issue_token(key)
+        self._entries[key] = CachedToken(token, issued_at, expires_at)
+        return token
+
+    def _on_issued(self, key: TokenKey, future: "asyncio.Future[str]") -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark background failures as retrieved; waiters still see the error
+        if not future.cancelled():
+            future.exception()
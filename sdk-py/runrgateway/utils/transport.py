@@ -0,0 +1,47 @@
+"""
+Connection pool configuration and shareable transports.
+"""
+
+from typing import Optional
+
+import httpx
+
+
+class PoolOptions:
+    """Configuration for the HTTP connection pool."""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry_ms: Optional[int] = 5000,
+        http2: bool = False,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry_ms = keepalive_expiry_ms
+        self.http2 = http2
+
+    def limits(self) -> httpx.Limits:
+        """Pool limits in httpx form."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=(
+                self.keepalive_expiry_ms / 1000
+                if self.keepalive_expiry_ms is not None
+                else None
+            ),
+        )
+
+
+def create_transport(options: Optional[PoolOptions] = None) -> httpx.AsyncHTTPTransport:
+    """
+    Create a pooled transport that several GatewayClients can share.
+
+    Pass it as `transport=` to each client. Clients never close a transport
+    they were given, so close it yourself once every client is done with it.
+    HTTP/2 requires the `h2` package (`pip install runrgateway[http2]`).
+    """
+    options = options or PoolOptions()
+    return httpx.AsyncHTTPTransport(limits=options.limits(), http2=options.http2)
@@ -0,0 +1,396 @@
+"""
+Multi-process worker pool for spreading proxy workloads over several cores.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .. import errors
+from ..errors import GatewayError
+from .metrics import MetricsCollector
+
+# Runs one work item in a worker process with that process's client
+Handler = Callable[[Any, Any], Awaitable[Any]]
+
+_RESULT = "result"
+_METRICS = "metrics"
+_DONE = "done"
+_STOP = "stop"
+
+
+async def proxy_handler(client: Any, call: Tuple[str, str, Dict[str, Any]]) -> Any:
+    """Default handler: treat each work item as a `(tool, action, params)` proxy call."""
+    tool, action, params = call
+    return await client.proxy(tool, action, params)
+
+
+class WorkerPoolOptions:
+    """Configuration for a WorkerPool."""
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        concurrency: int = 10,
+        max_pending: int = 1000,
+        metrics_interval_s: float = 1.0,
+        drain_timeout_s: float = 30.0,
+        start_method: str = "spawn",
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.metrics_interval_s = metrics_interval_s
+        self.drain_timeout_s = drain_timeout_s
+        self.start_method = start_method
+
+
+class WorkerPool:
+    """
+    Runs work items across processes, each with its own event loop and client.
+
+    Every worker process builds a `GatewayClient` from the pool's constructor
+    arguments and takes items from one shared queue, running up to
+    `concurrency` of them at once, so a busy process does not hoard work.
+    `handler(client, item)` runs in the worker, so decoding, validation and
+    any agent logic in it use that process's core; by default items are
+    `(tool, action, params)` proxy calls. Results and errors come back to the
+    caller that submitted the item.
+
+    Client arguments and `handler` are pickled into the workers, so `handler`
+    must be a module-level function, and scripts using the pool need an
+    `if __name__ == "__main__":` guard under the default "spawn" start method.
+
+    Each worker records request metrics and sends them to `metrics` every
+    `metrics_interval_s`. `close()` stops taking new items, lets the workers
+    finish everything already submitted, and terminates workers still
+    running after `drain_timeout_s`. Workers ignore SIGINT so that Ctrl-C in
+    the parent leads to a drain rather than lost calls.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        agent_id: str,
+        agent_private_key_pem: str,
+        options: Optional[WorkerPoolOptions] = None,
+        handler: Handler = proxy_handler,
+        metrics: Optional[MetricsCollector] = None,
+        **client_kwargs: Any,
+    ):
+        self.options = options or WorkerPoolOptions()
+        self.metrics = metrics or MetricsCollector()
+        self._client_args = (base_url, agent_id, agent_private_key_pem)
+        self._client_kwargs = client_kwargs
+        self._handler = handler
+        self._processes: List[Any] = []
+        self._tasks: Any = None
+        self._results: Any = None
+        self._collector: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._futures: Dict[int, "asyncio.Future[Any]"] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._ids = itertools.count()
+        self._done_workers = 0
+        self._drained: Optional["asyncio.Future[None]"] = None
+        self._closing = False
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        """Start the worker processes."""
+        if self._processes:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.options.max_pending)
+        self._drained = self._loop.create_future()
+        context = multiprocessing.get_context(self.options.start_method)
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        for worker_id in range(self.options.processes):
+            process = context.Process(
+                target=_worker_main,
+                args=(
+                    worker_id,
+                    self._client_args,
+                    self._client_kwargs,
+                    self._handler,
+                    self.options,
+                    (self.metrics.buckets, self.metrics.prefix),
+                    self._tasks,
+                    self._results,
+                ),
+                name=f"runrgateway-worker-{worker_id}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(
+            target=self._collect, name="runrgateway-worker-results", daemon=True
+        )
+        self._collector.start()
+
+    async def submit(self, item: Any) -> Any:
+        """Run one item in a worker and return its result, or raise its error."""
+        if self._closing or not self._processes:
+            raise GatewayError("Worker pool is not running", code="CLIENT_ERROR")
+        async with self._slots:
+            task_id = next(self._ids)
+            future = self._loop.create_future()
+            self._futures[task_id] = future
+            self.submitted += 1
+            self._tasks.put((task_id, item))
+            try:
+                return await future
+            finally:
+                self._futures.pop(task_id, None)
+
+    async def map(
+        self, items: Iterable[Any], ordered: bool = False
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Run every item and yield `(index, result)` pairs as in `proxy_many`.
+
+        Failed items yield their `GatewayError` as the result. Results are
+        yielded as they complete, or in input order when `ordered` is true.
+        """
+
+        async def _run(index: int, item: Any) -> Tuple[int, Any]:
+            try:
+                return index, await self.submit(item)
+            except GatewayError as error:
+                return index, error
+
+        pending: set = set()
+        buffered: Dict[int, Any] = {}
+        next_index = 0
+
+        async def _drain() -> List[Tuple[int, Any]]:
+            nonlocal pending, next_index
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            results = [task.result() for task in done]
+            if not ordered:
+                return results
+            buffered.update(results)
+            ready = []
+            while next_index in buffered:
+                ready.append((next_index, buffered.pop(next_index)))
+                next_index += 1
+            return ready
+
+        try:
+            for index, item in enumerate(items):
+                while len(pending) + len(buffered) >= self.options.max_pending:
+                    for result in await _drain():
+                        yield result
+                pending.add(asyncio.ensure_future(_run(index, item)))
+            while pending:
+                for result in await _drain():
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """Worker and item counts."""
+        return {
+            "workers": sum(process.is_alive() for process in self._processes),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": len(self._futures),
+        }
+
+    async def close(self, timeout_s: Optional[float] = None) -> None:
+        """Finish submitted items, then stop the workers."""
+        if self._closing or not self._processes:
+            return
+        self._closing = True
+        timeout_s = self.options.drain_timeout_s if timeout_s is None else timeout_s
+        # Queued after every submitted item, so workers drain before stopping
+        for _ in self._processes:
+            self._tasks.put(None)
+        try:
+            await asyncio.wait_for(asyncio.shield(self._drained), timeout_s)
+        except asyncio.TimeoutError:
+            for process in self._processes:
+                if process.is_alive():
+                    process.terminate()
+        for process in self._processes:
+            await self._loop.run_in_executor(None, process.join)
+        self._results.put((_STOP, None))
+        await self._loop.run_in_executor(None, self._collector.join)
+        self._fail_pending("Worker pool closed before the item finished")
+        self._tasks.close()
+        self._results.close()
+
+    async def __aenter__(self) -> "WorkerPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def _collect(self) -> None:
+        """Move messages from the result queue onto the event loop."""
+        while True:
+            try:
+                kind, payload = self._results.get(timeout=0.5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self._processes):
+                    self._loop.call_soon_threadsafe(self._workers_gone)
+                continue
+            if kind == _STOP:
+                return
+            if kind in (_RESULT, _METRICS):
+                payload = pickle.loads(payload)
+            self._loop.call_soon_threadsafe(self._handle, kind, payload)
+
+    def _handle(self, kind: str, payload: Any) -> None:
+        if kind == _METRICS:
+            self.metrics.merge(payload)
+            return
+        if kind == _DONE:
+            self._done_workers += 1
+            if self._done_workers == len(self._processes) and not self._drained.done():
+                self._drained.set_result(None)
+            return
+        task_id, ok, value = payload
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        future = self._futures.get(task_id)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(_unpack_error(value))
+
+    def _workers_gone(self) -> None:
+        if not self._drained.done():
+            self._drained.set_result(None)
+        self._fail_pending("Worker processes exited before the item finished")
+
+    def _fail_pending(self, message: str) -> None:
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(GatewayError(message, code="CLIENT_ERROR"))
+
+
+def _pack_error(error: BaseException) -> Tuple[str, str, Optional[int], Optional[str], Any]:
+    """Reduce an error to plain values, since GatewayError subclasses do not pickle intact."""
+    if not isinstance(error, GatewayError):
+        return ("GatewayError", str(error), None, "CLIENT_ERROR", None)
+    return (
+        type(error).__name__,
+        error.message,
+        error.status_code,
+        error.code,
+        getattr(error, "retry_after", None),
+    )
+
+
+def _unpack_error(packed: Tuple[str, str, Optional[int], Optional[str], Any]) -> GatewayError:
+    name, message, status_code, code, retry_after = packed
+    cls = getattr(errors, name, GatewayError)
+    error = cls.__new__(cls)
+    GatewayError.__init__(error, message, status_code, code)
+    if retry_after is not None:
+        error.retry_after = retry_after
+    return error
+
+
+def _worker_main(
+    worker_id: int,
+    client_args: Tuple[str, str, str],
+    client_kwargs: Dict[str, Any],
+    handler: Handler,
+    options: WorkerPoolOptions,
+    metrics_config: Tuple[Tuple[float, ...], str],
+    tasks: Any,
+    results: Any,
+) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(
+        _worker_loop(
+            worker_id, client_args, client_kwargs, handler, options, metrics_config,
+            tasks, results,
+        )
+    )
+
+
+async def _worker_loop(
+    worker_id: int,
+    client_args: Tuple[str, str, str],
+    client_kwargs: Dict[str, Any],
+    handler: Handler,
+    options: WorkerPoolOptions,
+    metrics_config: Tuple[Tuple[float, ...], str],
+    tasks: Any,
+    results: Any,
+) -> None:
+    from ..client import GatewayClient
+
+    loop = asyncio.get_running_loop()
+    buckets, prefix = metrics_config
+    metrics = MetricsCollector(buckets, prefix=prefix)
+    slots = asyncio.Semaphore(options.concurrency)
+    running: set = set()
+    # A dedicated thread, so blocking queue reads never wait behind other executor work
+    reader = ThreadPoolExecutor(1, thread_name_prefix="runrgateway-worker-queue")
+
+    def _send_metrics() -> None:
+        # Pickled now, as the queue would pickle it after the reset below
+        results.put((_METRICS, pickle.dumps(metrics, pickle.HIGHEST_PROTOCOL)))
+        metrics.reset()
+
+    async def _report_metrics() -> None:
+        while True:
+            await asyncio.sleep(options.metrics_interval_s)
+            _send_metrics()
+
+    async def _run(client: GatewayClient, task_id: int, item: Any) -> None:
+        try:
+            try:
+                message = (task_id, True, await handler(client, item))
+            except Exception as error:
+                message = (task_id, False, _pack_error(error))
+            try:
+                data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+            except Exception as error:
+                data = pickle.dumps(
+                    (task_id, False, _pack_error(ValueError(f"Result not picklable: {error}")))
+                )
+            results.put((_RESULT, data))
+        finally:
+            slots.release()
+
+    async with GatewayClient(*client_args, metrics=metrics, **client_kwargs) as client:
+        reporter = asyncio.ensure_future(_report_metrics())
+        try:
+            while True:
+                # Only take an item when there is room to run it
+                await slots.acquire()
+                entry = await loop.run_in_executor(reader, tasks.get)
+                if entry is None:
+                    break
+                task = asyncio.ensure_future(_run(client, *entry))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            if running:
+                await asyncio.gather(*running)
+        finally:
+            reporter.cancel()
+            reader.shutdown(wait=False)
+    _send_metrics()
+    results.put((_DONE, worker_id))
@@ -32,6 +32,18 @@ setup(
         "pydantic>=2.0.0",
     ],
     extras_require={
+        "http2": [
+            "h2>=4.0.0",
+        ],
+        "fast": [
+            "orjson>=3.9.0",
+        ],
+        "zstd": [
+            "zstandard>=0.18.0",
+        ],
+        "stream": [
+            "ijson>=3.1.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# The stand-in Gateway lives with the benchmarks so both can share it
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from standin import StandInGateway  # noqa: E402
+
+from runrgateway import GatewayClient  # noqa: E402
+from runrgateway.utils.retry import RetryOptions  # noqa: E402
+
+# Retries without real backoff, so tests stay fast
+FAST_RETRY = RetryOptions(base_delay=0.001, max_delay=0.002, jitter=False)
+
+
+@pytest.fixture
+def gateway() -> StandInGateway:
+    return StandInGateway(seed=1)
+
+
+@pytest.fixture
+def make_client(gateway):
+    def _make(transport=None, base_url="http://gateway.test", **kwargs) -> GatewayClient:
+        kwargs.setdefault("retry_options", FAST_RETRY)
+        return GatewayClient(base_url, "agent-1", "", transport=transport or gateway, **kwargs)
+
+    return _make
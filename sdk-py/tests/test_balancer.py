@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.utils.balancer import (
+    LEAST_OUTSTANDING,
+    BalancerOptions,
+    LoadBalancer,
+)
+
+
+class Router(httpx.AsyncBaseTransport):
+    """Routes requests to a stand-in Gateway per host, some of which can be down."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.down = set()
+        self.unhealthy = set()
+        self.probed = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host in self.down:
+            raise httpx.ConnectError("Connection refused", request=request)
+        if request.url.path in ("/api/health", "/ready"):
+            self.probed.append((host, request.url.path))
+            if host in self.unhealthy:
+                return httpx.Response(503, json={"status": "unhealthy"})
+        return await self.nodes[host].handle_async_request(request)
+
+
+def _stats(client):
+    return {node["url"]: node for node in client.balancer.stats()}
+
+
+def test_least_outstanding_picks_the_idlest_node():
+    balancer = LoadBalancer(["http://a", "http://b"], BalancerOptions(policy=LEAST_OUTSTANDING))
+    a, b = balancer.nodes
+    balancer.on_start(a)
+    assert balancer.pick() is b
+    assert balancer.pick(exclude={"http://b"}) is a
+
+
+def test_consecutive_failures_eject_a_node():
+    balancer = LoadBalancer(["http://a", "http://b"], BalancerOptions(failure_threshold=2))
+    a, b = balancer.nodes
+    for _ in range(2):
+        balancer.on_start(a)
+        balancer.on_finish(a, 0.0, responded=False)
+    assert a.ejected
+    assert all(balancer.pick() is b for _ in range(10))
+
+    # With every node ejected, requests still go somewhere
+    balancer.eject(b)
+    assert balancer.pick() in (a, b)
+
+
+@pytest.mark.asyncio
+async def test_slow_node_gets_less_traffic(make_client):
+    router = Router({"a": StandInGateway(latency_ms=1), "b": StandInGateway(latency_ms=40)})
+    client = make_client(
+        router,
+        base_url=["http://a", "http://b"],
+        balancer_options=BalancerOptions(health_check_interval_ms=None),
+    )
+    for _ in range(4):
+        await asyncio.gather(
+            *(client.proxy("serpapi", "search", {"q": str(i)}) for i in range(40))
+        )
+    stats = _stats(client)
+    assert stats["http://b"]["requests"] < stats["http://a"]["requests"] * 0.75
+
+
+@pytest.mark.asyncio
+async def test_calls_fail_over_from_a_dead_node(make_client):
+    router = Router({"a": StandInGateway(), "b": StandInGateway()})
+    client = make_client(
+        router,
+        base_url=["http://a", "http://b"],
+        balancer_options=BalancerOptions(health_check_interval_ms=None),
+    )
+    await client.proxy("serpapi", "search", {"q": "warm-up"})
+    router.down.add("a")
+    results = await asyncio.gather(
+        *(client.proxy("serpapi", "search", {"q": str(i)}) for i in range(20))
+    )
+    assert all(results)
+    assert _stats(client)["http://a"]["ejected"]
+
+
+@pytest.mark.asyncio
+async def test_health_checks_use_the_configured_paths(make_client):
+    router = Router({"a": StandInGateway(), "b": StandInGateway()})
+    client = make_client(
+        router,
+        base_url=["http://a", "http://b"],
+        balancer_options=BalancerOptions(health_check_interval_ms=20),
+    )
+    await client.proxy("serpapi", "search", {"q": "x"})
+    await asyncio.sleep(0.05)
+    # The default path is the Gateway server's health route
+    assert {path for _, path in router.probed} == {"/api/health"}
+
+    router.unhealthy.add("b")
+    await asyncio.sleep(0.05)
+    assert _stats(client)["http://b"]["ejected"]
+
+    # A passing check returns the node to service
+    router.unhealthy.clear()
+    await asyncio.sleep(0.05)
+    assert not _stats(client)["http://b"]["ejected"]
+    await client.balancer.close()
+
+    readiness = make_client(
+        router,
+        base_url=["http://a", "http://b"],
+        balancer_options=BalancerOptions(
+            health_check_interval_ms=None, health_check_paths=("/health", "/ready")
+        ),
+    )
+    router.probed.clear()
+    assert await readiness._probe_node("http://a")
+    assert ("a", "/ready") in router.probed
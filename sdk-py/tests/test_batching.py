@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import GatewayAuthError
+from runrgateway.utils.batching import BatchOptions, ProxyBatcher
+
+
+class DenyingGateway(StandInGateway):
+    """Denies proxy calls whose query is "deny", like a Gateway policy would."""
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["params"].get("q") == "deny":
+            return httpx.Response(403, json={"error": "Policy denied"})
+        return super()._proxy_request(request)
+
+
+class LegacyGateway(StandInGateway):
+    """A Gateway from before the batch endpoint."""
+
+    def _route(self, request: httpx.Request, path: str) -> httpx.Response:
+        if path == "/api/proxy-batch":
+            return httpx.Response(404, json={"error": "Not found"})
+        return super()._route(request, path)
+
+
+def _recording_sender(batches, fail=None):
+    async def _send(bodies):
+        batches.append([body["n"] for body in bodies])
+        await asyncio.sleep(0)
+        if fail is not None:
+            raise fail
+        return [body["n"] * 10 for body in bodies]
+
+    return _send
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_at_once_and_rest_after_delay():
+    batches = []
+    batcher = ProxyBatcher(_recording_sender(batches), BatchOptions(max_batch_size=3))
+    results = await asyncio.gather(*(batcher.submit({"n": n}) for n in range(5)))
+    assert results == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1, 2], [3, 4]]
+    assert batcher.stats() == {"batches": 2, "calls": 5, "mean_batch_size": 2.5}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_is_left_out_of_its_batch():
+    batches = []
+    batcher = ProxyBatcher(_recording_sender(batches), BatchOptions(max_delay_ms=10))
+    kept = asyncio.ensure_future(batcher.submit({"n": 1}))
+    dropped = asyncio.ensure_future(batcher.submit({"n": 2}))
+    await asyncio.sleep(0)
+    dropped.cancel()
+    assert await kept == 10
+    assert batches == [[1]]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_fails_every_caller():
+    batcher = ProxyBatcher(_recording_sender([], fail=RuntimeError("down")))
+    results = await asyncio.gather(
+        *(batcher.submit({"n": n}) for n in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_client_batches_calls_with_results_per_caller(make_client):
+    gateway = DenyingGateway(latency_ms=1)
+    client = make_client(gateway, batch_options=BatchOptions(max_delay_ms=5))
+    await client.proxy("serpapi", "search", {"q": "warm-up"})
+
+    queries = ["a", "deny", "b", "c"]
+    results = await asyncio.gather(
+        *(client.proxy("serpapi", "search", {"q": q}) for q in queries),
+        return_exceptions=True,
+    )
+    assert isinstance(results[1], GatewayAuthError)
+    assert [r["search_parameters"]["q"] for i, r in enumerate(results) if i != 1] == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert gateway.requests["/api/proxy-batch"] == 1
+    assert gateway.requests["/api/proxy-request"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_falls_back_without_batch_endpoint(make_client):
+    gateway = LegacyGateway()
+    client = make_client(gateway, batch_options=BatchOptions(max_delay_ms=5))
+    await client.proxy("serpapi", "search", {"q": "warm-up"})
+
+    for _ in range(2):
+        results = await asyncio.gather(
+            *(client.proxy("serpapi", "search", {"q": str(i)}) for i in range(3))
+        )
+        assert all(results)
+    # The endpoint is tried once, then calls go out one by one
+    assert gateway.requests["/api/proxy-batch"] == 1
+    assert gateway.requests["/api/proxy-request"] == 7
@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from runrgateway.utils import codec
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"q": "plumbers", "page": 2},
+        {1: "one", 2.5: "x", None: "nothing"},
+        {"big": 2**70},
+        {"text": "café"},
+    ],
+)
+def test_dumps_matches_json(value):
+    assert json.loads(codec.dumps(value)) == json.loads(json.dumps(value))
+
+
+def test_unserializable_values_still_raise():
+    with pytest.raises(TypeError):
+        codec.dumps({"when": object()})
@@ -0,0 +1,132 @@
+import gzip
+import os
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.utils.compression import (
+    GZIP,
+    HAS_ZSTD,
+    ZSTD,
+    CompressionOptions,
+    Compressor,
+)
+
+LARGE = {"q": "plumbers near me " * 200}
+
+
+class _Body(httpx.AsyncByteStream):
+    """A body read off the "wire", so httpx counts and decodes it like a real one."""
+
+    def __init__(self, content):
+        self.content = content
+
+    async def __aiter__(self):
+        yield self.content
+
+
+class RecordingGateway(StandInGateway):
+    """Records the Content-Encoding of each proxy request and gzips proxy responses."""
+
+    def __init__(self, reject=()):
+        super().__init__()
+        self.reject = set(reject)
+        self.rejected = 0
+        self.encodings = []
+        self.accepted = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        encoding = request.headers.get("Content-Encoding")
+        if request.url.path == "/api/proxy-request":
+            self.encodings.append(encoding)
+            self.accepted.append(request.headers.get("Accept-Encoding", ""))
+        if encoding in self.reject:
+            self.rejected += 1
+            return httpx.Response(
+                415, json={"error": f"Unsupported: {encoding}"}, headers={"Accept-Encoding": GZIP}
+            )
+        return await super().handle_async_request(request)
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        response = super()._proxy_request(request)
+        return httpx.Response(
+            response.status_code,
+            stream=_Body(gzip.compress(response.content)),
+            headers={"Content-Type": "application/json", "Content-Encoding": GZIP},
+        )
+
+
+def _advertising(value):
+    return httpx.Response(200, headers={"Accept-Encoding": value})
+
+
+def test_encoding_is_chosen_from_the_advertised_header():
+    compressor = Compressor()
+    assert compressor.encoding is None
+    compressor.negotiate(httpx.Response(200))
+    assert compressor.encoding is None
+
+    compressor.negotiate(_advertising("br;q=1.0, GZIP"))
+    assert compressor.encoding == GZIP
+    # zstd is preferred, but only when the zstandard package is installed
+    compressor.negotiate(_advertising("gzip, zstd"))
+    assert compressor.encoding == (ZSTD if HAS_ZSTD else GZIP)
+    compressor.negotiate(_advertising("br"))
+    assert compressor.encoding is None
+
+
+def test_small_and_incompressible_bodies_are_sent_as_is():
+    compressor = Compressor(CompressionOptions(min_size=100, encodings=(GZIP,)))
+    compressor.negotiate(_advertising("gzip"))
+
+    assert compressor.compress(b"x" * 99) == (b"x" * 99, None)
+    noise = os.urandom(4096)
+    assert compressor.compress(noise) == (noise, None)
+    body, encoding = compressor.compress(b"x" * 4096)
+    assert encoding == GZIP
+    assert gzip.decompress(body) == b"x" * 4096
+
+    stats = compressor.stats()
+    assert stats["requests_compressed"] == 1
+    assert stats["request_bytes"] == 99 + 4096 + 4096
+    assert stats["request_bytes_sent"] == 99 + 4096 + len(body)
+
+
+@pytest.mark.asyncio
+async def test_requests_are_compressed_once_the_gateway_advertises_gzip(make_client):
+    gateway = RecordingGateway()
+    compressor = Compressor(CompressionOptions(encodings=(GZIP,)))
+    client = make_client(gateway, compressor=compressor)
+
+    # The first request, for the token, learns what the Gateway accepts
+    result = await client.proxy("serpapi", "search", LARGE)
+    assert result["search_parameters"]["q"] == LARGE["q"]
+    await client.proxy("serpapi", "search", {"q": "small"})
+    assert gateway.encodings == [GZIP, None]
+    # Responses are asked for compressed too
+    assert all(GZIP in accepted for accepted in gateway.accepted)
+
+    stats = compressor.stats()
+    assert stats["requests_compressed"] == 1
+    assert stats["request_bytes_sent"] < stats["request_bytes"]
+    assert stats["responses_compressed"] == 2
+    assert stats["response_bytes_received"] < stats["response_bytes"]
+    assert stats["bytes_saved"] > 0
+
+
+@pytest.mark.asyncio
+async def test_415_resends_uncompressed_and_drops_the_encoding(make_client):
+    gateway = RecordingGateway(reject=[GZIP])
+    compressor = Compressor(CompressionOptions(encodings=(GZIP,)))
+    client = make_client(gateway, compressor=compressor)
+
+    result = await client.proxy("serpapi", "search", LARGE)
+    assert result["search_parameters"]["q"] == LARGE["q"]
+    await client.proxy("serpapi", "search", LARGE)
+
+    # The Gateway still advertises gzip, but the rejected encoding is not retried
+    assert gateway.encodings == [GZIP, None, None]
+    assert compressor.encoding is None
+    assert gateway.rejected == 1
+    assert compressor.stats()["requests_compressed"] == 1
@@ -0,0 +1,144 @@
+import asyncio
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import GatewayPolicyError, GatewayUpstreamError
+from runrgateway.utils.concurrency import (
+    AIMD,
+    AdaptiveLimit,
+    ConcurrencyLimiter,
+    ConcurrencyOptions,
+)
+from runrgateway.utils.retry import RetryOptions
+
+OVERLOAD = GatewayUpstreamError("External API request failed", 503)
+
+
+class FlakyGateway(StandInGateway):
+    """Answers the first proxy call with a 503."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        if self.failures:
+            self.failures -= 1
+            return httpx.Response(503, json={"error": "External API request failed"})
+        return super()._proxy_request(request)
+
+
+async def _hold(limit, n):
+    return [await limit.acquire() for _ in range(n)]
+
+
+def _release_all(limit, started, rtt_s=None, error=None):
+    for start in started:
+        limit.release(start, error, rtt_s)
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_woken_in_fifo_order():
+    limit = AdaptiveLimit(ConcurrencyOptions(initial_limit=1, max_limit=1))
+    started = await limit.acquire()
+    order = []
+
+    async def _call(name):
+        start = await limit.acquire()
+        order.append(name)
+        await asyncio.sleep(0)
+        limit.release(start)
+
+    tasks = [asyncio.ensure_future(_call(name)) for name in "abc"]
+    await asyncio.sleep(0)
+    assert limit.waiting == 3
+    limit.release(started)
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b", "c"]
+    assert limit.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_hands_its_slot_on():
+    limit = AdaptiveLimit(ConcurrencyOptions(initial_limit=1, max_limit=1))
+    started = await limit.acquire()
+    first = asyncio.ensure_future(limit.acquire())
+    second = asyncio.ensure_future(limit.acquire())
+    await asyncio.sleep(0)
+
+    # The slot goes to `first`, which is cancelled before it can run
+    limit.release(started)
+    first.cancel()
+    await asyncio.sleep(0)
+    assert first.cancelled()
+    await asyncio.wait_for(second, 1)
+    assert limit.in_flight == 1
+    assert limit.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_gradient_grows_at_baseline_and_shrinks_when_slow():
+    limit = AdaptiveLimit(ConcurrencyOptions(initial_limit=10))
+    for _ in range(5):
+        _release_all(limit, await _hold(limit, int(limit.limit)), rtt_s=0.01)
+    grown = limit.limit
+    assert grown > 10
+    assert limit.baseline_rtt_s == pytest.approx(0.01)
+
+    for _ in range(5):
+        _release_all(limit, await _hold(limit, int(limit.limit)), rtt_s=0.1)
+    assert limit.limit < grown
+
+
+@pytest.mark.asyncio
+async def test_aimd_adds_one_per_success():
+    limit = AdaptiveLimit(ConcurrencyOptions(algorithm=AIMD, initial_limit=4))
+    started = await _hold(limit, 4)
+    limit.release(started.pop(), rtt_s=0.5)
+    limit.release(started.pop(), rtt_s=0.5)
+    assert limit.limit == 6
+
+    # The rest finish with less than half of the limit in use
+    _release_all(limit, started, rtt_s=0.5)
+    assert limit.limit == 6
+
+
+@pytest.mark.asyncio
+async def test_overload_cuts_once_per_window_of_calls_in_flight():
+    limit = AdaptiveLimit(ConcurrencyOptions(initial_limit=20, backoff_ratio=0.5))
+    _release_all(limit, await _hold(limit, 4), error=OVERLOAD)
+    assert limit.limit == 10
+    assert limit.dropped == 4
+
+    # A call started after the cut may cut again
+    await asyncio.sleep(0.001)
+    _release_all(limit, await _hold(limit, 1), error=OVERLOAD)
+    assert limit.limit == 5
+
+    # Errors that are not overload leave the limit alone
+    _release_all(limit, await _hold(limit, 1), error=GatewayPolicyError("Policy denied", 403))
+    assert limit.limit == 5
+
+
+@pytest.mark.asyncio
+async def test_limit_only_grows_while_half_is_in_use():
+    limit = AdaptiveLimit(ConcurrencyOptions(algorithm=AIMD, initial_limit=20))
+    for _ in range(10):
+        _release_all(limit, await _hold(limit, 1), rtt_s=0.01)
+    assert limit.limit == 20
+
+
+@pytest.mark.asyncio
+async def test_retry_backoff_is_not_sampled_as_latency(make_client):
+    concurrency = ConcurrencyLimiter()
+    client = make_client(
+        FlakyGateway(),
+        retry_options=RetryOptions(max_retries=1, base_delay=0.2, max_delay=0.2, jitter=False),
+        concurrency_limiter=concurrency,
+    )
+    await client.proxy("serpapi", "search", {"q": "x"})
+    stats = concurrency.stats()["serpapi"]
+    assert stats["last_rtt_ms"] < 100
+    assert stats["in_flight"] == 0
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+from standin import StandInGateway
+
+from runrgateway import TokenOptions
+from runrgateway.utils.diagnostics import Diagnostics, DiagnosticsOptions, RequestTiming
+from runrgateway.utils.hedging import HedgeOptions, RequestHedger
+
+QUIET = DiagnosticsOptions(lag_interval_ms=10, summary_interval_ms=None)
+
+
+def _call_sites(diagnostics):
+    return {site["call_site"] for site in diagnostics.snapshot()["slowest_call_sites"]}
+
+
+@pytest.mark.asyncio
+async def test_blocking_the_loop_shows_up_as_lag():
+    diagnostics = Diagnostics(QUIET)
+    diagnostics.start(owner=object())
+    try:
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+    finally:
+        await diagnostics.close()
+    lag = diagnostics.snapshot()["loop_lag_ms"]
+    assert lag["max"] >= 80
+    assert lag["p50"] < lag["max"]
+
+
+@pytest.mark.asyncio
+async def test_trace_events_split_pool_wait_connect_and_wire():
+    timing = RequestTiming("test")
+    await asyncio.sleep(0.02)
+    await timing.trace("connection.connect_tcp.started", {})
+    await asyncio.sleep(0.01)
+    await timing.trace("http11.send_request_headers.started", {})
+    await asyncio.sleep(0.01)
+    timing.finish()
+
+    assert timing.pool_wait_s >= 0.02
+    assert 0.01 <= timing.connect_s < timing.pool_wait_s
+    assert timing.wire_s >= 0.01
+    assert timing.duration_s == pytest.approx(
+        timing.pool_wait_s + timing.connect_s + timing.wire_s
+    )
+
+
+@pytest.mark.asyncio
+async def test_mock_transport_reports_everything_as_wire_time(make_client):
+    diagnostics = Diagnostics(QUIET)
+    client = make_client(StandInGateway(latency_ms=10), diagnostics=diagnostics)
+    async with client:
+        await client.proxy("serpapi", "search", {"q": "plumbers"})
+    snapshot = diagnostics.snapshot()
+    assert snapshot["pool_wait_ms"]["p99"] == 0
+    assert snapshot["wire_ms"]["p99"] >= 10
+    assert snapshot["connect_ms"] == {"p50": 0.0, "p99": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_peak_in_flight_is_tracked(make_client):
+    diagnostics = Diagnostics(QUIET)
+    client = make_client(StandInGateway(latency_ms=20), diagnostics=diagnostics)
+    async with client:
+        token = await client.get_token(
+            TokenOptions(tools=["serpapi"], permissions=["read"], ttl_minutes=5)
+        )
+        await asyncio.gather(
+            *(client.proxy("serpapi", "search", {"q": str(i)}, token) for i in range(5))
+        )
+    snapshot = diagnostics.snapshot()
+    assert snapshot["max_in_flight"] == 5
+    assert snapshot["in_flight"] == 0
+    assert snapshot["requests"] == 6
+
+
+@pytest.mark.asyncio
+async def test_call_sites_point_at_the_calling_code(make_client):
+    diagnostics = Diagnostics(QUIET)
+    client = make_client(StandInGateway(latency_ms=5), diagnostics=diagnostics)
+    async with client:
+        await client.proxy("serpapi", "search", {"q": "direct"})
+    sites = _call_sites(diagnostics)
+    assert sites
+    assert all(
+        site.startswith("test_diagnostics.py:")
+        and site.endswith("in test_call_sites_point_at_the_calling_code")
+        for site in sites
+    )
+
+
+@pytest.mark.asyncio
+async def test_requests_from_sdk_tasks_keep_the_caller(make_client):
+    diagnostics = Diagnostics(QUIET)
+    hedger = RequestHedger(HedgeOptions(delay_ms=1))
+    client = make_client(
+        StandInGateway(latency_ms=20),
+        diagnostics=diagnostics,
+        coalesce_reads=True,
+        hedger=hedger,
+    )
+
+    async def _read():
+        return await client.proxy("serpapi", "search", {"q": "shared"})
+
+    async with client:
+        # Coalesced reads and hedges are sent from tasks the SDK spawns
+        await asyncio.gather(_read(), _read())
+        assert hedger.hedged >= 1
+        calls = [("serpapi", "search", {"q": str(i)}) for i in range(3)]
+        results = []
+        async for _, result in client.proxy_many(calls):
+            results.append(result)
+    assert len(results) == 3
+
+    sites = _call_sites(diagnostics)
+    assert "<task>" not in sites
+    assert any(site.endswith("in _read") for site in sites)
+    assert any(site.endswith("in test_requests_from_sdk_tasks_keep_the_caller") for site in sites)
+
+
+@pytest.mark.asyncio
+async def test_call_sites_can_be_turned_off(make_client):
+    diagnostics = Diagnostics(
+        DiagnosticsOptions(summary_interval_ms=None, capture_call_sites=False)
+    )
+    client = make_client(diagnostics=diagnostics)
+    async with client:
+        await client.proxy("serpapi", "search", {"q": "plumbers"})
+    assert diagnostics.requests >= 1
+    assert diagnostics.snapshot()["slowest_call_sites"] == []
@@ -0,0 +1,13 @@
+import pytest
+
+from runrgateway.errors import GatewayRateLimitError, create_error_from_response
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [("2", 2), ("0.2", 1), ("1.5", 2), ("Wed, 21 Oct 2015 07:28:00 GMT", None), ("inf", None)],
+)
+def test_retry_after_rounds_up(header, expected):
+    error = create_error_from_response(429, "Rate limit exceeded", header)
+    assert isinstance(error, GatewayRateLimitError)
+    assert error.retry_after == expected
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import GatewayUpstreamError
+from runrgateway.utils.hedging import HedgeOptions, RequestHedger
+
+
+class SlowFirstGateway(StandInGateway):
+    """Holds the first proxy call for `stall_s`, counting it if it is abandoned."""
+
+    def __init__(self, stall_s: float = 1.0):
+        super().__init__()
+        self.stall_s = stall_s
+        self.stalled = 0
+        self.abandoned = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/proxy-request" and not self.stalled:
+            self.stalled += 1
+            try:
+                await asyncio.sleep(self.stall_s)
+            except asyncio.CancelledError:
+                self.abandoned += 1
+                raise
+        return await super().handle_async_request(request)
+
+
+def _calls(*behaviours):
+    """A callable that runs the next behaviour (delay, error) on each call."""
+    remaining = list(behaviours)
+
+    async def _call():
+        delay, error = remaining.pop(0)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return delay
+
+    return _call
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_after_the_delay_and_the_slow_copy_is_cancelled(make_client):
+    gateway = SlowFirstGateway()
+    hedger = RequestHedger(HedgeOptions(delay_ms=30))
+    client = make_client(gateway, hedger=hedger)
+
+    started = time.perf_counter()
+    result = await client.proxy("serpapi", "search", {"q": "plumbers"})
+    elapsed = time.perf_counter() - started
+    assert result["search_parameters"]["q"] == "plumbers"
+    assert 0.03 <= elapsed < 0.5
+
+    await asyncio.sleep(0.01)
+    # The stalled copy was abandoned; only the hedge was answered
+    assert gateway.abandoned == 1
+    assert gateway.requests["/api/proxy-request"] == 1
+    assert hedger.stats()["hedged"] == 1
+    assert hedger.stats()["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_call_is_not_hedged(make_client):
+    gateway = StandInGateway(latency_ms=1)
+    hedger = RequestHedger(HedgeOptions(delay_ms=100))
+    client = make_client(gateway, hedger=hedger)
+    await client.proxy("serpapi", "search", {"q": "plumbers"})
+    assert hedger.hedged == 0
+    assert gateway.requests["/api/proxy-request"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_still_wins_if_the_hedge_fails():
+    hedger = RequestHedger(HedgeOptions(delay_ms=10))
+    call = _calls((0.05, None), (0, GatewayUpstreamError("unavailable", 503)))
+    assert await hedger.run("serpapi.search", call) == 0.05
+    assert hedger.hedged == 1
+    assert hedger.hedge_wins == 0
+
+
+@pytest.mark.asyncio
+async def test_both_copies_failing_raises_the_first_error():
+    hedger = RequestHedger(HedgeOptions(delay_ms=10))
+    first = GatewayUpstreamError("hedge failed", 503)
+    second = GatewayUpstreamError("primary failed", 503)
+    with pytest.raises(GatewayUpstreamError) as info:
+        await hedger.run("serpapi.search", _calls((0.05, second), (0, first)))
+    assert info.value is first
+
+
+@pytest.mark.asyncio
+async def test_budget_caps_hedges():
+    hedger = RequestHedger(
+        HedgeOptions(delay_ms=1, budget_ratio=0.0, min_hedges_per_second=0.0)
+    )
+    assert await hedger.run("serpapi.search", _calls((0.02, None))) == 0.02
+    assert hedger.hedged == 0
+    assert hedger.stats()["budget_rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_hedging_until_min_samples():
+    hedger = RequestHedger(HedgeOptions(min_samples=3))
+    for _ in range(3):
+        assert hedger.delay_s("serpapi.search") is None
+        await hedger.run("serpapi.search", _calls((0.02, None)))
+    assert hedger.delay_s("serpapi.search") >= 0.02
+    assert "serpapi.search" in hedger.stats()["delays_ms"]
+
+
+def test_delay_is_the_clamped_percentile_of_recent_latencies():
+    hedger = RequestHedger(HedgeOptions(min_samples=10, max_delay_ms=80))
+    for ms in range(1, 101):
+        hedger.record_latency("serpapi.search", ms / 1000)
+        hedger.record_latency("http_fetch.get", ms / 1000 / 50)
+
+    assert hedger.delay_s("serpapi.search") == 0.08
+    # Below min_delay_ms the delay is raised to it
+    assert hedger.delay_s("http_fetch.get") == 0.01
+
+    hedger.options.max_delay_ms = 5000
+    assert hedger.delay_s("serpapi.search") == pytest.approx(0.095)
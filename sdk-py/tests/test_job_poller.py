@@ -0,0 +1,156 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import (
+    GatewayAuthError,
+    GatewayError,
+    GatewayRateLimitError,
+    GatewayUpstreamError,
+)
+from runrgateway.utils.job_poller import JobPoller, JobPollerOptions
+
+FAST_POLL = JobPollerOptions(min_interval=0.005, max_interval=0.05)
+
+
+class FakeJobs:
+    """Job fetcher backed by a dict of statuses, recording every lookup."""
+
+    def __init__(self, statuses, fail=None):
+        self.statuses = statuses
+        self.fail = list(fail or [])
+        self.batches = []
+        self.times = []
+
+    async def __call__(self, job_ids):
+        self.batches.append(list(job_ids))
+        self.times.append(time.monotonic())
+        if self.fail:
+            raise self.fail.pop(0)
+        return {
+            job_id: SimpleNamespace(job_id=job_id, status=self.statuses[job_id])
+            for job_id in job_ids
+            if job_id in self.statuses
+        }
+
+
+class LegacyJobsGateway(StandInGateway):
+    """A Gateway from before multi-id job lookups."""
+
+    def _route(self, request: httpx.Request, path: str) -> httpx.Response:
+        if path == "/api/jobs":
+            self.requests["legacy:/api/jobs"] += 1
+            return httpx.Response(404, json={"error": "Not found"})
+        return super()._route(request, path)
+
+
+@pytest.mark.asyncio
+async def test_outstanding_jobs_are_looked_up_in_batches():
+    fetch = FakeJobs({f"j{i}": "done" for i in range(5)})
+    poller = JobPoller(fetch, JobPollerOptions(min_interval=0.005, max_batch_size=2))
+    jobs = await asyncio.gather(*(poller.watch(f"j{i}") for i in range(5)))
+
+    assert [job.job_id for job in jobs] == [f"j{i}" for i in range(5)]
+    assert fetch.batches == [["j0", "j1"], ["j2", "j3"], ["j4"]]
+    assert poller.polls == 3
+    assert poller.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_interval_backs_off_until_a_status_changes():
+    fetch = FakeJobs({"j": "running"})
+    poller = JobPoller(
+        fetch, JobPollerOptions(min_interval=0.01, max_interval=0.08, backoff_factor=2)
+    )
+    future = poller.watch("j")
+    while len(fetch.times) < 5:
+        await asyncio.sleep(0.005)
+    gaps = [b - a for a, b in zip(fetch.times, fetch.times[1:])]
+    assert gaps[-1] > gaps[0] * 2
+
+    fetch.statuses["j"] = "done"
+    await asyncio.wait_for(future, 1)
+    await poller.close()
+
+
+@pytest.mark.asyncio
+async def test_transient_lookup_failures_are_retried():
+    fetch = FakeJobs(
+        {"j": "done"},
+        fail=[
+            GatewayUpstreamError("unavailable", 503),
+            GatewayRateLimitError("slow down", 1, 429),
+        ],
+    )
+    poller = JobPoller(fetch, FAST_POLL)
+    job = await asyncio.wait_for(poller.watch("j"), 1)
+    assert job.status == "done"
+    assert len(fetch.batches) == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error", [GatewayAuthError("Invalid token signature", 403), KeyError("jobs")]
+)
+async def test_fatal_lookup_failures_fail_the_batch(error):
+    fetch = FakeJobs({"j": "running"}, fail=[error])
+    poller = JobPoller(fetch, FAST_POLL)
+    with pytest.raises(type(error)):
+        await asyncio.wait_for(poller.watch("j"), 1)
+    assert poller.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_job_fails_with_not_found():
+    poller = JobPoller(FakeJobs({}), FAST_POLL)
+    with pytest.raises(GatewayError) as info:
+        await asyncio.wait_for(poller.watch("gone"), 1)
+    assert info.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_wait_for_job_timeout_keeps_polling(gateway, make_client):
+    gateway.job_duration_ms = 60
+    client = make_client(job_poller_options=FAST_POLL)
+    job_id = (await client.proxy_async("serpapi", "search", {"q": "x"}))["job_id"]
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.wait_for_job(job_id, timeout=0.01)
+    # The timeout only ends this wait; the shared future still resolves
+    future = client.job_future(job_id)
+    assert not future.cancelled()
+    job = await client.wait_for_job(job_id, timeout=1)
+    assert job.status == "done"
+    assert future.result() is job
+
+
+@pytest.mark.asyncio
+async def test_as_completed_yields_in_completion_order(gateway, make_client):
+    client = make_client(job_poller_options=FAST_POLL)
+    gateway.job_duration_ms = 150
+    slow = (await client.proxy_async("serpapi", "search", {"q": "slow"}))["job_id"]
+    gateway.job_duration_ms = 10
+    fast = (await client.proxy_async("serpapi", "search", {"q": "fast"}))["job_id"]
+
+    finished = [job.job_id async for job in client.as_completed([slow, fast, slow])]
+    assert finished == [fast, slow]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_single_job_lookups(make_client):
+    gateway = LegacyJobsGateway(job_duration_ms=10)
+    client = make_client(gateway, job_poller_options=FAST_POLL)
+    job_ids = [
+        (await client.proxy_async("serpapi", "search", {"q": str(i)}))["job_id"]
+        for i in range(3)
+    ]
+    jobs = await asyncio.wait_for(
+        asyncio.gather(*(client.job_future(job_id) for job_id in job_ids)), 1
+    )
+    assert [job.status for job in jobs] == ["done"] * 3
+    # The multi-id endpoint is tried once, then jobs are looked up one by one
+    assert gateway.requests["legacy:/api/jobs"] == 1
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from runrgateway.loadgen import LatencyHistogram, main, read_replay
+
+
+def _write(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+    return str(path)
+
+
+def test_empty_replay_file_names_the_file(tmp_path):
+    path = _write(tmp_path / "calls.jsonl", ["", "  "])
+    with pytest.raises(ValueError, match="calls.jsonl: replay file has no calls"):
+        read_replay(path, rate=10)
+
+
+def test_replay_keeps_recorded_timing_scaled_by_speed(tmp_path):
+    path = _write(
+        tmp_path / "calls.jsonl",
+        [
+            json.dumps({"tool": "serpapi", "action": "search", "offset_ms": 1000}),
+            json.dumps({"tool": "serpapi", "action": "search", "offset_ms": 0, "async": True}),
+        ],
+    )
+    calls = read_replay(path, speed=2)
+    assert [call.offset_s for call in calls] == [0.0, 0.5]
+    assert calls[0].is_async
+
+
+def test_replay_without_timing_needs_a_rate(tmp_path):
+    path = _write(tmp_path / "calls.jsonl", [json.dumps({"tool": "serpapi", "action": "search"})])
+    with pytest.raises(ValueError, match="pass a rate"):
+        read_replay(path)
+    assert [call.offset_s for call in read_replay(path, rate=4)] == [0.0]
+
+
+@pytest.mark.parametrize("kwargs", [{"speed": 0}, {"speed": -2}, {"rate": 0}, {"rate": -1}])
+def test_replay_rejects_speed_and_rate_below_zero(tmp_path, kwargs):
+    path = _write(
+        tmp_path / "calls.jsonl",
+        [json.dumps({"tool": "serpapi", "action": "search", "offset_ms": 0})],
+    )
+    with pytest.raises(ValueError, match="must be positive"):
+        read_replay(path, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--replay", "calls.jsonl", "--speed", "0"],
+        ["--replay", "calls.jsonl", "--rate", "-5"],
+        ["--rate", "0"],
+        ["--speed", "nan"],
+    ],
+)
+def test_cli_rejects_speed_and_rate_below_zero(capsys, args):
+    with pytest.raises(SystemExit) as info:
+        main(["--base-url", "http://gateway.test", "--agent-id", "agent-1", *args])
+    assert info.value.code == 2
+    assert "must be positive" in capsys.readouterr().err
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.01)
+    assert histogram.percentile(100) == 1.0
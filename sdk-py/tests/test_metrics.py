@@ -0,0 +1,131 @@
+import pytest
+
+from runrgateway import TokenOptions
+from runrgateway.utils.metrics import (
+    MetricsCollector,
+    RequestMetrics,
+    endpoint_label,
+    outcome_for_status,
+)
+
+PROXY = "/api/proxy-request"
+
+
+def _request(tool="serpapi", outcome="success", duration_s=0.02, statuses=(200,)):
+    return RequestMetrics(
+        PROXY,
+        "POST",
+        tool=tool,
+        action="search",
+        outcome=outcome,
+        duration_s=duration_s,
+        network_s=duration_s / 2,
+        attempt_statuses=list(statuses),
+        bytes_sent=100,
+        bytes_received=400,
+    )
+
+
+def _options(agent):
+    return TokenOptions(agent_id=agent, tools=["serpapi"], permissions=["read"], ttl_minutes=5)
+
+
+def test_exposition_format():
+    collector = MetricsCollector(buckets=(0.01, 0.1))
+    collector.record(_request(statuses=(503, 200)))
+    text = collector.to_openmetrics()
+    lines = text.splitlines()
+
+    assert text.endswith("\n# EOF\n")
+    assert "# TYPE runrgateway_requests counter" in lines
+    assert "# TYPE runrgateway_request_duration_seconds histogram" in lines
+    assert "# UNIT runrgateway_request_duration_seconds seconds" in lines
+    labels = 'endpoint="/api/proxy-request",tool="serpapi",action="search"'
+    assert f'runrgateway_requests_total{{{labels},outcome="success"}} 1' in lines
+    assert f'runrgateway_responses_total{{{labels},status="503"}} 1' in lines
+    assert f"runrgateway_retries_total{{{labels}}} 1" in lines
+    assert f"runrgateway_sent_bytes_total{{{labels}}} 100" in lines
+
+    # Buckets are cumulative, end at +Inf and come with a count and sum
+    duration = f'runrgateway_request_duration_seconds_bucket{{{labels},outcome="success"'
+    assert f'{duration},le="0.01"}} 0' in lines
+    assert f'{duration},le="0.1"}} 1' in lines
+    assert f'{duration},le="+Inf"}} 1' in lines
+    assert f'runrgateway_request_duration_seconds_count{{{labels},outcome="success"}} 1' in lines
+    assert f'runrgateway_request_duration_seconds_sum{{{labels},outcome="success"}} 0.02' in lines
+
+
+def test_label_values_are_escaped():
+    collector = MetricsCollector()
+    collector.record(_request(tool='we"ird\\tool\nname'))
+    assert 'tool="we\\"ird\\\\tool\\nname"' in collector.to_openmetrics()
+
+
+def test_merge_adds_counters_and_histograms():
+    parent, worker = MetricsCollector(), MetricsCollector()
+    parent.record(_request())
+    worker.record(_request())
+    worker.record(_request(outcome="server_error", statuses=(503, 503)))
+    parent.merge(worker)
+
+    labels = {"endpoint": PROXY, "tool": "serpapi", "action": "search"}
+    assert parent.counter("requests", outcome="success", **labels) == 2
+    assert parent.counter("requests", outcome="server_error", **labels) == 1
+    assert parent.counter("retries", **labels) == 1
+    assert parent.histogram("request_network_seconds", **labels) == {
+        "count": 3,
+        "sum": pytest.approx(0.03),
+    }
+
+    with pytest.raises(ValueError):
+        parent.merge(MetricsCollector(buckets=(1.0,)))
+    with pytest.raises(ValueError):
+        parent.merge(MetricsCollector(prefix="other"))
+
+
+def test_hooks_receive_every_request():
+    seen = []
+    collector = MetricsCollector(hooks=[seen.append])
+    collector.add_hook(lambda metrics: seen.append(metrics.tool))
+    request = _request()
+    collector.record(request)
+    assert seen == [request, "serpapi"]
+
+    # Merged samples were already passed to the worker's hooks
+    collector.merge(MetricsCollector())
+    assert len(seen) == 2
+
+
+def test_reset_drops_samples():
+    collector = MetricsCollector()
+    collector.record(_request())
+    collector.reset()
+    # Only the metadata lines are left
+    assert all(line.startswith("# ") for line in collector.to_openmetrics().splitlines())
+
+
+def test_labels_and_outcomes():
+    assert endpoint_label("/api/jobs/4f1c?wait=1") == "/api/jobs/:job_id"
+    assert endpoint_label("/api/jobs?ids=a,b") == "/api/jobs"
+    assert outcome_for_status(None) == "network_error"
+    assert outcome_for_status(429) == "rate_limited"
+    assert outcome_for_status(502) == "server_error"
+    assert outcome_for_status(404) == "client_error"
+    assert outcome_for_status(504, "DEADLINE_EXCEEDED") == "deadline_exceeded"
+
+
+@pytest.mark.asyncio
+async def test_client_records_single_and_batched_token_issuance(make_client):
+    collector = MetricsCollector()
+    client = make_client(metrics=collector)
+    await client.get_token(_options("agent-1"))
+    await client.get_tokens([_options("a"), _options("b")])
+
+    single = collector.histogram(
+        "token_issue_seconds", endpoint="/api/generate-token", outcome="success"
+    )
+    batched = collector.histogram(
+        "token_issue_seconds", endpoint="/api/generate-tokens", outcome="success"
+    )
+    assert single["count"] == 1
+    assert batched["count"] == 1
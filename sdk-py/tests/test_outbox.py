@@ -0,0 +1,85 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.utils.outbox import PENDING, SENT, Outbox, OutboxOptions
+
+
+class IntentGateway(StandInGateway):
+    """Records the intent of every proxy request."""
+
+    def __init__(self):
+        super().__init__()
+        self.intents = []
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        self.intents.append(json.loads(request.content).get("intent"))
+        return super()._proxy_request(request)
+
+
+def test_enqueue_without_a_running_loop(tmp_path, make_client):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    client = make_client(outbox=outbox)
+
+    key = client.enqueue_async("gmail_send", "send", {"to": "a@example.com"})
+    assert outbox.get(key).status == PENDING
+
+    assert asyncio.run(client.flush_outbox()) == 1
+    assert outbox.get(key).status == SENT
+
+
+@pytest.mark.asyncio
+async def test_entries_keep_the_intent_they_were_queued_with(tmp_path, make_client):
+    gateway = IntentGateway()
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    client = make_client(gateway, outbox=outbox)
+
+    client.set_intent("outreach_send")
+    client.enqueue_async("gmail_send", "send", {"to": "a@example.com"})
+    client.set_intent("")
+    client.enqueue_async("gmail_send", "send", {"to": "b@example.com"})
+    # The flusher only runs once this test yields, after the intent moved on
+    client.set_intent("lead_discovery")
+
+    await client.flush_outbox()
+    while outbox.stats()[SENT] < 2:
+        await asyncio.sleep(0.01)
+    assert sorted(gateway.intents, key=str) == [None, "outreach_send"]
+
+
+@pytest.mark.asyncio
+async def test_redelivered_entry_maps_to_the_same_job(tmp_path, make_client):
+    gateway = StandInGateway()
+    outbox = Outbox(str(tmp_path / "outbox.db"), OutboxOptions(lease_ms=0))
+    client = make_client(gateway, outbox=outbox)
+
+    key = client.enqueue_async("gmail_send", "send", {"to": "a@example.com"}, "welcome-42")
+    entry = (await asyncio.to_thread(outbox.claim, 10))[0]
+    # A second sender picks the entry up again once the lease has expired
+    first = await client._send_outbox_entry(entry)
+    assert await client.flush_outbox() == 1
+    assert outbox.get(key).job_id == first
+    assert gateway._job_keys == {"welcome-42": first}
+
+
+@pytest.mark.asyncio
+async def test_flusher_keeps_sqlite_off_the_event_loop(tmp_path, make_client, monkeypatch):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    client = make_client(outbox=outbox)
+    threads = set()
+    for name in ("claim", "mark_sent", "mark_failed"):
+        method = getattr(outbox, name)
+
+        def _recorded(*args, _method=method):
+            threads.add(threading.get_ident())
+            return _method(*args)
+
+        monkeypatch.setattr(outbox, name, _recorded)
+
+    client.enqueue_async("gmail_send", "send", {"to": "a@example.com"})
+    await client.flush_outbox()
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import pytest
+
+from runrgateway.utils.response_cache import DiskCacheBackend, ResponseCache
+
+
+def _proxied(gateway) -> int:
+    return gateway.requests["/api/proxy-request"]
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_entries=2)
+    await cache.set("a", 1, 60000)
+    await cache.set("b", 2, 60000)
+    assert await cache.get("a") == 1
+    await cache.set("c", 3, 60000)
+
+    # "b" was least recently used
+    with pytest.raises(KeyError):
+        await cache.get("b")
+    assert await cache.get("a") == 1
+
+    await cache.set("short", 4, 10)
+    await asyncio.sleep(0.02)
+    with pytest.raises(KeyError):
+        await cache.get("short")
+    assert cache.stats()["evictions"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_client_caches_reads_only(gateway, make_client):
+    client = make_client(response_cache=ResponseCache(tool_ttls_ms={"serpapi": 60000}))
+    first = await client.proxy("serpapi", "search", {"q": "plumbers"})
+    assert await client.proxy("serpapi", "search", {"q": "plumbers"}) == first
+    assert _proxied(gateway) == 1
+
+    await client.proxy("openai", "chat", {"input": "x"})
+    await client.proxy("openai", "chat", {"input": "x"})
+    assert _proxied(gateway) == 3
+
+
+@pytest.mark.asyncio
+async def test_key_includes_explicit_token_and_intent(gateway, make_client):
+    client = make_client(response_cache=ResponseCache())
+    params = {"q": "plumbers"}
+    await client.proxy("serpapi", "search", params)
+    await client.proxy("serpapi", "search", params, agent_token="other.token")
+    await client.proxy("serpapi", "search", params, agent_token="third.token")
+    assert _proxied(gateway) == 3
+    # Each token is then served from its own entry
+    await client.proxy("serpapi", "search", params, agent_token="other.token")
+    assert _proxied(gateway) == 3
+
+    client.set_intent("lead_discovery")
+    await client.proxy("serpapi", "search", params)
+    await client.proxy("serpapi", "search", params)
+    assert _proxied(gateway) == 4
+
+
+@pytest.mark.asyncio
+async def test_disk_backend_shares_entries_off_the_event_loop(tmp_path, monkeypatch):
+    backend = DiskCacheBackend(str(tmp_path / "cache.db"))
+    threads = set()
+    backend_get = backend.get
+
+    def _get(key):
+        threads.add(threading.get_ident())
+        return backend_get(key)
+
+    monkeypatch.setattr(backend, "get", _get)
+    await ResponseCache(backend=backend).set("k", {"v": 1}, 60000)
+
+    # A fresh in-memory tier is filled from disk
+    cache = ResponseCache(backend=backend)
+    assert await cache.get("k") == {"v": 1}
+    assert threads and threading.get_ident() not in threads
+    backend.close()
+
+
+def test_disk_backend_purges_and_trims_on_write(tmp_path):
+    backend = DiskCacheBackend(str(tmp_path / "cache.db"), max_entries=10)
+    backend.set("expired", 1, 0)
+    for index in range(25):
+        backend.set(f"k{index}", index, 2e9 + index)
+
+    count = backend._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    assert count <= 10
+    assert backend._conn.execute(
+        "SELECT COUNT(*) FROM responses WHERE key = 'expired'"
+    ).fetchone()[0] == 0
+    # Entries closest to expiry are dropped first
+    assert backend.get("k24")[0] == 24
+
+    backend.purge_expired()
+    assert backend._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 10
+    backend.close()
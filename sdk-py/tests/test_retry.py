@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import (
+    GatewayCircuitOpenError,
+    GatewayPolicyError,
+    GatewayUpstreamError,
+)
+from runrgateway.utils.retry import (
+    CircuitBreaker,
+    CircuitBreakers,
+    RetryBudget,
+    RetryOptions,
+    with_retry,
+)
+
+NO_RETRY = RetryOptions(max_retries=0)
+
+
+def _failing(calls):
+    async def _call():
+        calls.append(1)
+        raise GatewayUpstreamError("upstream down", 503)
+
+    return _call
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker("tool:serpapi", failure_threshold=3, reset_timeout_ms=60000)
+    calls = []
+    for _ in range(3):
+        with pytest.raises(GatewayUpstreamError):
+            await with_retry(_failing(calls), NO_RETRY, breaker=breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(GatewayCircuitOpenError) as info:
+        await with_retry(_failing(calls), NO_RETRY, breaker=breaker)
+    assert len(calls) == 3
+    assert 0 < info.value.retry_after <= 60
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_trial_closes_or_reopens():
+    breaker = CircuitBreaker("tool:serpapi", failure_threshold=1, reset_timeout_ms=20)
+    with pytest.raises(GatewayUpstreamError):
+        await with_retry(_failing([]), NO_RETRY, breaker=breaker)
+    await asyncio.sleep(0.03)
+
+    # A failed trial opens the breaker again straight away
+    with pytest.raises(GatewayUpstreamError):
+        await with_retry(_failing([]), NO_RETRY, breaker=breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    await asyncio.sleep(0.03)
+
+    async def _ok():
+        return "ok"
+
+    assert await with_retry(_ok, NO_RETRY, breaker=breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_allows_one_trial_at_a_time():
+    breaker = CircuitBreaker("tool:serpapi", failure_threshold=1, reset_timeout_ms=0)
+    breaker.on_failure()
+    release = asyncio.Event()
+
+    async def _slow():
+        await release.wait()
+        return "ok"
+
+    trial = asyncio.ensure_future(with_retry(_slow, NO_RETRY, breaker=breaker))
+    await asyncio.sleep(0)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(GatewayCircuitOpenError):
+        await with_retry(_slow, NO_RETRY, breaker=breaker)
+
+    # A cancelled trial gives its slot back
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    release.set()
+    assert await with_retry(_slow, NO_RETRY, breaker=breaker) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_do_not_trip_the_breaker():
+    breaker = CircuitBreaker("tool:gmail_send", failure_threshold=1)
+
+    async def _denied():
+        raise GatewayPolicyError("Policy denied", 403)
+
+    for _ in range(3):
+        with pytest.raises(GatewayPolicyError):
+            await with_retry(_denied, NO_RETRY, breaker=breaker)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_budget_caps_retries_at_ratio_of_requests():
+    budget = RetryBudget(ratio=0.5, min_retries_per_second=0, window_s=10)
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_acquire_retry() for _ in range(3)] == [True, True, False]
+    assert budget.rejected == 1
+
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_acquire_retry() is True
+
+
+@pytest.mark.asyncio
+async def test_spent_budget_stops_retries():
+    budget = RetryBudget(ratio=0, min_retries_per_second=0.1, window_s=10)
+    options = RetryOptions(max_retries=3, base_delay=0.001, jitter=False)
+    calls = []
+    with pytest.raises(GatewayUpstreamError):
+        await with_retry(_failing(calls), options, budget=budget)
+    # One retry allowed by the floor, then the budget is spent
+    assert len(calls) == 2
+    assert budget.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_client_breaker_is_per_tool(make_client):
+    client = make_client(
+        StandInGateway(error_rate=1.0, seed=1),
+        retry_options=RetryOptions(max_retries=0),
+        circuit_breakers=CircuitBreakers(failure_threshold=2, reset_timeout_ms=60000),
+    )
+    for _ in range(2):
+        with pytest.raises(GatewayUpstreamError):
+            await client.proxy("serpapi", "search", {"q": "x"})
+    with pytest.raises(GatewayCircuitOpenError):
+        await client.proxy("serpapi", "search", {"q": "x"})
+
+    states = client._circuit_breakers.states()
+    assert states["tool:serpapi"] == CircuitBreaker.OPEN
+    with pytest.raises(GatewayUpstreamError):
+        await client.proxy("http_fetch", "get", {"url": "https://example.com"})
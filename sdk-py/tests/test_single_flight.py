@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway import GatewayDeadlineError
+from runrgateway.utils.retry import RetryOptions
+from runrgateway.utils.singleflight import SingleFlight
+
+
+class FlakyGateway(StandInGateway):
+    """Fails the first `failures` proxy requests with a 503."""
+
+    def __init__(self, failures: int = 0, latency_ms: float = 0.0):
+        super().__init__(latency_ms=latency_ms)
+        self.failures = failures
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        if self.failures > 0:
+            self.failures -= 1
+            return httpx.Response(503, json={"error": "External API request failed"})
+        return super()._proxy_request(request)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fn():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+    assert results == [1] * 5
+    assert flight.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_kept():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def ok():
+        return "fresh"
+
+    assert await flight.do("k", ok) == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_flight():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", slow))
+    second = asyncio.ensure_future(flight.do("k", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
+
+
+@pytest.mark.asyncio
+async def test_identical_reads_are_coalesced(make_client, gateway):
+    client = make_client(coalesce_reads=True)
+    # Issue the cached token first, so the calls below start together
+    await client.proxy("serpapi", "search", {"q": "warm-up"})
+    results = await asyncio.gather(
+        *(client.proxy("serpapi", "search", {"q": "plumbers"}) for _ in range(10))
+    )
+    assert all(result == results[0] for result in results)
+    assert gateway.requests["/api/proxy-request"] == 2
+
+
+@pytest.mark.asyncio
+async def test_reads_with_different_tokens_are_not_coalesced(make_client):
+    gateway = StandInGateway(latency_ms=5)
+    client = make_client(transport=gateway, coalesce_reads=True)
+    await asyncio.gather(
+        client.proxy("serpapi", "search", {"q": "plumbers"}, agent_token="a.token"),
+        client.proxy("serpapi", "search", {"q": "plumbers"}, agent_token="b.token"),
+        client.proxy("serpapi", "search", {"q": "plumbers"}, agent_token="b.token"),
+    )
+    assert gateway.requests["/api/proxy-request"] == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_flight_ignores_the_first_callers_deadline(make_client):
+    # The first attempt fails and the retry waits longer than the short
+    # deadline, so only a flight free of that deadline gets to retry
+    gateway = FlakyGateway(failures=1, latency_ms=5)
+    client = make_client(
+        transport=gateway,
+        coalesce_reads=True,
+        retry_options=RetryOptions(max_retries=1, base_delay=0.6, jitter=False),
+    )
+    short = asyncio.ensure_future(
+        client.proxy("serpapi", "search", {"q": "x"}, deadline_ms=400)
+    )
+    await asyncio.sleep(0)
+    long = asyncio.ensure_future(
+        client.proxy("serpapi", "search", {"q": "x"}, deadline_ms=5000)
+    )
+
+    with pytest.raises(GatewayDeadlineError):
+        await short
+    result = await long
+    assert result["search_parameters"] == {"q": "x"}
+    assert gateway.requests["/api/proxy-request"] == 2
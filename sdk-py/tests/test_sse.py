@@ -0,0 +1,181 @@
+import json
+import time
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import GatewayError
+from runrgateway.utils.retry import RetryOptions
+from runrgateway.utils.sse import (
+    StreamConnected,
+    StreamEnd,
+    StreamError,
+    StreamEvent,
+    parse_sse,
+)
+
+LOGS = "/api/runs/run-1/logs/stream"
+
+
+async def _lines(*lines):
+    for line in lines:
+        yield line
+
+
+async def _parse(*lines, **kwargs):
+    return [event async for event in parse_sse(_lines(*lines), **kwargs)]
+
+
+def _sse(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class _Body(httpx.AsyncByteStream):
+    """Response body that sends `chunks`, then drops the connection if asked."""
+
+    def __init__(self, chunks, drop=False):
+        self.chunks = chunks
+        self.drop = drop
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.drop:
+            raise httpx.ReadError("Connection reset by peer")
+
+
+class StreamingGateway(StandInGateway):
+    """Serves run logs as SSE, answering each connection with the next script entry."""
+
+    def __init__(self, *connections):
+        super().__init__()
+        self.connections = list(connections)
+        self.last_event_ids = []
+
+    def _route(self, request: httpx.Request, path: str) -> httpx.Response:
+        if path != LOGS:
+            return super()._route(request, path)
+        self.last_event_ids.append(request.headers.get("Last-Event-ID"))
+        response = self.connections.pop(0) if len(self.connections) > 1 else self.connections[0]
+        if isinstance(response, httpx.Response):
+            return response
+        chunks, drop = response
+        return httpx.Response(
+            200, headers={"Content-Type": "text/event-stream"}, stream=_Body(chunks, drop)
+        )
+
+
+@pytest.mark.asyncio
+async def test_multi_line_data_is_joined_and_comments_are_skipped():
+    events = await _parse(
+        ": keepalive",
+        "data: first line",
+        "data:second line",
+        ": another comment",
+        "",
+        "",
+        "event: progress",
+        'data: {"done": 3}',
+        "",
+    )
+    assert [(event.event, event.data) for event in events] == [
+        ("message", "first line\nsecond line"),
+        ("progress", {"done": 3}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_event_id_carries_over_to_later_events():
+    events = await _parse("id: 7", "data: a", "", "data: b", "", "id: 8", "data: c", "")
+    assert [event.id for event in events] == ["7", "7", "8"]
+
+
+@pytest.mark.asyncio
+async def test_gateway_events_are_typed():
+    events = await _parse(
+        'data: {"type": "connection", "message": "Connected to Sentinel"}',
+        "",
+        "event: connected",
+        'data: {"run_id": "run-1"}',
+        "",
+        "event: error",
+        'data: {"error": "Run not found"}',
+        "",
+        "event: end",
+        'data: {"status": "complete"}',
+        "",
+    )
+    assert [type(event) for event in events] == [
+        StreamConnected,
+        StreamConnected,
+        StreamError,
+        StreamEnd,
+    ]
+    assert events[2].message == "Run not found"
+    assert all(isinstance(event, StreamEvent) for event in events)
+
+
+@pytest.mark.asyncio
+async def test_oversized_event_is_rejected():
+    with pytest.raises(GatewayError) as info:
+        await _parse("data: " + "x" * 6, "data: " + "y" * 6, "", max_event_bytes=10)
+    assert info.value.code == "STREAM_ERROR"
+    # The limit is per event, not per stream
+    assert len(await _parse("data: 12345", "", "data: 12345", "", max_event_bytes=5)) == 2
+
+
+@pytest.mark.asyncio
+async def test_dropped_stream_resumes_from_the_last_event_id(make_client):
+    gateway = StreamingGateway(
+        ([_sse(1, "connected", {}), _sse(2, "log", {"line": "a"})], True),
+        ([_sse(3, "log", {"line": "b"}), _sse(4, "end", {})], False),
+    )
+    client = make_client(gateway)
+    events = [event async for event in client.stream_run_logs("run-1")]
+
+    assert [event.id for event in events] == ["1", "2", "3", "4"]
+    assert isinstance(events[0], StreamConnected)
+    assert isinstance(events[-1], StreamEnd)
+    assert gateway.last_event_ids == [None, "2"]
+
+
+@pytest.mark.asyncio
+async def test_reconnects_give_up_after_max_reconnects(make_client):
+    unavailable = httpx.Response(503, json={"error": "Service unavailable"})
+    gateway = StreamingGateway(unavailable)
+    backoff = RetryOptions(base_delay=0.02, max_delay=1, jitter=False)
+    client = make_client(gateway, retry_options=backoff)
+
+    started = time.perf_counter()
+    with pytest.raises(GatewayError) as info:
+        async for _ in client.stream_run_logs("run-1", max_reconnects=2):
+            pass
+    assert info.value.status_code == 503
+    assert gateway.requests[LOGS] == 3
+    # Backed off 20ms, then 40ms
+    assert time.perf_counter() - started >= 0.06
+
+
+@pytest.mark.asyncio
+async def test_events_reset_the_reconnect_count(make_client):
+    dropped = ([_sse(1, "log", {})], True)
+    gateway = StreamingGateway(dropped, dropped, dropped, ([_sse(2, "end", {})], False))
+    client = make_client(gateway)
+
+    # Each connection delivers an event before dropping, so one reconnect is enough
+    events = [event async for event in client.stream_run_logs("run-1", max_reconnects=1)]
+    assert len(events) == 4
+    assert gateway.requests[LOGS] == 4
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_are_not_retried(make_client):
+    gateway = StreamingGateway(httpx.Response(404, json={"error": "Run not found"}))
+    client = make_client(gateway)
+
+    with pytest.raises(GatewayError) as info:
+        async for _ in client.stream_run_logs("run-1"):
+            pass
+    assert info.value.status_code == 404
+    assert gateway.requests[LOGS] == 1
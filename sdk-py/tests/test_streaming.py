@@ -0,0 +1,157 @@
+import io
+import json
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import GatewayAuthError, GatewayError, GatewayUpstreamError
+from runrgateway.utils.streaming import iter_json_items, write_chunks
+
+RESULTS = "data.organic_results.item"
+
+
+class _Chunks:
+    """Async byte iterator over fixed chunks that records whether it was closed."""
+
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+    async def aclose(self):
+        self.closed = True
+
+
+class _Body(httpx.AsyncByteStream):
+    def __init__(self, content, drop=False):
+        self.content = content
+        self.drop = drop
+
+    async def __aiter__(self):
+        yield self.content
+        if self.drop:
+            raise httpx.ReadError("Connection reset by peer")
+
+
+class ScriptedGateway(StandInGateway):
+    """Answers proxy calls with `response`, or with a body that drops after it."""
+
+    def __init__(self, response=None, drop=False, **kwargs):
+        super().__init__(**kwargs)
+        self.response = response
+        self.drop = drop
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        if self.response is not None:
+            return self.response
+        response = super()._proxy_request(request)
+        return httpx.Response(response.status_code, stream=_Body(response.content, self.drop))
+
+
+class AsyncSink:
+    def __init__(self):
+        self.data = b""
+
+    async def write(self, chunk):
+        self.data += chunk
+
+
+@pytest.mark.asyncio
+async def test_proxy_stream_yields_the_envelope_in_chunks(make_client):
+    client = make_client(StandInGateway(result_size=50))
+    stream = client.proxy_stream("serpapi", "search", {"q": "x"}, chunk_size=512)
+    chunks = [chunk async for chunk in stream]
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 512 for chunk in chunks)
+    envelope = json.loads(b"".join(chunks))
+    assert envelope["success"] is True
+    assert len(envelope["data"]["organic_results"]) == 50
+
+
+@pytest.mark.asyncio
+async def test_items_are_yielded_before_the_body_ends():
+    pytest.importorskip("ijson")
+    chunks = _Chunks(b'{"data": [{"a": 1}, {"a"', b": 2.5}, ", b'"later"]}')
+    items = iter_json_items(chunks, "data.item")
+
+    assert await items.__anext__() == {"a": 1}
+    # The second item straddles a chunk boundary
+    assert await items.__anext__() == {"a": 2.5}
+    assert chunks.chunks == [b'"later"]}']
+    assert [item async for item in items] == ["later"]
+    assert chunks.closed
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_is_a_decode_error():
+    pytest.importorskip("ijson")
+    chunks = _Chunks(b'{"data": [1, 2', b"}}")
+    with pytest.raises(GatewayError) as info:
+        [item async for item in iter_json_items(chunks, "data.item")]
+    assert info.value.code == "DECODE_ERROR"
+    assert chunks.closed
+
+
+@pytest.mark.asyncio
+async def test_proxy_stream_items_parses_results(make_client):
+    pytest.importorskip("ijson")
+    client = make_client(StandInGateway(result_size=20))
+    stream = client.proxy_stream_items("serpapi", "search", {"q": "x"}, RESULTS)
+    items = [item async for item in stream]
+    assert [item["position"] for item in items] == list(range(20))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sink", [io.BytesIO(), AsyncSink()], ids=["sync", "async"])
+async def test_proxy_to_file_writes_to_sync_and_async_sinks(make_client, sink):
+    client = make_client(StandInGateway(result_size=30))
+    written = await client.proxy_to_file("serpapi", "search", {"q": "x"}, sink)
+
+    data = sink.getvalue() if isinstance(sink, io.BytesIO) else sink.data
+    assert written == len(data)
+    assert len(json.loads(data)["data"]["organic_results"]) == 30
+
+
+@pytest.mark.asyncio
+async def test_write_chunks_closes_the_stream_when_the_sink_fails():
+    class BrokenSink:
+        def write(self, chunk):
+            raise OSError("disk full")
+
+    chunks = _Chunks(b"a", b"b")
+    with pytest.raises(OSError):
+        await write_chunks(chunks, BrokenSink())
+    assert chunks.closed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status, error_type",
+    [(403, GatewayAuthError), (502, GatewayUpstreamError), (404, GatewayError)],
+)
+async def test_error_status_is_raised_as_gateway_error(make_client, status, error_type):
+    gateway = ScriptedGateway(httpx.Response(status, json={"error": "Nope"}))
+    client = make_client(gateway)
+
+    with pytest.raises(error_type) as info:
+        async for _ in client.proxy_stream("serpapi", "search", {"q": "x"}):
+            pass
+    assert info.value.status_code == status
+    assert info.value.message == "Nope"
+
+
+@pytest.mark.asyncio
+async def test_dropped_body_is_a_network_error(make_client):
+    client = make_client(ScriptedGateway(drop=True))
+    with pytest.raises(GatewayError) as info:
+        await client.proxy_to_file("serpapi", "search", {"q": "x"}, io.BytesIO())
+    assert info.value.code == "NETWORK_ERROR"
@@ -0,0 +1,53 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+from standin import StandInGateway
+
+from runrgateway.client import TokenOptions
+from runrgateway.utils.token_cache import make_token_key
+
+
+def _token_agent(token: str) -> str:
+    return json.loads(base64.b64decode(token.split(".")[0]))["agent_id"]
+
+
+class RotatingGateway(StandInGateway):
+    """Recommends rotating the token of every proxy request."""
+
+    def _proxy_request(self, request: httpx.Request) -> httpx.Response:
+        response = super()._proxy_request(request)
+        response.headers["X-Token-Rotation-Recommended"] = "true"
+        return response
+
+
+@pytest.mark.asyncio
+async def test_get_tokens_primes_the_cache_per_agent(make_client):
+    client = make_client()
+    results = await client.get_tokens(
+        [
+            TokenOptions(agent_id=agent, tools=["serpapi"], permissions=["read"], ttl_minutes=5)
+            for agent in ("a", "b")
+        ]
+    )
+    assert [_token_agent(token) for token in results] == ["a", "b"]
+    cached = client._token_cache.peek(make_token_key("b", ["serpapi"], ["read"]))
+    assert cached.token == results[1]
+
+
+@pytest.mark.asyncio
+async def test_rotation_reissues_for_the_cached_tokens_agent(make_client):
+    client = make_client(transport=RotatingGateway())
+    [token_b] = await client.get_tokens(
+        [TokenOptions(agent_id="b", tools=["serpapi"], permissions=["read"], ttl_minutes=5)]
+    )
+    await client.proxy("serpapi", "search", {"q": "x"}, agent_token=token_b)
+    # Let the background refresh finish
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+
+    cached = client._token_cache.peek(make_token_key("b", ["serpapi"], ["read"]))
+    assert cached.token != token_b
+    assert _token_agent(cached.token) == "b"
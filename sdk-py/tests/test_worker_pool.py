@@ -0,0 +1,89 @@
+import asyncio
+import os
+
+import pytest
+from standin import StandInGateway
+
+from runrgateway.errors import GatewayError, GatewayRateLimitError
+from runrgateway.utils.worker_pool import WorkerPool, WorkerPoolOptions
+
+
+# Handlers are pickled into spawned workers by reference, so they live at module level
+async def _handler(client, item):
+    kind, value = item
+    if kind == "sleep":
+        await asyncio.sleep(value)
+        return os.getpid()
+    if kind == "rate_limited":
+        raise GatewayRateLimitError("Rate limit exceeded", value, 429)
+    if kind == "fail":
+        raise ValueError(value)
+    result = await client.proxy("serpapi", "search", {"q": value})
+    return result["search_parameters"]["q"]
+
+
+def _pool(options, **kwargs):
+    return WorkerPool(
+        "http://gateway.test", "agent-1", "", options, transport=StandInGateway(), **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_items_in_workers_and_drains_on_close():
+    pool = _pool(
+        WorkerPoolOptions(processes=2, concurrency=4, metrics_interval_s=0.05),
+        handler=_handler,
+    )
+    await pool.start()
+    try:
+        assert await pool.submit(("proxy", "plumbers")) == "plumbers"
+        pids = await asyncio.gather(*(pool.submit(("sleep", 0.05)) for _ in range(8)))
+        assert os.getpid() not in pids
+
+        items = [("sleep", 0.05 if i % 2 else 0.0) for i in range(6)]
+        ordered = [index async for index, _ in pool.map(items, ordered=True)]
+        assert ordered == list(range(6))
+        unordered = [index async for index, _ in pool.map(items)]
+        assert sorted(unordered) == list(range(6))
+
+        # Errors come back as the GatewayError subclass that was raised
+        with pytest.raises(GatewayRateLimitError) as info:
+            await pool.submit(("rate_limited", 7))
+        assert (info.value.retry_after, info.value.status_code) == (7, 429)
+        with pytest.raises(GatewayError) as info:
+            await pool.submit(("fail", "bad item"))
+        assert info.value.code == "CLIENT_ERROR"
+        assert "bad item" in info.value.message
+        failures = [r async for _, r in pool.map([("fail", "x"), ("proxy", "y")])]
+        assert sorted(map(type, failures), key=str) == [GatewayError, str]
+
+        # Items already submitted finish; one past the timeout is cut off
+        quick = asyncio.ensure_future(pool.submit(("sleep", 0.1)))
+        stuck = asyncio.ensure_future(pool.submit(("sleep", 30)))
+        await asyncio.sleep(0.05)
+    finally:
+        await pool.close(timeout_s=1)
+
+    assert isinstance(await quick, int)
+    with pytest.raises(GatewayError, match="closed before the item finished"):
+        await stuck
+    assert pool.stats()["workers"] == 0
+    with pytest.raises(GatewayError):
+        await pool.submit(("proxy", "late"))
+
+    # The workers' request metrics were merged into the parent's collector
+    assert pool.metrics.counter(
+        "requests",
+        endpoint="/api/proxy-request",
+        tool="serpapi",
+        action="search",
+        outcome="success",
+    ) == 2
+
+
+@pytest.mark.asyncio
+async def test_default_handler_runs_proxy_calls():
+    async with _pool(WorkerPoolOptions(processes=1)) as pool:
+        result = await pool.submit(("serpapi", "search", {"q": "plumbers"}))
+        assert result["search_parameters"]["q"] == "plumbers"
+    assert pool.stats()["completed"] == 1
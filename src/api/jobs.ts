@@ -0,0 +1,93 @@
+import { FastifyInstance, FastifyRequest } from 'fastify'
+import { memoryDB } from '../models/memory-db'
+import { isTokenExpired } from '../utils/token-utils'
+import { checkToken, TokenCheck } from './proxy'
+
+// Upper bound on ids accepted by a single multi-id lookup
+const MAX_JOB_IDS = 100
+
+function serializeJob(job: any) {
+  return {
+    job_id: job.id,
+    status: job.status,
+    result: job.result,
+    error: job.error,
+    updated_at: job.updatedAt.toISOString()
+  }
+}
+
+// Identify the agent from an `Authorization: Bearer <agent_token>` header;
+// jobs are only visible to the agent that submitted them
+async function authenticate(request: FastifyRequest): Promise<TokenCheck> {
+  const header = request.headers.authorization || ''
+  const [scheme, agentToken] = header.split(' ')
+  if (scheme !== 'Bearer' || !agentToken) {
+    return { ok: false, status: 401, body: { error: 'Agent token required: Authorization: Bearer <agent_token>' } }
+  }
+
+  const tokenCheck = await checkToken(agentToken)
+  if (tokenCheck.ok && isTokenExpired(tokenCheck.tokenData.expires_at)) {
+    return { ok: false, status: 403, body: { error: 'Token expired' } }
+  }
+  return tokenCheck
+}
+
+export async function jobRoutes(server: FastifyInstance) {
+  // GET /jobs?ids=a,b,c - Get the status of many jobs in one request
+  // Jobs of other agents are reported as missing
+  server.get('/jobs', async (request, reply) => {
+    try {
+      const tokenCheck = await authenticate(request)
+      if (!tokenCheck.ok) {
+        return reply.code(tokenCheck.status).send(tokenCheck.body)
+      }
+
+      const { ids } = request.query as { ids?: string }
+
+      if (!ids) {
+        return reply.code(400).send({ error: 'ids query parameter is required' })
+      }
+
+      const jobIds = Array.from(new Set(ids.split(',').map(id => id.trim()).filter(Boolean)))
+      if (jobIds.length > MAX_JOB_IDS) {
+        return reply.code(400).send({ error: `At most ${MAX_JOB_IDS} job ids can be requested at once` })
+      }
+
+      const agentId = tokenCheck.tokenData.agent_id
+      const jobs = (await memoryDB.findJobsByIds(jobIds)).filter(job => job.agentId === agentId)
+      const found = new Set(jobs.map(job => job.id))
+
+      return reply.send({
+        jobs: jobs.map(serializeJob),
+        missing: jobIds.filter(id => !found.has(id))
+      })
+    } catch (error) {
+      console.error('Error fetching jobs:', error)
+      return reply.code(500).send({ error: 'Internal server error while fetching jobs.' })
+    }
+  })
+
+  // GET /jobs/:job_id - Get the status of a single job
+  server.get('/jobs/:job_id', async (request, reply) => {
+    try {
+      const tokenCheck = await authenticate(request)
+      if (!tokenCheck.ok) {
+        return reply.code(tokenCheck.status).send(tokenCheck.body)
+      }
+
+      const { job_id } = request.params as { job_id: string }
+
+      // Another agent's job is reported as not found rather than forbidden,
+      // so job ids cannot be probed
+      const job = await memoryDB.findJobById(job_id)
+      if (!job || job.agentId !== tokenCheck.tokenData.agent_id) {
+        return reply.code(404).send({ error: 'Job not found.' })
+      }
+
+      return reply.send(serializeJob(job))
+    } catch (error) {
+      console.error('Error fetching job:', error)
+      return reply.code(500).send({ error: 'Internal server error while fetching job.' })
+    }
+  })
+}
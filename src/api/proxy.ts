@@ -11,6 +11,7 @@ import { validateToolParameters, sanitizeParameters } from '../policies/validato
 import { generateCorrelationId } from '../runtime/http'
 import { executeWithCircuitBreaker } from '../runtime/circuit'
 import { executeWithRetry } from '../runtime/retry'
+import { checkDeadline, parseDeadline, withDeadline } from '../runtime/deadline'
 import { 
   recordRequest, 
   recordRequestDuration, 
@@ -43,6 +44,9 @@ interface ProxyRequestBody {
   tool: string
   action: string
   params: Record<string, any>
+  async?: boolean
+  // Async only: resubmitting under the same key returns the first job
+  idempotency_key?: string
 }
 
 // Type definitions for decrypted token data
@@ -56,351 +60,557 @@ interface TokenData {
   issued_at: string
 }
 
-export async function proxyRoutes(server: FastifyInstance) {
-  // Log the current upstream mode
-  console.log(`🚀 4Runr Gateway starting in ${currentMode.toUpperCase()} mode`)
-  
-  // POST /proxy-request - Proxy agent requests to external APIs
-  server.post('/proxy-request', async (request, reply) => {
-    // Check if shutdown is in progress
-    if (isShutdownInProgress()) {
-      return reply.code(503).send({ error: 'Service is shutting down' })
-    }
-
-    // Generate correlation ID for request tracking
-    const correlationId = generateCorrelationId()
-    reply.header('X-Correlation-Id', correlationId)
+// Outcome of one proxied call, sent as the HTTP response or as one batch entry
+interface ProxyResult {
+  status: number
+  body: any
+  headers: Record<string, string>
+}
 
-    try {
-      const { agent_token, token_id, proof_payload, tool, action, params } = request.body as ProxyRequestBody
+// Result of checking a token's signature and decoding its payload
+export type TokenCheck =
+  | { ok: true, tokenData: TokenData }
+  | { ok: false, status: number, body: any }
 
-      // Validate required fields
-      if (!agent_token || !tool || !action || !params) {
-        return reply.code(400).send({ 
-          error: 'Missing required fields: agent_token, tool, action, and params are required.' 
-        })
-      }
+interface ProxyContext {
+  correlationId: string
+  deadline?: number
+  // Token checks shared by the calls of one batch, keyed by token
+  tokenChecks?: Map<string, Promise<TokenCheck>>
+}
 
-      // Validate token provenance if token_id is provided
-      if (token_id) {
-        if (!proof_payload) {
-          return reply.code(400).send({ 
-            error: 'Token provenance validation requires proof_payload when token_id is provided.' 
-          })
-        }
+// An authorized call, ready to run against its tool adapter
+interface ToolCall {
+  agentId: string
+  tool: string
+  action: string
+  params: Record<string, any>
+  appliedFilters?: any
+}
 
-        // Verify token provenance
-        const registry = await memoryDB.findTokenRegistryByTokenId(token_id)
-        if (!registry) {
-          console.warn(`Token registry not found for token_id: ${token_id}`)
-          return reply.code(403).send({ error: 'Token not found in registry' })
-        }
+type ToolCallOutcome =
+  | { ok: true, data: any, responseTime: number }
+  | { ok: false, status: number, errorMessage: string, details: any }
 
-        if (registry.isRevoked) {
-          console.warn(`Revoked token used: ${token_id}`)
-          return reply.code(403).send({ error: 'Token has been revoked' })
-        }
+// Upper bound on calls accepted by a single batch request
+const MAX_BATCH_CALLS = 100
 
-        // Verify proof payload hash
-        const proofHash = crypto.createHash('sha256').update(proof_payload).digest('hex')
-        if (proofHash !== registry.payloadHash) {
-          console.warn(`Token proof mismatch for token_id: ${token_id}`)
-          return reply.code(403).send({ error: 'Token proof verification failed' })
-        }
-      }
+const MAX_IDEMPOTENCY_KEY_LENGTH = 255
 
-      // Step 1: Verify HMAC signature
-      const [encryptedPayload, signature] = agent_token.split('.')
-      
-      if (!encryptedPayload || !signature) {
-        return reply.code(400).send({ error: 'Invalid token format. Expected: BASE64(encrypted).SIGNATURE' })
-      }
+function result(status: number, body: any, headers: Record<string, string> = {}): ProxyResult {
+  return { status, body, headers }
+}
 
-      const signingSecret = process.env.SIGNING_SECRET || 'default-secret-change-in-production'
-      const validSignature = crypto
-        .createHmac('sha256', signingSecret)
-        .update(encryptedPayload)
-        .digest('hex')
+// Steps 1-2: verify the HMAC signature and decode the token payload
+export async function checkToken(agentToken: string): Promise<TokenCheck> {
+  const [encryptedPayload, signature] = agentToken.split('.')
+
+  if (!encryptedPayload || !signature) {
+    return { ok: false, status: 400, body: { error: 'Invalid token format. Expected: BASE64(encrypted).SIGNATURE' } }
+  }
+
+  const signingSecret = process.env.SIGNING_SECRET || 'default-secret-change-in-production'
+  const validSignature = crypto
+    .createHmac('sha256', signingSecret)
+    .update(encryptedPayload)
+    .digest('hex')
+
+  if (signature !== validSignature) {
+    console.warn('Invalid token signature received')
+    return { ok: false, status: 403, body: { error: 'Invalid token signature' } }
+  }
+
+  try {
+    const tokenDataRaw = Buffer.from(encryptedPayload, 'base64').toString('utf8')
+    const tokenData: TokenData = JSON.parse(tokenDataRaw)
+    recordTokenValidation(tokenData.agent_id, true)
+    return { ok: true, tokenData }
+  } catch (error) {
+    console.error('Token decoding failed:', error)
+    recordTokenValidation('unknown', false)
+    return { ok: false, status: 403, body: { error: 'Token decoding failed' } }
+  }
+}
 
-      if (signature !== validSignature) {
-        console.warn('Invalid token signature received')
-        return reply.code(403).send({ error: 'Invalid token signature' })
-      }
+function checkTokenCached(agentToken: string, ctx: ProxyContext): Promise<TokenCheck> {
+  if (!ctx.tokenChecks) {
+    return checkToken(agentToken)
+  }
+  let check = ctx.tokenChecks.get(agentToken)
+  if (!check) {
+    check = checkToken(agentToken)
+    ctx.tokenChecks.set(agentToken, check)
+  }
+  return check
+}
 
-      // Step 2: Decode token payload (simplified base64 for now)
-      let tokenData: TokenData
-      try {
-        const tokenDataRaw = Buffer.from(encryptedPayload, 'base64').toString('utf8')
-        tokenData = JSON.parse(tokenDataRaw)
-        recordTokenValidation(tokenData.agent_id, true)
-      } catch (error) {
-        console.error('Token decoding failed:', error)
-        recordTokenValidation('unknown', false)
-        return reply.code(403).send({ error: 'Token decoding failed' })
-      }
+// Authenticate, authorize and execute one proxy call
+async function executeProxyRequest(requestBody: ProxyRequestBody, ctx: ProxyContext): Promise<ProxyResult> {
+  const { correlationId, deadline } = ctx
+  const headers: Record<string, string> = {}
+  const { agent_token, token_id, proof_payload, tool, action, params, async: runAsync, idempotency_key } = requestBody || ({} as ProxyRequestBody)
+
+  // Validate required fields
+  if (!agent_token || !tool || !action || !params) {
+    return result(400, { 
+      error: 'Missing required fields: agent_token, tool, action, and params are required.' 
+    })
+  }
+
+  if (idempotency_key !== undefined && (typeof idempotency_key !== 'string' || !idempotency_key || idempotency_key.length > MAX_IDEMPOTENCY_KEY_LENGTH)) {
+    return result(400, { 
+      error: `idempotency_key must be a non-empty string of at most ${MAX_IDEMPOTENCY_KEY_LENGTH} characters.` 
+    })
+  }
+
+  // Validate token provenance if token_id is provided
+  if (token_id) {
+    if (!proof_payload) {
+      return result(400, { 
+        error: 'Token provenance validation requires proof_payload when token_id is provided.' 
+      })
+    }
 
-      // Step 3: Validate token data
-      const now = new Date()
-      const tokenExpiry = new Date(tokenData.expires_at)
-      
-      if (isTokenExpired(tokenData.expires_at)) {
-        console.warn(`Token expired for agent ${tokenData.agent_id}`)
-        recordTokenExpiration(tokenData.agent_id)
-        // Log the expired token attempt
-        try {
-          await memoryDB.createRequestLog({
-            corrId: correlationId,
-            agentId: tokenData.agent_id,
-            tool,
-            action,
-            responseTime: 0,
-            statusCode: 403,
-            success: false,
-            errorMessage: 'Token expired'
-          })
-        } catch (logError) {
-          console.error('Failed to log expired token:', logError)
-        }
-        return reply.code(403).send({ error: 'Token expired' })
-      }
+    // Verify token provenance
+    const registry = await memoryDB.findTokenRegistryByTokenId(token_id)
+    if (!registry) {
+      console.warn(`Token registry not found for token_id: ${token_id}`)
+      return result(403, { error: 'Token not found in registry' })
+    }
 
-      // Step 3.5: Check for token rotation recommendation
-      if (isTokenExpiringSoon(tokenData.expires_at)) {
-        reply.header('X-Token-Rotation-Recommended', 'true')
-        reply.header('X-Token-Expires-At', tokenData.expires_at)
-      }
+    if (registry.isRevoked) {
+      console.warn(`Revoked token used: ${token_id}`)
+      return result(403, { error: 'Token has been revoked' })
+    }
 
-      // Step 4: Validate agent exists and is active
-      const agent = await memoryDB.findAgentById(tokenData.agent_id)
+    // Verify proof payload hash
+    const proofHash = crypto.createHash('sha256').update(proof_payload).digest('hex')
+    if (proofHash !== registry.payloadHash) {
+      console.warn(`Token proof mismatch for token_id: ${token_id}`)
+      return result(403, { error: 'Token proof verification failed' })
+    }
+  }
+
+  // Steps 1-2: Verify HMAC signature and decode token payload
+  const tokenCheck = await checkTokenCached(agent_token, ctx)
+  if (!tokenCheck.ok) {
+    return result(tokenCheck.status, tokenCheck.body)
+  }
+  const tokenData = tokenCheck.tokenData
+
+  // Step 3: Validate token data
+  if (isTokenExpired(tokenData.expires_at)) {
+    console.warn(`Token expired for agent ${tokenData.agent_id}`)
+    recordTokenExpiration(tokenData.agent_id)
+    // Log the expired token attempt
+    try {
+      await memoryDB.createRequestLog({
+        corrId: correlationId,
+        agentId: tokenData.agent_id,
+        tool,
+        action,
+        responseTime: 0,
+        statusCode: 403,
+        success: false,
+        errorMessage: 'Token expired'
+      })
+    } catch (logError) {
+      console.error('Failed to log expired token:', logError)
+    }
+    return result(403, { error: 'Token expired' })
+  }
+
+  // Step 3.5: Check for token rotation recommendation
+  if (isTokenExpiringSoon(tokenData.expires_at)) {
+    headers['X-Token-Rotation-Recommended'] = 'true'
+    headers['X-Token-Expires-At'] = tokenData.expires_at
+  }
+
+  // Step 4: Validate agent exists and is active
+  const agent = await memoryDB.findAgentById(tokenData.agent_id)
+
+  if (!agent) {
+    console.warn(`Agent not found: ${tokenData.agent_id}`)
+    return result(403, { error: 'Agent not found' }, headers)
+  }
+
+  if (agent.status !== 'active') {
+    console.warn(`Inactive agent attempted request: ${tokenData.agent_id}`)
+    return result(403, { error: 'Agent is not active' }, headers)
+  }
+
+  // Step 5: Policy evaluation (enforce policies in all modes)
+  const policyEngine = PolicyEngine.getInstance()
+  const policyResult = await policyEngine.evaluateRequest(
+    tokenData.agent_id,
+    agent.role,
+    tool,
+    action,
+    params
+  )
+
+  if (!policyResult.allowed) {
+    console.warn(`Policy denied request for agent ${tokenData.agent_id}: ${policyResult.reason}`)
+    recordPolicyDenial(tokenData.agent_id, tool, action)
+    // Log the policy denial
+    try {
+      await memoryDB.createRequestLog({
+        corrId: correlationId,
+        agentId: tokenData.agent_id,
+        tool,
+        action,
+        responseTime: 0,
+        statusCode: 403,
+        success: false,
+        errorMessage: `Policy denied: ${policyResult.reason}`
+      })
+    } catch (logError) {
+      console.error('Failed to log policy denial:', logError)
+    }
+    return result(403, { 
+      error: 'Policy denied',
+      reason: policyResult.reason
+    }, headers)
+  }
+
+  // Step 5.5: Validate tool parameters
+  const validationResult = validateToolParameters(tool, action, params)
+  if (!validationResult.valid) {
+    console.warn(`Parameter validation failed for agent ${tokenData.agent_id}: ${validationResult.errors?.join(', ')}`)
+    return result(400, { 
+      error: 'Parameter validation failed',
+      details: validationResult.errors
+    }, headers)
+  }
+
+  // Step 5.6: Check tool configuration (skip in mock mode)
+  if (currentMode === 'live') {
+    let toolInstance: any
+    switch (tool) {
+      case 'serpapi':
+        toolInstance = use.serpapi
+        break
+      case 'openai':
+        toolInstance = use.openai
+        break
+      case 'gmail_send':
+        toolInstance = use.gmail_send
+        break
+      case 'http_fetch':
+        // HTTP fetch doesn't need credentials
+        break
+      default:
+        return result(400, { error: 'Unknown tool' }, headers)
+    }
 
-      if (!agent) {
-        console.warn(`Agent not found: ${tokenData.agent_id}`)
-        return reply.code(403).send({ error: 'Agent not found' })
-      }
+    if (toolInstance && !(await toolInstance.isConfigured())) {
+      return result(503, { error: `${tool} not configured - no active credential found` }, headers)
+    }
+  }
+
+  // Step 5.5: Rate limiting
+  try {
+    await rateLimiter.consume(tokenData.agent_id)
+  } catch (rateLimitError: any) {
+    console.warn(`Rate limit exceeded for agent ${tokenData.agent_id}`)
+    // Log the rate limit violation
+    try {
+      await memoryDB.createRequestLog({
+        corrId: correlationId,
+        agentId: tokenData.agent_id,
+        tool,
+        action,
+        responseTime: 0,
+        statusCode: 429,
+        success: false,
+        errorMessage: 'Rate limit exceeded'
+      })
+    } catch (logError) {
+      console.error('Failed to log rate limit:', logError)
+    }
+    return result(429, { 
+      error: 'Rate limit exceeded',
+      retry_after: Math.ceil(rateLimitError.msBeforeNext / 1000)
+    }, headers)
+  }
+
+  // Check if tool and action are supported
+  if (!toolRoutes[tool]) {
+    return result(400, { error: `Unsupported tool: ${tool}` }, headers)
+  }
+
+  if (!toolRoutes[tool][action]) {
+    return result(400, { error: `Unsupported action: ${action} for tool: ${tool}` }, headers)
+  }
+
+  const call: ToolCall = {
+    agentId: tokenData.agent_id,
+    tool,
+    action,
+    params,
+    appliedFilters: policyResult.appliedFilters
+  }
+
+  // Step 5.7: Async requests run in the background and are polled via /api/jobs.
+  // A resubmission under an idempotency key the agent already used (e.g. a
+  // client retrying after a lost 202) gets the existing job and runs nothing.
+  if (runAsync) {
+    const { job, created } = await memoryDB.createJobOnce({
+      agentId: tokenData.agent_id,
+      tool,
+      action,
+      status: 'queued',
+      idempotencyKey: idempotency_key
+    })
+
+    if (created) {
+      // The submitter's deadline only covers getting the 202 back; the job
+      // itself runs for as long as its tool call takes
+      runProxyJob(job.id, call, { ...ctx, deadline: undefined })
+    }
 
-      if (agent.status !== 'active') {
-        console.warn(`Inactive agent attempted request: ${tokenData.agent_id}`)
-        return reply.code(403).send({ error: 'Agent is not active' })
-      }
+    return result(202, { job_id: job.id, status: job.status }, headers)
+  }
+
+  const outcome = await executeToolCall(call, ctx)
+  if (!outcome.ok) {
+    return result(outcome.status, { 
+      error: 'External API request failed',
+      details: outcome.details
+    }, headers)
+  }
+
+  // Step 8: Return the result
+  return result(200, {
+    success: true,
+    data: outcome.data,
+    metadata: {
+      agent_id: tokenData.agent_id,
+      agent_name: agent.name,
+      tool,
+      action,
+      response_time_ms: outcome.responseTime
+    }
+  }, headers)
+}
 
-      // Step 5: Policy evaluation (enforce policies in all modes)
-      const policyEngine = PolicyEngine.getInstance()
-      const policyResult = await policyEngine.evaluateRequest(
-        tokenData.agent_id,
-        agent.role,
+// Steps 6-7: run an authorized call with Sentinel monitoring, resilience and
+// request logging; shared by synchronous requests and async jobs
+async function executeToolCall(call: ToolCall, ctx: ProxyContext): Promise<ToolCallOutcome> {
+  const { correlationId, deadline } = ctx
+  const { agentId, tool, action, params, appliedFilters } = call
+
+  // Step 6: Start Sentinel monitoring
+  const sentinelContext = SentinelMiddleware.startMonitoring(
+    correlationId,
+    agentId,
+    tool,
+    action,
+    params
+  )
+
+  // Step 7: Proxy request to external API using tool adapters with resilience
+  let toolResult: any
+  let responseTime = 0
+  let error: any = null
+  
+  // Start request timer for latency tracking
+  const requestTimer = startRequestTimer(tool, action)
+
+  try {
+    // Execute the tool action with circuit breaker, retries, and metrics,
+    // giving up (and skipping further retries) once the client deadline passes
+    toolResult = await withDeadline(deadline, () => executeWithCircuitBreaker(tool, async () => {
+      return executeWithRetry(tool, action, async () => {
+        checkDeadline(deadline)
+        const adapterResult = await toolRoutes[tool][action](params)
+        
+        // Apply response filters if policy specifies them
+        if (appliedFilters) {
+          return appliedFilters
+        }
+        
+        return adapterResult
+      })
+    }))
+
+    responseTime = requestTimer.end()
+
+    // Record successful request metrics
+    recordRequest(tool, action, 200)
+
+  } catch (err: any) {
+    error = err
+    responseTime = requestTimer.end()
+    const errorMessage = error.response?.data?.error || error.message
+    console.error(`External API error for ${tool}/${action}:`, errorMessage)
+    
+    // Record failed request metrics
+    const statusCode = error.response?.status || 502
+    recordRequest(tool, action, statusCode)
+    
+    // Log the failed request
+    try {
+      await memoryDB.createRequestLog({
+        corrId: correlationId,
+        agentId,
         tool,
         action,
-        params
-      )
+        responseTime,
+        statusCode,
+        success: false,
+        errorMessage: errorMessage
+      })
+    } catch (logError) {
+      console.error('Failed to log error request:', logError)
+    }
+    
+    return {
+      ok: false,
+      status: statusCode,
+      errorMessage,
+      details: error.response?.data || error.message
+    }
+  }
+
+  // Step 8: End Sentinel monitoring and perform safety checks
+  SentinelMiddleware.endMonitoring(sentinelContext, toolResult, error)
+
+  // Step 7: Log the successful request
+  try {
+    const sanitizedParams = sanitizeParameters(tool, action, params)
+    await memoryDB.createRequestLog({
+      corrId: correlationId,
+      agentId,
+      tool,
+      action,
+      responseTime,
+      statusCode: 200,
+      success: true,
+      errorMessage: undefined
+    })
+  } catch (logError) {
+    console.error('Failed to log request:', logError)
+    // Don't fail the request if logging fails
+  }
+
+  return { ok: true, data: toolResult, responseTime }
+}
 
-      if (!policyResult.allowed) {
-        console.warn(`Policy denied request for agent ${tokenData.agent_id}: ${policyResult.reason}`)
-        recordPolicyDenial(tokenData.agent_id, tool, action)
-        // Log the policy denial
-        try {
-          await memoryDB.createRequestLog({
-            corrId: correlationId,
-            agentId: tokenData.agent_id,
-            tool,
-            action,
-            responseTime: 0,
-            statusCode: 403,
-            success: false,
-            errorMessage: `Policy denied: ${policyResult.reason}`
-          })
-        } catch (logError) {
-          console.error('Failed to log policy denial:', logError)
-        }
-        return reply.code(403).send({ 
-          error: 'Policy denied',
-          reason: policyResult.reason
-        })
-      }
+// Run an async proxy request in the background and record its outcome on the job
+function runProxyJob(jobId: string, call: ToolCall, ctx: ProxyContext): void {
+  setImmediate(async () => {
+    await memoryDB.updateJob(jobId, { status: 'running' })
 
-      // Step 5.5: Validate tool parameters
-      const validationResult = validateToolParameters(tool, action, params)
-      if (!validationResult.valid) {
-        console.warn(`Parameter validation failed for agent ${tokenData.agent_id}: ${validationResult.errors?.join(', ')}`)
-        return reply.code(400).send({ 
-          error: 'Parameter validation failed',
-          details: validationResult.errors
-        })
+    try {
+      const outcome = await executeToolCall(call, ctx)
+      if (outcome.ok) {
+        await memoryDB.updateJob(jobId, { status: 'done', result: outcome.data })
+      } else {
+        await memoryDB.updateJob(jobId, { status: 'failed', error: outcome.errorMessage })
       }
+    } catch (error: any) {
+      console.error(`Proxy job ${jobId} failed:`, error)
+      await memoryDB.updateJob(jobId, { status: 'failed', error: error.message })
+    }
+  })
+}
 
-      // Step 5.6: Check tool configuration (skip in mock mode)
-      if (currentMode === 'live') {
-        let toolInstance: any
-        switch (tool) {
-          case 'serpapi':
-            toolInstance = use.serpapi
-            break
-          case 'openai':
-            toolInstance = use.openai
-            break
-          case 'gmail_send':
-            toolInstance = use.gmail_send
-            break
-          case 'http_fetch':
-            // HTTP fetch doesn't need credentials
-            break
-          default:
-            return reply.code(400).send({ error: 'Unknown tool' })
-        }
-
-        if (toolInstance && !(await toolInstance.isConfigured())) {
-          return reply.code(503).send({ error: `${tool} not configured - no active credential found` })
-        }
-      }
+export async function proxyRoutes(server: FastifyInstance) {
+  // Log the current upstream mode
+  console.log(`🚀 4Runr Gateway starting in ${currentMode.toUpperCase()} mode`)
+  
+  // POST /proxy-request - Proxy agent requests to external APIs
+  server.post('/proxy-request', async (request, reply) => {
+    // Check if shutdown is in progress
+    if (isShutdownInProgress()) {
+      return reply.code(503).send({ error: 'Service is shutting down' })
+    }
 
-      // Step 5.5: Rate limiting
-      try {
-        await rateLimiter.consume(tokenData.agent_id)
-      } catch (rateLimitError: any) {
-        console.warn(`Rate limit exceeded for agent ${tokenData.agent_id}`)
-        // Log the rate limit violation
-        try {
-          await memoryDB.createRequestLog({
-            corrId: correlationId,
-            agentId: tokenData.agent_id,
-            tool,
-            action,
-            responseTime: 0,
-            statusCode: 429,
-            success: false,
-            errorMessage: 'Rate limit exceeded'
-          })
-        } catch (logError) {
-          console.error('Failed to log rate limit:', logError)
-        }
-        return reply.code(429).send({ 
-          error: 'Rate limit exceeded',
-          retry_after: Math.ceil(rateLimitError.msBeforeNext / 1000)
-        })
-      }
+    // Generate correlation ID for request tracking
+    const correlationId = generateCorrelationId()
+    reply.header('X-Correlation-Id', correlationId)
 
-      // Step 6: Start Sentinel monitoring
-      const sentinelContext = SentinelMiddleware.startMonitoring(
+    try {
+      const body = request.body as ProxyRequestBody
+      // Abandon work the client has stopped waiting for
+      const outcome = await executeProxyRequest(body, {
         correlationId,
-        tokenData.agent_id,
-        tool,
-        action,
-        params
-      )
+        deadline: parseDeadline(request.headers)
+      })
 
-      // Step 7: Proxy request to external API using tool adapters with resilience
-      let result: any
-      let responseTime = 0
-      let error: any = null
-      
-      // Start request timer for latency tracking
-      const requestTimer = startRequestTimer(tool, action)
+      const response = reply.code(outcome.status).headers(outcome.headers).send(outcome.body)
 
-      try {
-        // Check if tool and action are supported
-        if (!toolRoutes[tool]) {
-          return reply.code(400).send({ error: `Unsupported tool: ${tool}` })
-        }
+      // Track response finalization for metrics
+      if (outcome.status === 200) {
+        reply.raw.on('finish', () => {
+          recordRequest(body.tool, body.action, reply.statusCode)
+        })
+      }
 
-        if (!toolRoutes[tool][action]) {
-          return reply.code(400).send({ error: `Unsupported action: ${action} for tool: ${tool}` })
-        }
+      return response
 
-        // Execute the tool action with circuit breaker, retries, and metrics
-        result = await executeWithCircuitBreaker(tool, async () => {
-          return executeWithRetry(tool, action, async () => {
-            const toolResult = await toolRoutes[tool][action](params)
-            
-            // Apply response filters if policy specifies them
-            if (policyResult.appliedFilters) {
-              return policyResult.appliedFilters
-            }
-            
-            return toolResult
-          })
-        })
+    } catch (error) {
+      console.error('Proxy request error:', error)
+      return reply.code(500).send({ 
+        error: 'Internal server error during proxy request' 
+      })
+    }
+  })
 
-        responseTime = requestTimer.end()
+  // POST /proxy-batch - Run many proxy calls from one HTTP request
+  // Each call is authorized, rate limited and executed on its own; a token
+  // shared by several calls is verified once. Results keep the request order.
+  server.post('/proxy-batch', async (request, reply) => {
+    if (isShutdownInProgress()) {
+      return reply.code(503).send({ error: 'Service is shutting down' })
+    }
 
-        // Record successful request metrics
-        recordRequest(tool, action, 200)
+    const correlationId = generateCorrelationId()
+    reply.header('X-Correlation-Id', correlationId)
 
-      } catch (err: any) {
-        error = err
-        responseTime = requestTimer.end()
-        const errorMessage = error.response?.data?.error || error.message
-        console.error(`External API error for ${tool}/${action}:`, errorMessage)
-        
-        // Record failed request metrics
-        const statusCode = error.response?.status || 502
-        recordRequest(tool, action, statusCode)
-        
-        // Log the failed request
-        try {
-          await memoryDB.createRequestLog({
-            corrId: correlationId,
-            agentId: tokenData.agent_id,
-            tool,
-            action,
-            responseTime,
-            statusCode,
-            success: false,
-            errorMessage: errorMessage
-          })
-        } catch (logError) {
-          console.error('Failed to log error request:', logError)
-        }
-        
-        return reply.code(statusCode).send({ 
-          error: 'External API request failed',
-          details: error.response?.data || error.message
-        })
+    try {
+      const { requests } = (request.body || {}) as { requests?: ProxyRequestBody[] }
+
+      if (!Array.isArray(requests) || requests.length === 0) {
+        return reply.code(400).send({ error: 'requests must be a non-empty array.' })
       }
 
-      // Step 8: End Sentinel monitoring and perform safety checks
-      SentinelMiddleware.endMonitoring(sentinelContext, result, error)
-
-      // Step 7: Log the successful request
-      try {
-        const sanitizedParams = sanitizeParameters(tool, action, params)
-        await memoryDB.createRequestLog({
-          corrId: correlationId,
-          agentId: tokenData.agent_id,
-          tool,
-          action,
-          responseTime,
-          statusCode: 200,
-          success: true,
-          errorMessage: undefined
+      if (requests.length > MAX_BATCH_CALLS) {
+        return reply.code(400).send({
+          error: `At most ${MAX_BATCH_CALLS} calls can be sent in one batch.`
         })
-      } catch (logError) {
-        console.error('Failed to log request:', logError)
-        // Don't fail the request if logging fails
       }
 
-      // Step 8: Return the result
-      const response = reply.code(200).send({
-        success: true,
-        data: result,
-        metadata: {
-          agent_id: tokenData.agent_id,
-          agent_name: agent.name,
-          tool,
-          action,
-          response_time_ms: responseTime
+      const deadline = parseDeadline(request.headers)
+      const tokenChecks = new Map<string, Promise<TokenCheck>>()
+
+      const outcomes = await Promise.all(requests.map(async (entry, index) => {
+        try {
+          return await executeProxyRequest(entry, {
+            correlationId: `${correlationId}-${index}`,
+            deadline,
+            tokenChecks
+          })
+        } catch (error) {
+          console.error('Proxy request error:', error)
+          return result(500, { error: 'Internal server error during proxy request' })
         }
-      })
+      }))
 
-      // Track response finalization for metrics
-      reply.raw.on('finish', () => {
-        recordRequest(tool, action, reply.statusCode)
+      return reply.send({
+        results: outcomes.map((outcome, index) => ({
+          index,
+          status: outcome.status,
+          headers: outcome.headers,
+          body: outcome.body
+        }))
       })
 
-      return response
-
     } catch (error) {
-      console.error('Proxy request error:', error)
+      console.error('Proxy batch error:', error)
       return reply.code(500).send({ 
-        error: 'Internal server error during proxy request' 
+        error: 'Internal server error during proxy batch' 
       })
     }
   })
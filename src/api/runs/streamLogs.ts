@@ -30,17 +30,17 @@ export default async function route(app: FastifyInstance) {
         // Docker multiplexes stdout/stderr; in alpine base it's usually raw text.
         const text = chunk.toString("utf8").trim();
         if (text) {
-          reply.raw.write(`data: ${JSON.stringify({ log: text, timestamp: new Date().toISOString() })}\\n\\n`);
+          reply.raw.write(`data: ${JSON.stringify({ log: text, timestamp: new Date().toISOString() })}\n\n`);
         }
       });
       
       logStream.on("end", () => {
-        reply.raw.write(`event: end\\ndata: "eof"\\n\\n`);
+        reply.raw.write(`event: end\ndata: "eof"\n\n`);
         reply.raw.end();
       });
       
       logStream.on("error", (error) => {
-        reply.raw.write(`event: error\\ndata: ${JSON.stringify({ error: error.message })}\\n\\n`);
+        reply.raw.write(`event: error\ndata: ${JSON.stringify({ error: error.message })}\n\n`);
         reply.raw.end();
       });
 
@@ -55,10 +55,10 @@ export default async function route(app: FastifyInstance) {
       });
       
       // Send initial connection event
-      reply.raw.write(`event: connected\\ndata: ${JSON.stringify({ runId: id, containerId: run.reason })}\\n\\n`);
+      reply.raw.write(`event: connected\ndata: ${JSON.stringify({ runId: id, containerId: run.reason })}\n\n`);
       
     } catch (error) {
-      reply.raw.write(`event: error\\ndata: ${JSON.stringify({ error: "Container not accessible" })}\\n\\n`);
+      reply.raw.write(`event: error\ndata: ${JSON.stringify({ error: "Container not accessible" })}\n\n`);
       reply.raw.end();
     }
 
@@ -11,112 +11,161 @@ interface GenerateTokenBody {
   expires_at: string
 }
 
-export async function tokenRoutes(server: FastifyInstance) {
-  // POST /generate-token - Generate encrypted, signed token for agent
-  server.post('/generate-token', async (request, reply) => {
-    try {
-      const { agent_id, tools, permissions, expires_at } = request.body as GenerateTokenBody
+// Upper bound on tokens issued by a single batch request
+const MAX_BATCH_TOKENS = 500
 
-      // Validate required fields
-      if (!agent_id || !tools || !permissions || !expires_at) {
-        return reply.code(400).send({ 
-          error: 'Missing required fields: agent_id, tools, permissions, and expires_at are required.' 
-        })
-      }
+interface IssueResult {
+  status: number
+  body: Record<string, any>
+}
 
-      // Validate tools and permissions are arrays
-      if (!Array.isArray(tools) || !Array.isArray(permissions)) {
-        return reply.code(400).send({ 
-          error: 'Tools and permissions must be arrays.' 
-        })
-      }
+// Validate one request and issue its token; shared by the single and batch routes
+async function issueToken(body: GenerateTokenBody): Promise<IssueResult> {
+  const { agent_id, tools, permissions, expires_at } = body || ({} as GenerateTokenBody)
 
-      // Validate expiry date
-      const expiryDate = new Date(expires_at)
-      if (isNaN(expiryDate.getTime())) {
-        return reply.code(400).send({ 
-          error: 'Invalid expires_at date format. Use ISO 8601 format.' 
-        })
-      }
+  // Validate required fields
+  if (!agent_id || !tools || !permissions || !expires_at) {
+    return {
+      status: 400,
+      body: { error: 'Missing required fields: agent_id, tools, permissions, and expires_at are required.' }
+    }
+  }
+
+  // Validate tools and permissions are arrays
+  if (!Array.isArray(tools) || !Array.isArray(permissions)) {
+    return { status: 400, body: { error: 'Tools and permissions must be arrays.' } }
+  }
+
+  // Validate expiry date
+  const expiryDate = new Date(expires_at)
+  if (isNaN(expiryDate.getTime())) {
+    return { status: 400, body: { error: 'Invalid expires_at date format. Use ISO 8601 format.' } }
+  }
+
+  // Check if token would be expired
+  if (expiryDate <= new Date()) {
+    return { status: 400, body: { error: 'Token expiry date must be in the future.' } }
+  }
+
+  // Find agent and get their public key
+  const agent = await memoryDB.findAgentById(agent_id)
+
+  if (!agent) {
+    return { status: 404, body: { error: 'Agent not found.' } }
+  }
+
+  if (agent.status !== 'active') {
+    return { status: 400, body: { error: 'Agent is not active.' } }
+  }
+
+  // Create token payload with security features
+  const payload = JSON.stringify({
+    agent_id,
+    agent_name: agent.name,
+    tools,
+    permissions,
+    expires_at,
+    nonce: crypto.randomUUID(), // Prevent replay attacks
+    issued_at: new Date().toISOString()
+  })
 
-      // Check if token would be expired
-      if (expiryDate <= new Date()) {
-        return reply.code(400).send({ 
-          error: 'Token expiry date must be in the future.' 
-        })
-      }
+  // Generate token ID and compute payload hash for provenance
+  const tokenId = crypto.randomUUID()
+  const payloadHash = crypto.createHash('sha256').update(payload).digest('hex')
+
+  // Simplified token generation - use base64 encoding for now
+  const base64Token = Buffer.from(payload).toString('base64')
+
+  // Create HMAC signature for tamper protection
+  const signingSecret = process.env.SIGNING_SECRET || 'default-secret-change-in-production'
+  const signature = crypto
+    .createHmac('sha256', signingSecret)
+    .update(base64Token)
+    .digest('hex')
+
+  // Combine token with signature
+  const finalToken = `${base64Token}.${signature}`
+
+  // Store token in memory database for tracking
+  await memoryDB.createToken({
+    agentId: agent_id,
+    encrypted: finalToken,
+    expiresAt: expiryDate,
+    revoked: false
+  })
 
-      // Find agent and get their public key
-      const agent = await memoryDB.findAgentById(agent_id)
+  // Record token generation metric
+  recordTokenGeneration(agent_id)
+
+  // Store token provenance in registry
+  await memoryDB.createTokenRegistry({
+    tokenId,
+    agentId: agent_id,
+    payloadHash,
+    issuedAt: new Date(),
+    expiresAt: expiryDate,
+    isRevoked: false
+  })
 
-      if (!agent) {
-        return reply.code(404).send({ error: 'Agent not found.' })
-      }
+  return {
+    status: 201,
+    body: {
+      agent_token: finalToken,
+      token_id: tokenId,
+      expires_at: expires_at,
+      agent_name: agent.name
+    }
+  }
+}
 
-      if (agent.status !== 'active') {
-        return reply.code(400).send({ error: 'Agent is not active.' })
-      }
+export async function tokenRoutes(server: FastifyInstance) {
+  // POST /generate-token - Generate encrypted, signed token for agent
+  server.post('/generate-token', async (request, reply) => {
+    try {
+      const result = await issueToken(request.body as GenerateTokenBody)
+      return reply.code(result.status).send(result.body)
 
-      // Create token payload with security features
-      const payload = JSON.stringify({
-        agent_id,
-        agent_name: agent.name,
-        tools,
-        permissions,
-        expires_at,
-        nonce: crypto.randomUUID(), // Prevent replay attacks
-        issued_at: new Date().toISOString()
+    } catch (error) {
+      console.error('Error generating token:', error)
+      return reply.code(500).send({ 
+        error: 'Internal server error while generating token.' 
       })
+    }
+  })
 
-      // Generate token ID and compute payload hash for provenance
-      const tokenId = crypto.randomUUID()
-      const payloadHash = crypto.createHash('sha256').update(payload).digest('hex')
-
-      // Simplified token generation - use base64 encoding for now
-      const base64Token = Buffer.from(payload).toString('base64')
-
-      // Create HMAC signature for tamper protection
-      const signingSecret = process.env.SIGNING_SECRET || 'default-secret-change-in-production'
-      const signature = crypto
-        .createHmac('sha256', signingSecret)
-        .update(base64Token)
-        .digest('hex')
-
-      // Combine token with signature
-      const finalToken = `${base64Token}.${signature}`
-
-      // Store token in memory database for tracking
-      await memoryDB.createToken({
-        agentId: agent_id,
-        encrypted: finalToken,
-        expiresAt: expiryDate,
-        revoked: false
-      })
+  // POST /generate-tokens - Issue many tokens in one request
+  // Each entry succeeds or fails on its own; results keep the request order
+  server.post('/generate-tokens', async (request, reply) => {
+    try {
+      const { requests } = (request.body || {}) as { requests?: GenerateTokenBody[] }
 
-      // Record token generation metric
-      recordTokenGeneration(agent_id)
-
-      // Store token provenance in registry
-      await memoryDB.createTokenRegistry({
-        tokenId,
-        agentId: agent_id,
-        payloadHash,
-        issuedAt: new Date(),
-        expiresAt: expiryDate,
-        isRevoked: false
-      })
+      if (!Array.isArray(requests) || requests.length === 0) {
+        return reply.code(400).send({ error: 'requests must be a non-empty array.' })
+      }
 
-      return reply.code(201).send({ 
-        agent_token: finalToken,
-        token_id: tokenId,
-        expires_at: expires_at,
-        agent_name: agent.name
+      if (requests.length > MAX_BATCH_TOKENS) {
+        return reply.code(400).send({
+          error: `At most ${MAX_BATCH_TOKENS} tokens can be requested at once.`
+        })
+      }
+
+      const results = await Promise.all(requests.map(async entry => {
+        try {
+          return await issueToken(entry)
+        } catch (error) {
+          console.error('Error generating token:', error)
+          return { status: 500, body: { error: 'Internal server error while generating token.' } }
+        }
+      }))
+
+      return reply.send({
+        tokens: results.map((result, index) => ({ index, status: result.status, ...result.body }))
       })
 
     } catch (error) {
-      console.error('Error generating token:', error)
+      console.error('Error generating tokens:', error)
       return reply.code(500).send({ 
-        error: 'Internal server error while generating token.' 
+        error: 'Internal server error while generating tokens.' 
       })
     }
   })
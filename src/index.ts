@@ -6,11 +6,13 @@ import cors from '@fastify/cors'
 import { agentRoutes } from './api/agents'
 import { tokenRoutes } from './api/tokens'
 import { proxyRoutes } from './api/proxy'
+import { jobRoutes } from './api/jobs'
 import { policyRoutes } from './api/policies'
 import { adminRoutes } from './api/admin'
 import { healthRoutes } from './api/health'
 import { sentinelRoutes } from './api/sentinel'
 import { lifecycleManager } from './runtime/lifecycle'
+import { registerCompression } from './runtime/compression'
 
 // Create Fastify instance
 export const buildServer = async () => {
@@ -23,10 +25,14 @@ export const buildServer = async () => {
     origin: true // Allow all origins for development
   })
 
+  // Decode compressed request bodies and compress large responses
+  registerCompression(server)
+
   // Register API routes
   await server.register(agentRoutes, { prefix: '/api' })
   await server.register(tokenRoutes, { prefix: '/api' })
   await server.register(proxyRoutes, { prefix: '/api' })
+  await server.register(jobRoutes, { prefix: '/api' })
   await server.register(policyRoutes, { prefix: '/api' })
   await server.register(adminRoutes, { prefix: '/api' })
   await server.register(sentinelRoutes, { prefix: '/api' })
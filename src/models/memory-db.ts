@@ -91,6 +91,22 @@ interface TokenRegistry {
   revokedAt?: Date
 }
 
+interface Job {
+  id: string
+  agentId: string
+  tool: string
+  action: string
+  status: 'queued' | 'running' | 'done' | 'failed'
+  result?: any
+  error?: string
+  // Client-supplied key; a resubmission under the same key returns this job
+  idempotencyKey?: string
+  createdAt: Date
+  updatedAt: Date
+}
+
+const MAX_RETAINED_JOBS = 10000
+
 class MemoryDB {
   private agents: Map<string, Agent> = new Map()
   private tokens: Map<string, Token> = new Map()
@@ -100,6 +116,9 @@ class MemoryDB {
   private quotaCounters: Map<string, QuotaCounter> = new Map()
   private toolCredentials: Map<string, ToolCredential> = new Map()
   private tokenRegistry: Map<string, TokenRegistry> = new Map()
+  private jobs: Map<string, Job> = new Map()
+  // `${agentId}:${idempotencyKey}` -> job id
+  private jobKeys: Map<string, string> = new Map()
 
   // Agent methods
   async createAgent(data: Omit<Agent, 'id' | 'createdAt'>): Promise<Agent> {
@@ -416,6 +435,74 @@ class MemoryDB {
     return this.tokenRegistry.delete(id)
   }
 
+  // Job methods
+  async createJob(data: Omit<Job, 'id' | 'createdAt' | 'updatedAt'>): Promise<Job> {
+    if (this.jobs.size >= MAX_RETAINED_JOBS) {
+      this.pruneFinishedJobs()
+    }
+
+    const id = crypto.randomUUID()
+    const job: Job = {
+      ...data,
+      id,
+      createdAt: new Date(),
+      updatedAt: new Date()
+    }
+    this.jobs.set(id, job)
+    if (job.idempotencyKey) {
+      this.jobKeys.set(`${job.agentId}:${job.idempotencyKey}`, id)
+    }
+    return job
+  }
+
+  // Create a job, unless the agent already submitted one under the same
+  // idempotency key; that job is then returned with created: false
+  async createJobOnce(data: Omit<Job, 'id' | 'createdAt' | 'updatedAt'>): Promise<{ job: Job, created: boolean }> {
+    if (data.idempotencyKey) {
+      const existingId = this.jobKeys.get(`${data.agentId}:${data.idempotencyKey}`)
+      const existing = existingId ? this.jobs.get(existingId) : undefined
+      if (existing) {
+        return { job: existing, created: false }
+      }
+    }
+    return { job: await this.createJob(data), created: true }
+  }
+
+  async findJobById(id: string): Promise<Job | null> {
+    return this.jobs.get(id) || null
+  }
+
+  async findJobsByIds(ids: string[]): Promise<Job[]> {
+    const jobs: Job[] = []
+    for (const id of ids) {
+      const job = this.jobs.get(id)
+      if (job) jobs.push(job)
+    }
+    return jobs
+  }
+
+  async updateJob(id: string, data: Partial<Job>): Promise<Job | null> {
+    const job = this.jobs.get(id)
+    if (!job) return null
+
+    const updatedJob = { ...job, ...data, updatedAt: new Date() }
+    this.jobs.set(id, updatedJob)
+    return updatedJob
+  }
+
+  // Drop finished jobs, oldest first, until half the retention limit is free
+  private pruneFinishedJobs(): void {
+    for (const [id, job] of this.jobs) {
+      if (this.jobs.size < MAX_RETAINED_JOBS / 2) break
+      if (job.status === 'done' || job.status === 'failed') {
+        this.jobs.delete(id)
+        if (job.idempotencyKey) {
+          this.jobKeys.delete(`${job.agentId}:${job.idempotencyKey}`)
+        }
+      }
+    }
+  }
+
   // Utility methods
   async clear(): Promise<void> {
     this.agents.clear()
@@ -426,6 +513,8 @@ class MemoryDB {
     this.quotaCounters.clear()
     this.toolCredentials.clear()
     this.tokenRegistry.clear()
+    this.jobs.clear()
+    this.jobKeys.clear()
   }
 
   getStats() {
@@ -437,7 +526,8 @@ class MemoryDB {
       policyLogs: this.policyLogs.size,
       quotaCounters: this.quotaCounters.size,
       toolCredentials: this.toolCredentials.size,
-      tokenRegistry: this.tokenRegistry.size
+      tokenRegistry: this.tokenRegistry.size,
+      jobs: this.jobs.size
     }
   }
 }
@@ -0,0 +1,116 @@
+// HTTP compression for request and response bodies.
+//
+// Request bodies sent with Content-Encoding gzip, deflate or zstd are decoded
+// before parsing; the decoded size still counts against the server bodyLimit,
+// so a small compressed body cannot expand without bound. Every response
+// advertises the accepted request encodings in an Accept-Encoding header
+// (RFC 7694), which is how clients know compression is safe to use. Large
+// responses are compressed when the client's Accept-Encoding allows it.
+
+import { FastifyInstance, FastifyReply } from 'fastify'
+import { Readable } from 'stream'
+import { promisify } from 'util'
+import zlib from 'zlib'
+
+// zstd is only available from Node 22.15 / 23.8
+const zstdSupported = typeof (zlib as any).createZstdDecompress === 'function'
+
+const ACCEPTED_ENCODINGS = [...(zstdSupported ? ['zstd'] : []), 'gzip', 'deflate']
+const ACCEPT_ENCODING_HEADER = ACCEPTED_ENCODINGS.join(', ')
+
+// Responses smaller than this are not worth the CPU
+const MIN_RESPONSE_COMPRESSION_BYTES = Number(process.env.RESPONSE_COMPRESSION_MIN_BYTES || 1024)
+
+const gzip = promisify(zlib.gzip)
+const zstdCompress = zstdSupported ? promisify((zlib as any).zstdCompress) : undefined
+
+function createDecoder(encoding: string): NodeJS.ReadWriteStream | undefined {
+  switch (encoding) {
+    case 'gzip':
+    case 'x-gzip':
+      return zlib.createGunzip()
+    case 'deflate':
+      return zlib.createInflate()
+    case 'zstd':
+      return zstdSupported ? (zlib as any).createZstdDecompress() : undefined
+    default:
+      return undefined
+  }
+}
+
+function unsupportedEncoding(reply: FastifyReply, encoding: string) {
+  return reply.code(415).send({
+    error: `Unsupported Content-Encoding: ${encoding}. Supported: ${ACCEPT_ENCODING_HEADER}.`
+  })
+}
+
+// Pick the response encoding from the client's Accept-Encoding, preferring zstd
+function responseEncoding(acceptEncoding: string | undefined): string | undefined {
+  if (!acceptEncoding) {
+    return undefined
+  }
+  const offered = new Set(
+    acceptEncoding
+      .split(',')
+      .map(value => value.trim().toLowerCase())
+      .filter(value => !value.endsWith(';q=0'))
+      .map(value => value.split(';')[0])
+  )
+  if (zstdSupported && offered.has('zstd')) {
+    return 'zstd'
+  }
+  if (offered.has('gzip')) {
+    return 'gzip'
+  }
+  return undefined
+}
+
+export function registerCompression(server: FastifyInstance) {
+  server.addHook('preParsing', async (request, reply, payload) => {
+    const header = request.headers['content-encoding']
+    const encoding = (Array.isArray(header) ? header[0] : header || 'identity').trim().toLowerCase()
+    if (encoding === 'identity') {
+      return payload
+    }
+
+    const decoder = createDecoder(encoding)
+    if (!decoder) {
+      return unsupportedEncoding(reply, encoding)
+    }
+
+    // Fastify checks Content-Length against the encoded bytes and bodyLimit
+    // against the decoded stream
+    const decoded = payload.pipe(decoder) as Readable & { receivedEncodedLength: number }
+    decoded.receivedEncodedLength = 0
+    payload.on('data', (chunk: Buffer) => {
+      decoded.receivedEncodedLength += chunk.length
+    })
+    payload.on('error', (error: Error) => decoded.destroy(error))
+    return decoded
+  })
+
+  server.addHook('onSend', async (request, reply, payload) => {
+    reply.header('Accept-Encoding', ACCEPT_ENCODING_HEADER)
+
+    // Streams (SSE) and already-encoded bodies are sent unchanged
+    if (reply.hasHeader('content-encoding') || !(typeof payload === 'string' || Buffer.isBuffer(payload))) {
+      return payload
+    }
+    const body = typeof payload === 'string' ? Buffer.from(payload) : payload
+    if (body.length < MIN_RESPONSE_COMPRESSION_BYTES) {
+      return payload
+    }
+
+    const encoding = responseEncoding(request.headers['accept-encoding'])
+    if (!encoding) {
+      return payload
+    }
+
+    const compressed: Buffer = encoding === 'zstd' ? await zstdCompress!(body) : await gzip(body)
+    reply.header('Content-Encoding', encoding)
+    const vary = reply.getHeader('vary')
+    reply.header('Vary', vary ? `${vary}, Accept-Encoding` : 'Accept-Encoding')
+    reply.removeHeader('content-length')
+    return compressed
+  })
+}
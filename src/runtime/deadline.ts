@@ -0,0 +1,65 @@
+// Client-supplied request deadlines.
+//
+// Clients send the time they are still willing to wait, in milliseconds, in the
+// X-Request-Deadline-Ms header. A relative budget avoids depending on clock sync
+// between agents and the Gateway.
+
+export const DEADLINE_HEADER = 'x-request-deadline-ms'
+
+// Shaped like an upstream HTTP error so existing handlers map it to a 504
+export class DeadlineExceededError extends Error {
+  response = { status: 504, data: { error: 'Deadline exceeded' } }
+
+  constructor() {
+    super('Deadline exceeded')
+    this.name = 'DeadlineExceededError'
+  }
+}
+
+// Absolute deadline (epoch ms) from the request headers, if one was sent
+export function parseDeadline(headers: Record<string, any>): number | undefined {
+  const raw = headers[DEADLINE_HEADER]
+  if (raw === undefined) {
+    return undefined
+  }
+  const budgetMs = Number(Array.isArray(raw) ? raw[0] : raw)
+  if (!Number.isFinite(budgetMs) || budgetMs < 0) {
+    return undefined
+  }
+  return Date.now() + budgetMs
+}
+
+export function isDeadlineExpired(deadline?: number): boolean {
+  return deadline !== undefined && Date.now() >= deadline
+}
+
+// Throw if the deadline has passed; call before starting each unit of work
+export function checkDeadline(deadline?: number): void {
+  if (isDeadlineExpired(deadline)) {
+    throw new DeadlineExceededError()
+  }
+}
+
+// Stop waiting for an operation once the deadline passes
+export function withDeadline<T>(deadline: number | undefined, operation: () => Promise<T>): Promise<T> {
+  if (deadline === undefined) {
+    return operation()
+  }
+  if (isDeadlineExpired(deadline)) {
+    return Promise.reject(new DeadlineExceededError())
+  }
+
+  return new Promise<T>((resolve, reject) => {
+    const timer = setTimeout(() => reject(new DeadlineExceededError()), deadline - Date.now())
+    operation().then(
+      value => {
+        clearTimeout(timer)
+        resolve(value)
+      },
+      error => {
+        clearTimeout(timer)
+        reject(error)
+      }
+    )
+  })
+}
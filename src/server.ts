@@ -7,6 +7,7 @@ import cors from '@fastify/cors'
 import { agentRoutes } from './api/agents'
 import { tokenRoutes } from './api/tokens'
 import { proxyRoutes } from './api/proxy'
+import { jobRoutes } from './api/jobs'
 import { policyRoutes } from './api/policies'
 import { adminRoutes } from './api/admin'
 import { sandboxRoutes } from './api/sandbox'
@@ -14,6 +15,7 @@ import { sentinelRoutes } from './api/sentinel'
 import { coachRoutes } from './api/coach'
 // import { healthRoutes } from './api/health' // MVP: Temporarily disabled
 import { lifecycleManager } from './runtime/lifecycle'
+import { registerCompression } from './runtime/compression'
 // Agent runtime routes
 import createAgentRoute from './api/agents/create'
 import startAgentRoute from './api/agents/start'
@@ -94,6 +96,9 @@ server.register(cors, {
   origin: true // Allow all origins for development
 })
 
+// Decode compressed request bodies and compress large responses
+registerCompression(server)
+
 // MVP: Rate limiting temporarily disabled for core agent runtime implementation
 // Will re-enable after agent runtime is working
 
@@ -104,6 +109,7 @@ server.register(cors, {
 server.register(agentRoutes, { prefix: '/api' })
 server.register(tokenRoutes, { prefix: '/api' })
 server.register(proxyRoutes, { prefix: '/api' })
+server.register(jobRoutes, { prefix: '/api' })
 server.register(policyRoutes, { prefix: '/api' })
 server.register(adminRoutes, { prefix: '/api' })
 server.register(sandboxRoutes, { prefix: '/api' })
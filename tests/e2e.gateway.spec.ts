@@ -2,6 +2,7 @@
 import { afterAll, beforeAll, describe, expect, test } from 'vitest'
 import request from 'supertest'
 import nock from 'nock'
+import zlib from 'zlib'
 
 // adjust import to your server bootstrap (must export a Fastify instance or start/stop helpers)
 import { buildServer } from '../src/index'
@@ -38,6 +39,16 @@ async function getToken(agent_id: string, tools: string[], permissions: string[]
   return res.body.agent_token as string
 }
 
+async function waitForJob(job_id: string, token: string) {
+  for (let i = 0; i < 50; i++) {
+    const res = await request(base).get(`/api/jobs/${job_id}`).set('Authorization', `Bearer ${token}`)
+    expect(res.status).toBe(200)
+    if (res.body.status === 'done' || res.body.status === 'failed') return res.body
+    await new Promise(r => setTimeout(r, 50))
+  }
+  throw new Error(`job ${job_id} did not finish`)
+}
+
 beforeAll(async () => {
   // isolate env for tests
   process.env.PORT = '31337'
@@ -332,6 +343,250 @@ describe('4Runr.Gateway E2E', () => {
     expect(JSON.stringify(expired.body)).toMatch(/expired|invalid/i)
   })
 
+  test('async mode — job is accepted, logged and polled to completion', async () => {
+    // fresh agent so earlier tests' rate limits and quotas do not apply
+    const agentId = await createAgent('async_agent', 'scraper')
+    const token = await getToken(agentId, ['serpapi'], ['serpapi:search'])
+    nock('https://serpapi.com').get('/search').query(true).reply(200, { results: [{ title: 'ok' }], source: 'serpapi' })
+
+    const accepted = await request(base).post('/api/proxy-request').send({
+      agent_token: token, tool: 'serpapi', action: 'search',
+      params: { q: 'site:example.com async', engine: 'google' }, async: true
+    })
+    expect(accepted.status).toBe(202)
+    expect(accepted.body.job_id).toBeTruthy()
+
+    const job = await waitForJob(accepted.body.job_id, token)
+    expect(job.status).toBe('done')
+
+    // the job runs through the same path as sync calls, so it is logged
+    const logs = await memoryDB.getAllRequestLogs()
+    const log = logs.find(l => l.corrId === accepted.headers['x-correlation-id'])
+    expect(log?.agentId).toBe(agentId)
+    expect(log?.success).toBe(true)
+
+    const many = await request(base).get('/api/jobs')
+      .query({ ids: `${accepted.body.job_id},no-such-job` })
+      .set('Authorization', `Bearer ${token}`)
+    expect(many.status).toBe(200)
+    expect(many.body.jobs.map((j: any) => j.job_id)).toEqual([accepted.body.job_id])
+    expect(many.body.missing).toEqual(['no-such-job'])
+
+    const unknown = await request(base).get('/api/jobs/no-such-job').set('Authorization', `Bearer ${token}`)
+    expect(unknown.status).toBe(404)
+  })
+
+  test('async mode — a resubmitted idempotency key returns the first job', async () => {
+    const agentId = await createAgent('idempotent_agent', 'scraper')
+    const token = await getToken(agentId, ['serpapi'], ['serpapi:search'])
+    nock('https://serpapi.com').get('/search').query(true).reply(200, { results: [{ title: 'ok' }], source: 'serpapi' })
+    const submit = (idempotency_key: any) => request(base).post('/api/proxy-request').send({
+      agent_token: token, tool: 'serpapi', action: 'search',
+      params: { q: 'site:example.com once', engine: 'google' }, async: true, idempotency_key
+    })
+
+    const first = await submit('outbox-entry-1')
+    expect(first.status).toBe(202)
+    const again = await submit('outbox-entry-1')
+    expect(again.status).toBe(202)
+    expect(again.body.job_id).toBe(first.body.job_id)
+
+    const job = await waitForJob(first.body.job_id, token)
+    expect(job.status).toBe('done')
+    // only the first submission reached the tool
+    const logs = await memoryDB.getAllRequestLogs()
+    expect(logs.filter(l => l.agentId === agentId && l.tool === 'serpapi')).toHaveLength(1)
+
+    const invalid = await submit(42)
+    expect(invalid.status).toBe(400)
+    expect(invalid.body.error).toMatch(/idempotency_key/)
+  })
+
+  test('jobs — multi-id lookups accept at most 100 ids', async () => {
+    const token = await getToken(scraperAgentId, ['serpapi'], ['serpapi:search'])
+    const ids = Array.from({ length: 101 }, (_, i) => `job-${i}`)
+
+    const tooMany = await request(base).get('/api/jobs')
+      .query({ ids: ids.join(',') })
+      .set('Authorization', `Bearer ${token}`)
+    expect(tooMany.status).toBe(400)
+    expect(tooMany.body.error).toMatch(/At most 100/)
+
+    const atCap = await request(base).get('/api/jobs')
+      .query({ ids: ids.slice(0, 100).join(',') })
+      .set('Authorization', `Bearer ${token}`)
+    expect(atCap.status).toBe(200)
+    expect(atCap.body.jobs).toEqual([])
+    expect(atCap.body.missing).toHaveLength(100)
+  })
+
+  test('jobs — lookups need an agent token and only see that agent\'s jobs', async () => {
+    const ownerId = await createAgent('job_owner', 'scraper')
+    const ownerToken = await getToken(ownerId, ['serpapi'], ['serpapi:search'])
+    const otherToken = await getToken(enricherAgentId, ['http_fetch'], ['http_fetch:get'])
+    nock('https://serpapi.com').get('/search').query(true).reply(200, { results: [{ title: 'ok' }], source: 'serpapi' })
+
+    const accepted = await request(base).post('/api/proxy-request').send({
+      agent_token: ownerToken, tool: 'serpapi', action: 'search',
+      params: { q: 'site:example.com owner', engine: 'google' }, async: true
+    })
+    expect(accepted.status).toBe(202)
+    const jobId = accepted.body.job_id
+
+    const anonymous = await request(base).get(`/api/jobs/${jobId}`)
+    expect(anonymous.status).toBe(401)
+    const anonymousMany = await request(base).get('/api/jobs').query({ ids: jobId })
+    expect(anonymousMany.status).toBe(401)
+
+    const forged = await request(base).get(`/api/jobs/${jobId}`).set('Authorization', 'Bearer abc.def')
+    expect(forged.status).toBe(403)
+
+    const other = await request(base).get(`/api/jobs/${jobId}`).set('Authorization', `Bearer ${otherToken}`)
+    expect(other.status).toBe(404)
+    const otherMany = await request(base).get('/api/jobs')
+      .query({ ids: jobId })
+      .set('Authorization', `Bearer ${otherToken}`)
+    expect(otherMany.status).toBe(200)
+    expect(otherMany.body.jobs).toEqual([])
+    expect(otherMany.body.missing).toEqual([jobId])
+
+    const own = await request(base).get(`/api/jobs/${jobId}`).set('Authorization', `Bearer ${ownerToken}`)
+    expect(own.status).toBe(200)
+    expect(own.body.job_id).toBe(jobId)
+  })
+
+  test('batch tokens — entries succeed or fail on their own, in request order', async () => {
+    const expires_at = new Date(Date.now() + 10 * 60_000).toISOString()
+    const res = await request(base).post('/api/generate-tokens').send({
+      requests: [
+        { agent_id: scraperAgentId, tools: ['serpapi'], permissions: ['serpapi:search'], expires_at },
+        { agent_id: 'no-such-agent', tools: ['serpapi'], permissions: ['serpapi:search'], expires_at },
+        { agent_id: enricherAgentId, tools: 'openai', permissions: ['openai:chat'], expires_at },
+        { agent_id: enricherAgentId, tools: ['openai'], permissions: ['openai:chat'], expires_at: new Date(Date.now() - 1000).toISOString() },
+        { agent_id: enricherAgentId, tools: ['openai'], permissions: ['openai:chat'], expires_at }
+      ]
+    })
+    expect(res.status).toBe(200)
+    expect(res.body.tokens.map((t: any) => t.index)).toEqual([0, 1, 2, 3, 4])
+    expect(res.body.tokens.map((t: any) => t.status)).toEqual([201, 404, 400, 400, 201])
+    expect(res.body.tokens[0].agent_token).toMatch(/\./)
+    expect(res.body.tokens[1].error).toMatch(/Agent not found/)
+    expect(res.body.tokens[2].error).toMatch(/must be arrays/)
+    expect(res.body.tokens[3].error).toMatch(/in the future/)
+    expect(res.body.tokens[4].agent_token).not.toBe(res.body.tokens[0].agent_token)
+  })
+
+  test('batch tokens — at most 500 requests per call', async () => {
+    const expires_at = new Date(Date.now() + 10 * 60_000).toISOString()
+    const entry = { agent_id: scraperAgentId, tools: ['serpapi'], permissions: ['serpapi:search'], expires_at }
+
+    const tooMany = await request(base).post('/api/generate-tokens').send({
+      requests: Array.from({ length: 501 }, () => entry)
+    })
+    expect(tooMany.status).toBe(400)
+    expect(tooMany.body.error).toMatch(/At most 500/)
+
+    const atCap = await request(base).post('/api/generate-tokens').send({
+      requests: Array.from({ length: 500 }, () => entry)
+    })
+    expect(atCap.status).toBe(200)
+    expect(atCap.body.tokens).toHaveLength(500)
+    expect(atCap.body.tokens.every((t: any) => t.status === 201)).toBe(true)
+
+    const empty = await request(base).post('/api/generate-tokens').send({ requests: [] })
+    expect(empty.status).toBe(400)
+  })
+
+  test('deadline — an expired X-Request-Deadline-Ms returns 504', async () => {
+    const agentId = await createAgent('deadline_agent', 'scraper')
+    const token = await getToken(agentId, ['serpapi'], ['serpapi:search'])
+
+    const res = await request(base).post('/api/proxy-request')
+      .set('X-Request-Deadline-Ms', '0')
+      .send({
+        agent_token: token, tool: 'serpapi', action: 'search',
+        params: { q: 'site:example.com late', engine: 'google' }
+      })
+    expect(res.status).toBe(504)
+    expect(JSON.stringify(res.body)).toMatch(/Deadline exceeded/)
+
+    // the deadline covers submitting an async job, not running it
+    const accepted = await request(base).post('/api/proxy-request')
+      .set('X-Request-Deadline-Ms', '0')
+      .send({
+        agent_token: token, tool: 'serpapi', action: 'search',
+        params: { q: 'site:example.com late async', engine: 'google' }, async: true
+      })
+    expect(accepted.status).toBe(202)
+    const job = await waitForJob(accepted.body.job_id, token)
+    expect(job.status).toBe('done')
+  })
+
+  test('compression — gzip request bodies are decoded, unknown encodings get 415', async () => {
+    const expires_at = new Date(Date.now() + 10 * 60_000).toISOString()
+    const body = JSON.stringify({ agent_id: scraperAgentId, tools: ['serpapi'], permissions: ['serpapi:search'], expires_at })
+
+    const gzipped = await request(base).post('/api/generate-token')
+      .set('Content-Type', 'application/json')
+      .set('Content-Encoding', 'gzip')
+      .send(zlib.gzipSync(body))
+    expect(gzipped.status).toBe(201)
+    expect(gzipped.body.agent_token).toMatch(/\./)
+    expect(gzipped.headers['accept-encoding']).toMatch(/gzip/)
+
+    const deflated = await request(base).post('/api/generate-token')
+      .set('Content-Type', 'application/json')
+      .set('Content-Encoding', 'deflate')
+      .send(zlib.deflateSync(body))
+    expect(deflated.status).toBe(201)
+
+    const unsupported = await request(base).post('/api/generate-token')
+      .set('Content-Type', 'application/json')
+      .set('Content-Encoding', 'br')
+      .send(zlib.brotliCompressSync(body))
+    expect(unsupported.status).toBe(415)
+    expect(unsupported.body.error).toMatch(/Unsupported Content-Encoding: br/)
+  })
+
+  test('proxy batch — calls succeed or fail on their own, in request order', async () => {
+    const agentId = await createAgent('batch_agent', 'scraper')
+    const token = await getToken(agentId, ['serpapi'], ['serpapi:search'])
+    nock('https://serpapi.com').get('/search').query(true).reply(200, { results: [{ title: 'ok' }], source: 'serpapi' })
+
+    const res = await request(base).post('/api/proxy-batch').send({
+      requests: [
+        { agent_token: token, tool: 'serpapi', action: 'search', params: { q: 'site:example.com batch', engine: 'google' } },
+        { agent_token: token, tool: 'gmail_send', action: 'send', params: { to: 'x@gmail.com', subject: 'hi', text: 'nope' } },
+        { agent_token: token, tool: 'serpapi', action: 'search' },
+        { agent_token: 'not-a-token', tool: 'serpapi', action: 'search', params: { q: 'x' } }
+      ]
+    })
+    expect(res.status).toBe(200)
+    expect(res.headers['x-correlation-id']).toBeTruthy()
+    const results = res.body.results
+    expect(results.map((r: any) => r.index)).toEqual([0, 1, 2, 3])
+    expect(results.map((r: any) => r.status)).toEqual([200, 403, 400, 400])
+    expect(results[0].body.success).toBe(true)
+    expect(results[1].body.error).toMatch(/Policy denied/)
+    expect(results[2].body.error).toMatch(/Missing required fields/)
+    expect(results[3].body.error).toMatch(/Invalid token format/)
+  })
+
+  test('proxy batch — at most 100 calls per request', async () => {
+    const token = await getToken(scraperAgentId, ['serpapi'], ['serpapi:search'])
+    const call = { agent_token: token, tool: 'serpapi', action: 'search', params: { q: 'x' } }
+
+    const tooMany = await request(base).post('/api/proxy-batch').send({
+      requests: Array.from({ length: 101 }, () => call)
+    })
+    expect(tooMany.status).toBe(400)
+    expect(tooMany.body.error).toMatch(/At most 100/)
+
+    const empty = await request(base).post('/api/proxy-batch').send({ requests: [] })
+    expect(empty.status).toBe(400)
+    expect(empty.body.error).toMatch(/non-empty array/)
+  })
+
   test('metrics endpoint — returns prometheus metrics', async () => {
     const res = await request(base).get('/metrics')
     expect(res.status).toBe(200)